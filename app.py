@@ -2,8 +2,18 @@ import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
 import json
+import numpy as np
 from datetime import datetime
 
+import batch_model
+import cost_model
+import lookup_table
+import rag_io
+import sensitivity
+from cost_model import calculate_voice_cost, calculate_email_cost
+from cost_graph import build_cost_graph
+from pricing_store import pricing_fingerprint
+
 # ==============================================================================
 # LOAD PRICING CONFIGURATION
 # ==============================================================================
@@ -11,266 +21,25 @@ from datetime import datetime
 @st.cache_data(ttl=60)  # Cache expires after 60 seconds to pick up pricing updates
 def load_pricing():
     """Load pricing configuration from JSON file"""
-    with open('pricing_config.json', 'r') as f:
-        return json.load(f)
+    return cost_model.load_pricing()
 
 pricing = load_pricing()
 
-# ==============================================================================
-# CALCULATION FUNCTIONS
-# ==============================================================================
-
-def calculate_blob_storage_cost(num_pages, enable_rag):
-    """Calculate shared blob storage cost"""
-    if not enable_rag or num_pages == 0:
-        return {'cost': 0, 'storage_gb': 0}
-
-    blob_config = pricing['shared']['blob_storage']
-
-    # Document storage
-    storage_gb = (num_pages * blob_config['mb_per_page'] / 1024) * blob_config['index_overhead_multiplier']
-
-    # Cost
-    blob_cost = storage_gb * blob_config['hot_tier_per_gb_month']
-
-    return {
-        'cost': blob_cost,
-        'storage_gb': storage_gb
-    }
-
-
-def calculate_voice_cost(minutes_per_call, calls_per_day, model_key, num_phones, min_replicas, business_hours_only=False):
-    """Calculate voice agent monthly costs"""
-
-    # Load pricing
-    acs_pricing = pricing['voice_agent']['acs']
-    container_config = pricing['voice_agent']['container_apps']
-    model = pricing['voice_agent']['models'][model_key]
-    audio_conversion = pricing['voice_agent']['audio_conversion']
-    operating_hours_config = pricing['email_agent']['operating_hours']
-
-    # Volume calculations
-    calls_per_month = calls_per_day * 30
-    total_minutes = calls_per_month * minutes_per_call
-
-    # ACS costs
-    phone_cost = num_phones * acs_pricing['phone_number_per_month']
-    acs_call_cost = total_minutes * acs_pricing['inbound_per_minute']
-
-    # Container costs
-    if min_replicas == 0:
-        # Serverless: only pay during calls
-        call_seconds = calls_per_month * (minutes_per_call * 60)
-
-        # vCPU cost
-        vcpu_seconds = call_seconds
-        if vcpu_seconds > container_config['free_vcpu_seconds_per_month']:
-            vcpu_cost = (vcpu_seconds - container_config['free_vcpu_seconds_per_month']) * container_config['vcpu_per_replica'] * container_config['vcpu_active_per_second']
-        else:
-            vcpu_cost = 0
-
-        # Memory cost
-        gb_seconds = call_seconds * container_config['memory_gb_per_replica']
-        if gb_seconds > container_config['free_gb_seconds_per_month']:
-            memory_cost = (gb_seconds - container_config['free_gb_seconds_per_month']) * container_config['memory_gb_active_per_second']
-        else:
-            memory_cost = 0
-
-        # Request cost (NEW)
-        # Serverless: each call generates ~2 requests (connection + messages)
-        requests = calls_per_month * 2
-        if requests > container_config['free_requests_per_month']:
-            request_cost = ((requests - container_config['free_requests_per_month']) / 1_000_000) * container_config['requests_per_million']
-        else:
-            request_cost = 0
-
-        container_cost = vcpu_cost + memory_cost + request_cost
-
-    else:
-        # Always-on: pay for operating hours (business hours or 24/7)
-        if business_hours_only:
-            # Business hours: ~227.3 hours/month
-            operating_hours = operating_hours_config['business_hours_per_month']
-        else:
-            # Full time: 720 hours/month (30 days × 24 hours)
-            operating_hours = operating_hours_config['full_time_hours_per_month']
-
-        monthly_seconds = operating_hours * 3600  # Convert hours to seconds
-
-        # Active time: during calls
-        active_seconds = calls_per_month * (minutes_per_call * 60)
-        idle_seconds = monthly_seconds - active_seconds
-
-        # Active costs (separate vCPU and memory for breakdown)
-        active_vcpu_cost = min_replicas * active_seconds * container_config['vcpu_per_replica'] * container_config['vcpu_active_per_second']
-        active_memory_cost = min_replicas * active_seconds * container_config['memory_gb_per_replica'] * container_config['memory_gb_active_per_second']
-        active_cost = active_vcpu_cost + active_memory_cost
-
-        # Idle costs (flat rate for both vCPU + memory combined)
-        idle_cost = min_replicas * idle_seconds * container_config['idle_per_second']
-
-        # Calculate separate vcpu and memory costs for breakdown
-        # For idle, we split the flat rate proportionally based on active rates
-        total_active_rate = (container_config['vcpu_per_replica'] * container_config['vcpu_active_per_second']) + \
-                           (container_config['memory_gb_per_replica'] * container_config['memory_gb_active_per_second'])
-        vcpu_active_rate = container_config['vcpu_per_replica'] * container_config['vcpu_active_per_second']
-        memory_active_rate = container_config['memory_gb_per_replica'] * container_config['memory_gb_active_per_second']
-
-        vcpu_idle_portion = (vcpu_active_rate / total_active_rate) if total_active_rate > 0 else 0.5
-        memory_idle_portion = (memory_active_rate / total_active_rate) if total_active_rate > 0 else 0.5
-
-        idle_vcpu_cost = idle_cost * vcpu_idle_portion
-        idle_memory_cost = idle_cost * memory_idle_portion
-
-        vcpu_cost = active_vcpu_cost + idle_vcpu_cost
-        memory_cost = active_memory_cost + idle_memory_cost
-
-        # vCPU and Memory seconds for always-on
-        vcpu_seconds = min_replicas * monthly_seconds
-        gb_seconds = min_replicas * monthly_seconds * container_config['memory_gb_per_replica']
-
-        # Request cost (NEW)
-        # Always-on: health checks + actual requests
-        # Azure does ~1 health check per minute
-        if business_hours_only:
-            health_checks_per_month = operating_hours * 60  # 1 per minute during operating hours
-        else:
-            health_checks_per_month = 30 * 24 * 60  # 43,200/month for 24/7
-
-        actual_requests = calls_per_month * 2
-        requests = health_checks_per_month + actual_requests
-        if requests > container_config['free_requests_per_month']:
-            request_cost = ((requests - container_config['free_requests_per_month']) / 1_000_000) * container_config['requests_per_million']
-        else:
-            request_cost = 0
-
-        container_cost = active_cost + idle_cost + request_cost
-
-    # AI Audio costs (per million tokens, convert to per-minute)
-    tokens_per_minute = audio_conversion['tokens_per_minute_audio']
-    total_audio_tokens = total_minutes * tokens_per_minute
-
-    # Split: use config values (40% customer input, 60% AI output)
-    input_tokens = total_audio_tokens * audio_conversion['input_split']
-    output_tokens = total_audio_tokens * audio_conversion['output_split']
-
-    audio_input_cost = (input_tokens / 1_000_000) * model['audio_input_per_m_tokens']
-    audio_output_cost = (output_tokens / 1_000_000) * model['audio_output_per_m_tokens']
-
-    # Text reasoning costs (2000 tokens per call)
-    text_tokens = model['tokens_per_call']
-    text_input_tokens = text_tokens * 0.7
-    text_output_tokens = text_tokens * 0.3
-
-    text_input_cost = calls_per_month * (text_input_tokens / 1_000_000) * model['text_input_per_m_tokens']
-    text_output_cost = calls_per_month * (text_output_tokens / 1_000_000) * model['text_output_per_m_tokens']
-
-    # Total AI cost
-    ai_cost = audio_input_cost + audio_output_cost + text_input_cost + text_output_cost
-
-    # Total
-    total_cost = phone_cost + acs_call_cost + container_cost + ai_cost
-
-    return {
-        'total': total_cost,
-        'phone': phone_cost,
-        'acs': acs_call_cost,
-        'container': container_cost,
-        'ai_audio': audio_input_cost + audio_output_cost,
-        'ai_text': text_input_cost + text_output_cost,
-        'ai_total': ai_cost,
-        'calls': calls_per_month,
-        'minutes': total_minutes,
-        'cost_per_call': total_cost / calls_per_month,
-        'vcpu_seconds': vcpu_seconds,  # NEW
-        'gb_seconds': gb_seconds,  # NEW
-        'requests': requests,  # NEW
-        'business_hours': business_hours_only,  # NEW
-        'breakdown': {
-            'phone_cost': phone_cost,
-            'acs_cost': acs_call_cost,
-            'container_cost': container_cost,
-            'container_vcpu': vcpu_cost,  # NEW
-            'container_memory': memory_cost,  # NEW
-            'container_requests': request_cost,  # NEW
-            'audio_input': audio_input_cost,
-            'audio_output': audio_output_cost,
-            'text_input': text_input_cost,
-            'text_output': text_output_cost
-        }
-    }
-
-
-def calculate_email_cost(emails_per_day, polling_minutes, model_key, enable_rag, num_pages, business_hours_only):
-    """Calculate email agent monthly costs"""
-
-    # Load pricing
-    functions_config = pricing['email_agent']['azure_functions']
-    model = pricing['email_agent']['models'][model_key]
-    token_config = pricing['email_agent']['tokens']
-    operating_hours = pricing['email_agent']['operating_hours']
-
-    # Volume
-    emails_per_month = emails_per_day * 30
-
-    # Adjust checks for business hours (use config values)
-    if business_hours_only:
-        hours_per_month = operating_hours['business_hours_per_month']
-    else:
-        hours_per_month = operating_hours['full_time_hours_per_month']
 
-    checks_per_month = (hours_per_month * 60) / polling_minutes
+@st.cache_resource
+def load_lookup_table(pricing_sha):
+    """Precomputed tables for this pricing (built in the background on first use)"""
+    return lookup_table.BackgroundTable(pricing)
 
-    # Azure Functions cost
-    # Execution cost
-    if checks_per_month > functions_config['free_executions_per_month']:
-        execution_cost = ((checks_per_month - functions_config['free_executions_per_month']) / 1_000_000) * functions_config['execution_cost_per_million']
-    else:
-        execution_cost = 0
+lookup = load_lookup_table(pricing_fingerprint(pricing))
 
-    # Compute cost (3 seconds per check, 0.5 GB memory)
-    execution_seconds = checks_per_month * functions_config['seconds_per_execution']
-    gb_seconds = execution_seconds * functions_config['memory_gb']
 
-    if gb_seconds > functions_config['free_gb_seconds_per_month']:
-        compute_cost = (gb_seconds - functions_config['free_gb_seconds_per_month']) * functions_config['compute_cost_per_gb_second']
-    else:
-        compute_cost = 0
+@st.cache_resource
+def load_compiled_pricing(pricing_sha):
+    """Pricing compiled into rate arrays for the vectorized comparisons"""
+    return batch_model.compile_pricing(pricing)
 
-    functions_cost = execution_cost + compute_cost
-
-    # LLM costs (per million tokens, NOT per 1K)
-    if enable_rag:
-        input_tokens_per_email = token_config['base_input_tokens'] + token_config['rag_additional_tokens']
-    else:
-        input_tokens_per_email = token_config['base_input_tokens']
-
-    output_tokens_per_email = token_config['output_tokens']
-
-    total_input_tokens = emails_per_month * input_tokens_per_email
-    total_output_tokens = emails_per_month * output_tokens_per_email
-
-    llm_input_cost = (total_input_tokens / 1_000_000) * model['input_per_m_tokens']
-    llm_output_cost = (total_output_tokens / 1_000_000) * model['output_per_m_tokens']
-    llm_cost = llm_input_cost + llm_output_cost
-
-    # Total (blob storage calculated separately as shared resource)
-    total_cost = functions_cost + llm_cost
-
-    return {
-        'total': total_cost,
-        'functions': functions_cost,
-        'llm': llm_cost,
-        'emails': emails_per_month,
-        'checks': checks_per_month,
-        'cost_per_email': total_cost / emails_per_month if emails_per_month > 0 else 0,
-        'gb_seconds': gb_seconds,
-        'execution_cost': execution_cost,
-        'compute_cost': compute_cost,
-        'llm_input': llm_input_cost,
-        'llm_output': llm_output_cost,
-        'business_hours': business_hours_only
-    }
+compiled = load_compiled_pricing(pricing_fingerprint(pricing))
 
 # ==============================================================================
 # PAGE CONFIGURATION
@@ -293,6 +62,10 @@ with col3:
         st.caption(f"**Currency:** {pricing['currency']}")
         st.caption(f"**Updated:** {pricing['last_updated']}")
         st.caption("💡 Prices from `pricing_config.json`")
+        if lookup.error:
+            st.caption(f"⚠️ Lookup tables unavailable ({lookup.error}); using the calculators")
+        else:
+            st.caption("⚡ Lookup tables: " + ("ready" if lookup.ready else "building…"))
 
 # ==============================================================================
 # ==============================================================================
@@ -375,6 +148,25 @@ if voice_operating_hours:
     operating_hours = pricing['email_agent']['operating_hours']
     st.sidebar.caption(f"💡 Voice agent active during business hours (~{operating_hours['business_hours_per_month']:.1f} hours/month vs 720 for 24/7)")
 
+# Prompt Caching
+voice_audio_cache_pct = st.sidebar.slider(
+    "Audio input cache hits (%)",
+    min_value=0,
+    max_value=100,
+    value=0,
+    step=5,
+    help="Share of audio input tokens served from the prompt cache (billed at the cached input rate)"
+)
+
+voice_text_cache_pct = st.sidebar.slider(
+    "Text input cache hits (%)",
+    min_value=0,
+    max_value=100,
+    value=0,
+    step=5,
+    help="Share of text input tokens (system prompt, instructions) served from the prompt cache"
+)
+
 # ==============================================================================
 # SIDEBAR: EMAIL AGENT CONFIGURATION
 # ==============================================================================
@@ -463,6 +255,100 @@ if email_enable_rag:
 else:
     email_num_pages = 0
 
+# Prompt Caching
+email_input_cache_pct = st.sidebar.slider(
+    "Input cache hits (%)",
+    min_value=0,
+    max_value=100,
+    value=0,
+    step=5,
+    help="Share of input tokens (system prompt, RAG context) served from the prompt cache (billed at the cached input rate)"
+)
+
+# ==============================================================================
+# COST GRAPH
+# ==============================================================================
+
+# The graph lives in the session so a slider change only recomputes the
+# quantities that depend on it (see cost_graph.py)
+if 'cost_graph' not in st.session_state:
+    st.session_state.cost_graph = build_cost_graph(pricing)
+cost_graph = st.session_state.cost_graph
+cost_graph.set_pricing(pricing)
+cost_graph.set_inputs(
+    voice_minutes_per_call=voice_minutes_per_call,
+    voice_calls_per_day=voice_calls_per_day,
+    voice_model_key=voice_model_key,
+    voice_num_phones=voice_num_phones,
+    voice_min_replicas=voice_min_replicas,
+    voice_business_hours=voice_operating_hours,
+    voice_audio_cache_ratio=voice_audio_cache_pct / 100,
+    voice_text_cache_ratio=voice_text_cache_pct / 100,
+    email_emails_per_day=email_emails_per_day,
+    email_polling_minutes=email_polling_interval,
+    email_model_key=email_model_key,
+    email_enable_rag=email_enable_rag,
+    email_num_pages=email_num_pages,
+    email_business_hours=email_operating_hours,
+    email_input_cache_ratio=email_input_cache_pct / 100
+)
+
+# Table lookups for what-if comparisons (calculators outside the table domain
+# or while the tables are still being built)
+def voice_cost(*args):
+    return lookup.voice(*args) or calculate_voice_cost(pricing, *args)
+
+
+def email_cost(*args):
+    return lookup.email(*args) or calculate_email_cost(pricing, *args)
+
+
+# Tables hold numbers; st.dataframe formats them for display
+def chf_column(label, decimals=2):
+    return st.column_config.NumberColumn(label, format=f"CHF %.{decimals}f")
+
+
+def pct_column(label):
+    return st.column_config.NumberColumn(label, format="%.1f%%")
+
+
+def count_column(label):
+    return st.column_config.NumberColumn(label, format="%d")
+
+# ==============================================================================
+# PROMPT-CACHE SWEEP
+# ==============================================================================
+
+def render_cache_sweep(channel, inputs, model_names, current_model):
+    """Cost of every model over cache hit ratios 0-100%, with the points where the ranking changes"""
+    keys, ratios, totals = batch_model.cache_sweep(
+        compiled, channel, inputs, [pct / 100 for pct in range(0, 101, 5)]
+    )
+
+    fig = go.Figure()
+    for key, row in zip(keys, totals):
+        fig.add_trace(go.Scatter(
+            x=ratios * 100,
+            y=row,
+            mode='lines',
+            name=model_names[key],
+            line=dict(width=4 if key == current_model else 1.5)
+        ))
+    fig.update_layout(height=400, xaxis_title="Cache hit ratio (%)", yaxis_title="Monthly Cost (CHF)")
+    st.plotly_chart(fig, use_container_width=True)
+
+    crossovers = batch_model.cache_crossovers(keys, ratios, totals)
+    if crossovers:
+        st.dataframe(pd.DataFrame([{
+            "Cheaper without caching": model_names[row['cheaper']],
+            "Overtaken by": model_names[row['overtaken_by']],
+            "From cache hit ratio": row['ratio'] * 100
+        } for row in crossovers]), use_container_width=True, hide_index=True, column_config={
+            "From cache hit ratio": st.column_config.NumberColumn("From cache hit ratio", format="%.0f%%")
+        })
+    else:
+        st.caption("Caching does not change the cost ranking of the models at this volume.")
+
 # ==============================================================================
 # TABS
 # ==============================================================================
@@ -477,43 +363,40 @@ with tab1:
     st.header("📞 Voice Agent Costs")
 
     # Calculate costs
-    voice_results = calculate_voice_cost(
-        voice_minutes_per_call,
-        voice_calls_per_day,
-        voice_model_key,
-        voice_num_phones,
-        voice_min_replicas,
-        voice_operating_hours
-    )
+    voice_results = cost_graph.voice_results()
 
     # Main metrics
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("💰 Monthly Cost", f"CHF {voice_results['total']:,.2f}")
+        st.metric("💰 Monthly Cost", f"CHF {voice_results.total:,.2f}")
     with col2:
-        st.metric("📞 Cost per Call", f"CHF {voice_results['cost_per_call']:.2f}")
+        st.metric("📞 Cost per Call", f"CHF {voice_results.cost_per_call:.2f}")
     with col3:
-        st.metric("📊 Monthly Calls", f"{voice_results['calls']:,}")
+        st.metric("📊 Monthly Calls", f"{voice_results.calls:,}")
     with col4:
-        st.metric("⏱️ Total Minutes", f"{voice_results['minutes']:,}")
+        st.metric("⏱️ Total Minutes", f"{voice_results.minutes:,}")
 
     # Operating hours info
-    if voice_results['business_hours'] and voice_min_replicas > 0:
+    if voice_results.business_hours and voice_min_replicas > 0:
         operating_hours_config = pricing['email_agent']['operating_hours']
         hours_def = operating_hours_config['business_hours_definition']
         hours_saved = operating_hours_config['full_time_hours_per_month'] - operating_hours_config['business_hours_per_month']
         st.info(f"⏰ Voice agent operates during business hours only ({hours_def}) - Saves {hours_saved:.1f} hours/month vs 24/7 (applies to always-on mode)")
 
+    # Prompt caching info
+    if voice_results.cache_savings > 0:
+        st.info(f"🗄️ Prompt caching saves CHF {voice_results.cache_savings:,.2f}/month on AI input tokens")
+
     # Cost breakdown pie chart
     st.subheader("📊 Cost Distribution")
 
     voice_breakdown = {
-        "AI Audio Processing": voice_results['ai_audio'],
-        "AI Text Reasoning": voice_results['ai_text'],
-        "Phone Calls (ACS)": voice_results['acs'],
-        "Container - Compute": voice_results['breakdown']['container_vcpu'] + voice_results['breakdown']['container_memory'],
-        "Container - Requests": voice_results['breakdown']['container_requests'],
-        "Phone Numbers": voice_results['phone']
+        "AI Audio Processing": voice_results.ai_audio,
+        "AI Text Reasoning": voice_results.ai_text,
+        "Phone Calls (ACS)": voice_results.acs,
+        "Container - Compute": voice_results.container_vcpu + voice_results.container_memory,
+        "Container - Requests": voice_results.container_requests,
+        "Phone Numbers": voice_results.phone
     }
 
     # Remove zero values
@@ -531,40 +414,46 @@ with tab1:
 
     # Detailed breakdown table
     st.subheader("📋 Detailed Breakdown")
-    breakdown_data = []
-    for service, cost in voice_breakdown.items():
-        breakdown_data.append({
-            "Service": service,
-            "Monthly Cost": f"CHF {cost:.2f}",
-            "% of Total": f"{(cost/voice_results['total']*100):.1f}%",
-            "Cost per Call": f"CHF {(cost/voice_results['calls']):.4f}"
-        })
-
-    df = pd.DataFrame(breakdown_data)
-    st.dataframe(df, use_container_width=True, hide_index=True)
+    df = pd.DataFrame({"Service": list(voice_breakdown), "Monthly Cost": list(voice_breakdown.values())})
+    df["% of Total"] = df["Monthly Cost"] / voice_results.total * 100
+    df["Cost per Call"] = df["Monthly Cost"] / voice_results.calls
+    st.dataframe(df, use_container_width=True, hide_index=True, column_config={
+        "Monthly Cost": chf_column("Monthly Cost"),
+        "% of Total": pct_column("% of Total"),
+        "Cost per Call": chf_column("Cost per Call", 4)
+    })
 
     # Model comparison
     st.subheader("🔄 Model Comparison at Current Volume")
 
-    model_comparison = []
-    for model_key_temp, model_data in pricing['voice_agent']['models'].items():
-        temp_results = calculate_voice_cost(
-            voice_minutes_per_call,
-            voice_calls_per_day,
-            model_key_temp,
-            voice_num_phones,
-            voice_min_replicas,
-            voice_operating_hours
-        )
-        model_comparison.append({
-            "Model": model_data['name'],
-            "Monthly Cost": f"CHF {temp_results['total']:,.2f}",
-            "Cost per Call": f"CHF {temp_results['cost_per_call']:.2f}",
-            "AI Cost": f"CHF {temp_results['ai_total']:.2f}"
-        })
+    # All models in one vectorized evaluation (structured array, one row per model)
+    records = batch_model.voice_records(
+        compiled, voice_minutes_per_call, voice_calls_per_day, np.arange(len(compiled.voice_model_keys)),
+        voice_num_phones, voice_min_replicas, voice_operating_hours,
+        voice_audio_cache_pct / 100, voice_text_cache_pct / 100
+    )
+    df_models = pd.DataFrame({
+        "Model": [voice_model_names[key] for key in compiled.voice_model_keys],
+        "Monthly Cost": records['total'],
+        "Cost per Call": records['cost_per_call'],
+        "AI Cost": records['ai_total']
+    })
+    st.dataframe(df_models, use_container_width=True, hide_index=True, column_config={
+        "Monthly Cost": chf_column("Monthly Cost"),
+        "Cost per Call": chf_column("Cost per Call"),
+        "AI Cost": chf_column("AI Cost")
+    })
 
-    df_models = pd.DataFrame(model_comparison)
-    st.dataframe(df_models, use_container_width=True, hide_index=True)
+    # Prompt caching sweep
+    st.subheader("🗄️ Prompt Caching: Cost by Cache Hit Ratio")
+    st.caption("Audio and text input cache hits swept together from 0% to 100%; the selected model is drawn thicker.")
+    render_cache_sweep('voice', {
+        'minutes_per_call': voice_minutes_per_call,
+        'calls_per_day': voice_calls_per_day,
+        'num_phones': voice_num_phones,
+        'min_replicas': voice_min_replicas,
+        'business_hours_only': voice_operating_hours
+    }, voice_model_names, voice_model_key)
 
     # Free tier usage
     st.subheader("🎁 Container Apps Free Tier Status")
@@ -573,7 +462,7 @@ with tab1:
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        vcpu_seconds = voice_results.get('vcpu_seconds', 0)
+        vcpu_seconds = voice_results.vcpu_seconds
         vcpu_pct = (vcpu_seconds / container_config['free_vcpu_seconds_per_month']) * 100
         vcpu_color = "normal" if vcpu_pct < 100 else "inverse"
         st.metric(
@@ -586,7 +475,7 @@ with tab1:
             st.warning("⚠️ Approaching vCPU limit")
 
     with col2:
-        gb_seconds = voice_results.get('gb_seconds', 0)
+        gb_seconds = voice_results.gb_seconds
         gb_pct = (gb_seconds / container_config['free_gb_seconds_per_month']) * 100
         gb_color = "normal" if gb_pct < 100 else "inverse"
         st.metric(
@@ -599,7 +488,7 @@ with tab1:
             st.warning("⚠️ Approaching memory limit")
 
     with col3:
-        requests = voice_results.get('requests', 0)
+        requests = voice_results.requests
         requests_pct = (requests / container_config['free_requests_per_month']) * 100
         requests_color = "normal" if requests_pct < 100 else "inverse"
         st.metric(
@@ -616,7 +505,7 @@ with tab1:
 
     replica_comparison = []
     for replicas in [0, 1, 2, 3]:
-        temp_results = calculate_voice_cost(
+        temp_results = voice_cost(
             voice_minutes_per_call,
             voice_calls_per_day,
             voice_model_key,
@@ -630,13 +519,16 @@ with tab1:
 
         replica_comparison.append({
             "Configuration": config_name,
-            "Monthly Cost": f"CHF {temp_results['total']:.2f}",
-            "Container Cost": f"CHF {temp_results['container']:.2f}",
+            "Monthly Cost": temp_results.total,
+            "Container Cost": temp_results.container,
             "Cold Start": cold_start
         })
 
     df_replicas = pd.DataFrame(replica_comparison)
-    st.dataframe(df_replicas, use_container_width=True, hide_index=True)
+    st.dataframe(df_replicas, use_container_width=True, hide_index=True, column_config={
+        "Monthly Cost": chf_column("Monthly Cost"),
+        "Container Cost": chf_column("Container Cost")
+    })
 
     # Highlight current selection
     current_config = "Serverless (0 replicas)" if voice_min_replicas == 0 else f"Always-on ({voice_min_replicas} replica{'s' if voice_min_replicas > 1 else ''})"
@@ -650,27 +542,20 @@ with tab2:
     st.header("📧 Email Agent Costs")
 
     # Calculate costs
-    email_results = calculate_email_cost(
-        email_emails_per_day,
-        email_polling_interval,
-        email_model_key,
-        email_enable_rag,
-        email_num_pages,
-        email_operating_hours
-    )
+    email_results = cost_graph.email_results()
 
     # Calculate shared blob storage
-    blob_results = calculate_blob_storage_cost(email_num_pages, email_enable_rag)
+    blob_results = cost_graph.blob_results()
 
     # Main metrics
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        total_with_storage = email_results['total'] + blob_results['cost']
+        total_with_storage = email_results.total + blob_results.cost
         st.metric("💰 Monthly Cost", f"CHF {total_with_storage:,.2f}")
     with col2:
-        st.metric("📧 Cost per Email", f"CHF {email_results['cost_per_email']:.4f}")
+        st.metric("📧 Cost per Email", f"CHF {email_results.cost_per_email:.4f}")
     with col3:
-        st.metric("📊 Monthly Emails", f"{email_results['emails']:,}")
+        st.metric("📊 Monthly Emails", f"{email_results.emails:,}")
     with col4:
         if email_enable_rag:
             st.metric("📚 Manual Pages", f"{email_num_pages:,}")
@@ -678,18 +563,22 @@ with tab2:
             st.metric("📚 RAG", "Disabled")
 
     # Operating hours info
-    if email_results['business_hours']:
+    if email_results.business_hours:
         hours_def = pricing['email_agent']['operating_hours']['business_hours_definition']
         hours_saved = pricing['email_agent']['operating_hours']['full_time_hours_per_month'] - pricing['email_agent']['operating_hours']['business_hours_per_month']
         st.info(f"⏰ Email agent operates during business hours only ({hours_def}) - Saves {hours_saved:.1f} hours/month vs 24/7")
 
+    # Prompt caching info
+    if email_results.cache_savings > 0:
+        st.info(f"🗄️ Prompt caching saves CHF {email_results.cache_savings:,.2f}/month on LLM input tokens")
+
     # Cost breakdown pie chart
     st.subheader("📊 Cost Distribution")
 
     email_breakdown = {
-        "AI Model (LLM)": email_results['llm'],
-        "Azure Functions": email_results['functions'],
-        "Blob Storage": blob_results['cost']
+        "AI Model (LLM)": email_results.llm,
+        "Azure Functions": email_results.functions,
+        "Blob Storage": blob_results.cost
     }
 
     email_breakdown = {k: v for k, v in email_breakdown.items() if v > 0}
@@ -706,17 +595,14 @@ with tab2:
 
     # Detailed breakdown
     st.subheader("📋 Detailed Breakdown")
-    breakdown_data = []
-    for service, cost in email_breakdown.items():
-        breakdown_data.append({
-            "Service": service,
-            "Monthly Cost": f"CHF {cost:.2f}",
-            "% of Total": f"{(cost/total_with_storage*100):.1f}%",
-            "Cost per Email": f"CHF {(cost/email_results['emails']):.6f}"
-        })
-
-    df = pd.DataFrame(breakdown_data)
-    st.dataframe(df, use_container_width=True, hide_index=True)
+    df = pd.DataFrame({"Service": list(email_breakdown), "Monthly Cost": list(email_breakdown.values())})
+    df["% of Total"] = df["Monthly Cost"] / total_with_storage * 100
+    df["Cost per Email"] = df["Monthly Cost"] / email_results.emails
+    st.dataframe(df, use_container_width=True, hide_index=True, column_config={
+        "Monthly Cost": chf_column("Monthly Cost"),
+        "% of Total": pct_column("% of Total"),
+        "Cost per Email": chf_column("Cost per Email", 6)
+    })
 
     # Free tier usage
     st.subheader("🎁 Azure Functions Free Tier Status")
@@ -725,24 +611,24 @@ with tab2:
 
     col1, col2 = st.columns(2)
     with col1:
-        exec_pct = (email_results['checks'] / functions_config['free_executions_per_month']) * 100
+        exec_pct = (email_results.checks / functions_config['free_executions_per_month']) * 100
         exec_color = "normal" if exec_pct < 100 else "inverse"
         st.metric(
             "Execution Usage",
             f"{exec_pct:.1f}%",
-            delta=f"{email_results['checks']:,.0f} / {functions_config['free_executions_per_month']:,} free",
+            delta=f"{email_results.checks:,.0f} / {functions_config['free_executions_per_month']:,} free",
             delta_color=exec_color
         )
         if exec_pct >= 90:
             st.warning("⚠️ Approaching execution limit")
 
     with col2:
-        gb_pct = (email_results['gb_seconds'] / functions_config['free_gb_seconds_per_month']) * 100
+        gb_pct = (email_results.gb_seconds / functions_config['free_gb_seconds_per_month']) * 100
         gb_color = "normal" if gb_pct < 100 else "inverse"
         st.metric(
             "Compute Usage",
             f"{gb_pct:.1f}%",
-            delta=f"{email_results['gb_seconds']:,.0f} / {functions_config['free_gb_seconds_per_month']:,} free",
+            delta=f"{email_results.gb_seconds:,.0f} / {functions_config['free_gb_seconds_per_month']:,} free",
             delta_color=gb_color
         )
         if gb_pct >= 90:
@@ -751,48 +637,90 @@ with tab2:
     # Model comparison
     st.subheader("🔄 Model Comparison at Current Volume")
 
-    model_comparison = []
-    for model_key_temp, model_data in pricing['email_agent']['models'].items():
-        temp_results = calculate_email_cost(
-            email_emails_per_day,
-            email_polling_interval,
-            model_key_temp,
-            email_enable_rag,
-            email_num_pages,
-            email_operating_hours
-        )
-        model_comparison.append({
-            "Model": model_data['name'],
-            "Monthly Cost": f"CHF {temp_results['total']:.2f}",
-            "Cost per Email": f"CHF {temp_results['cost_per_email']:.4f}",
-            "LLM Cost": f"CHF {temp_results['llm']:.2f}"
-        })
+    records = batch_model.email_records(
+        compiled, email_emails_per_day, email_polling_interval, np.arange(len(compiled.email_model_keys)),
+        email_enable_rag, email_operating_hours, email_input_cache_pct / 100
+    )
+    df_models = pd.DataFrame({
+        "Model": [email_model_names[key] for key in compiled.email_model_keys],
+        "Monthly Cost": records['total'],
+        "Cost per Email": records['cost_per_email'],
+        "LLM Cost": records['llm']
+    })
+    st.dataframe(df_models, use_container_width=True, hide_index=True, column_config={
+        "Monthly Cost": chf_column("Monthly Cost"),
+        "Cost per Email": chf_column("Cost per Email", 4),
+        "LLM Cost": chf_column("LLM Cost")
+    })
 
-    df_models = pd.DataFrame(model_comparison)
-    st.dataframe(df_models, use_container_width=True, hide_index=True)
+    # Prompt caching sweep
+    st.subheader("🗄️ Prompt Caching: Cost by Cache Hit Ratio")
+    st.caption("Input cache hits swept from 0% to 100%; the selected model is drawn thicker.")
+    render_cache_sweep('email', {
+        'emails_per_day': email_emails_per_day,
+        'polling_minutes': email_polling_interval,
+        'enable_rag': email_enable_rag,
+        'business_hours_only': email_operating_hours
+    }, email_model_names, email_model_key)
 
     # Polling frequency comparison
     st.subheader("⏱️ Polling Frequency Impact")
 
+    push_batch = st.number_input(
+        "Emails per push execution (micro-batching)", min_value=1, max_value=100, value=10,
+        help="Push mode: mail notifications trigger the function; several emails can share one execution"
+    )
+
     polling_comparison = []
-    for poll_min in [1, 5, 10, 30, 60]:
-        temp_results = calculate_email_cost(
+    for poll_min in batch_model.POLLING_OPTIONS:
+        temp_results = email_cost(
             email_emails_per_day,
             poll_min,
             email_model_key,
             email_enable_rag,
             email_num_pages,
-            email_operating_hours
+            email_operating_hours,
+            email_input_cache_pct / 100
         )
+        average_latency, worst_latency = cost_model.calculate_email_latency(
+            pricing, email_emails_per_day, poll_min, email_operating_hours)
         polling_comparison.append({
-            "Check Frequency": f"Every {poll_min} min",
-            "Checks/Month": f"{temp_results['checks']:,.0f}",
-            "Functions Cost": f"CHF {temp_results['functions']:.2f}",
-            "Total Cost": f"CHF {temp_results['total']:.2f}"
+            "Ingestion": f"Poll every {poll_min} min",
+            "Executions/Month": temp_results.checks,
+            "Functions Cost": temp_results.functions,
+            "Total Cost": temp_results.total,
+            "Avg. Latency": average_latency,
+            "Worst Latency": worst_latency
+        })
+    for batch in sorted({1, push_batch}):
+        temp_results = calculate_email_cost(
+            pricing, email_emails_per_day, email_polling_interval, email_model_key, email_enable_rag,
+            email_num_pages, email_operating_hours, email_input_cache_pct / 100,
+            ingestion='push', emails_per_execution=batch
+        )
+        average_latency, worst_latency = cost_model.calculate_email_latency(
+            pricing, email_emails_per_day, email_polling_interval, email_operating_hours, 'push', batch)
+        polling_comparison.append({
+            "Ingestion": "Push (per email)" if batch == 1 else f"Push (up to {batch} emails/execution)",
+            "Executions/Month": temp_results.checks,
+            "Functions Cost": temp_results.functions,
+            "Total Cost": temp_results.total,
+            "Avg. Latency": average_latency,
+            "Worst Latency": worst_latency
         })
 
     df_polling = pd.DataFrame(polling_comparison)
-    st.dataframe(df_polling, use_container_width=True, hide_index=True)
+    st.dataframe(df_polling, use_container_width=True, hide_index=True, column_config={
+        "Executions/Month": count_column("Executions/Month"),
+        "Functions Cost": chf_column("Functions Cost"),
+        "Total Cost": chf_column("Total Cost"),
+        "Avg. Latency": st.column_config.NumberColumn("Avg. Latency", format="%.0f s"),
+        "Worst Latency": st.column_config.NumberColumn("Worst Latency", format="%.0f s")
+    })
+    st.caption("Latency from an email's arrival to the agent's reply. Push executions include "
+               "mail subscription renewals; a micro-batch is flushed when full or after "
+               f"{pricing['email_agent']['push_ingestion']['max_batch_wait_seconds']} s, "
+               "so at low volume most executions handle a single email.")
 
 # ==============================================================================
 # TAB 3: COMBINED TOTAL
@@ -801,33 +729,23 @@ with tab2:
 with tab3:
     st.header("💰 Combined Monthly Costs")
 
-    # Calculate all costs
-    voice_results = calculate_voice_cost(
-        voice_minutes_per_call, voice_calls_per_day,
-        voice_model_key, voice_num_phones, voice_min_replicas,
-        voice_operating_hours
-    )
-
-    email_results = calculate_email_cost(
-        email_emails_per_day, email_polling_interval,
-        email_model_key, email_enable_rag, email_num_pages,
-        email_operating_hours
-    )
-
-    blob_results = calculate_blob_storage_cost(email_num_pages, email_enable_rag)
+    # Calculate all costs (already up to date in the cost graph)
+    voice_results = cost_graph.voice_results()
+    email_results = cost_graph.email_results()
+    blob_results = cost_graph.blob_results()
 
     # Totals
-    voice_total = voice_results['total']
-    email_total = email_results['total']
-    blob_total = blob_results['cost']
-    combined_total = voice_total + email_total + blob_total
+    voice_total = voice_results.total
+    email_total = email_results.total
+    blob_total = blob_results.cost
+    combined_total = cost_graph.get('combined_total')
 
-    total_interactions = voice_results['calls'] + email_results['emails']
-    avg_cost = combined_total / total_interactions if total_interactions > 0 else 0
+    total_interactions = cost_graph.get('total_interactions')
+    avg_cost = cost_graph.get('avg_cost_per_interaction')
 
-    voice_pct = (voice_total / combined_total * 100) if combined_total > 0 else 0
-    email_pct = (email_total / combined_total * 100) if combined_total > 0 else 0
-    blob_pct = (blob_total / combined_total * 100) if combined_total > 0 else 0
+    voice_pct = cost_graph.get('voice_pct')
+    email_pct = cost_graph.get('email_pct')
+    blob_pct = cost_graph.get('blob_pct')
 
     # Main dashboard
     col1, col2, col3, col4 = st.columns(4)
@@ -878,39 +796,108 @@ with tab3:
     comparison = pd.DataFrame({
         "Channel": ["Voice Call", "Email", "Shared Storage"],
         "Monthly Volume": [
-            f"{voice_results['calls']:,} calls",
-            f"{email_results['emails']:,} emails",
+            f"{voice_results.calls:,} calls",
+            f"{email_results.emails:,} emails",
             f"{email_num_pages:,} pages" if email_enable_rag else "N/A"
         ],
-        "Cost per Interaction": [
-            f"CHF {voice_results['cost_per_call']:.2f}",
-            f"CHF {email_results['cost_per_email']:.4f}",
-            "N/A"
-        ],
-        "Monthly Cost": [
-            f"CHF {voice_total:.2f}",
-            f"CHF {email_total:.2f}",
-            f"CHF {blob_total:.2f}"
-        ],
-        "% of Total": [
-            f"{voice_pct:.1f}%",
-            f"{email_pct:.1f}%",
-            f"{blob_pct:.1f}%"
-        ]
+        "Cost per Interaction": [voice_results.cost_per_call, email_results.cost_per_email, None],
+        "Monthly Cost": [voice_total, email_total, blob_total],
+        "% of Total": [voice_pct, email_pct, blob_pct]
     })
-    st.dataframe(comparison, use_container_width=True, hide_index=True)
+    st.dataframe(comparison, use_container_width=True, hide_index=True, column_config={
+        "Cost per Interaction": chf_column("Cost per Interaction", 4),
+        "Monthly Cost": chf_column("Monthly Cost"),
+        "% of Total": pct_column("% of Total")
+    })
+
+    # Every voice x email model pair at the current volumes (one batched evaluation)
+    st.subheader("🧮 Voice × Email Model Matrix")
+
+    residencies = list(dict.fromkeys(compiled.voice_deployments + compiled.email_deployments))
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        matrix_residency = st.multiselect("Data residency", residencies, default=residencies,
+                                          help="Keep only models with these deployments (both channels)")
+    with col2:
+        matrix_sort = st.selectbox("Sort models by", ["Monthly cost", "Name", "Deployment"])
+
+    matrix = batch_model.model_matrix(compiled, {
+        'minutes_per_call': voice_minutes_per_call,
+        'calls_per_day': voice_calls_per_day,
+        'num_phones': voice_num_phones,
+        'min_replicas': voice_min_replicas,
+        'business_hours_only': voice_operating_hours,
+        'audio_cache_ratio': voice_audio_cache_pct / 100,
+        'text_cache_ratio': voice_text_cache_pct / 100
+    }, {
+        'emails_per_day': email_emails_per_day,
+        'polling_minutes': email_polling_interval,
+        'enable_rag': email_enable_rag,
+        'num_pages': email_num_pages,
+        'business_hours_only': email_operating_hours,
+        'input_cache_ratio': email_input_cache_pct / 100
+    }, set(matrix_residency))
+
+    if not matrix['voice_keys'] or not matrix['email_keys']:
+        st.info("No voice and email model pair matches the selected data residency.")
+    else:
+        sort_keys = {
+            "Monthly cost": lambda totals, names, deployments: np.argsort(totals, kind='stable'),
+            "Name": lambda totals, names, deployments: np.argsort(names, kind='stable'),
+            "Deployment": lambda totals, names, deployments: np.lexsort((totals, [residencies.index(d) for d in deployments]))
+        }[matrix_sort]
+        voice_names = [voice_model_names[key] for key in matrix['voice_keys']]
+        email_names = [email_model_names[key] for key in matrix['email_keys']]
+        voice_order = sort_keys(matrix['voice_total'], voice_names, matrix['voice_deployments'])
+        email_order = sort_keys(matrix['email_total'], email_names, matrix['email_deployments'])
+        totals = matrix['totals'][np.ix_(voice_order, email_order)]
+
+        fig = go.Figure(data=go.Heatmap(
+            z=totals,
+            x=[email_names[i] for i in email_order],
+            y=[voice_names[i] for i in voice_order],
+            colorscale='RdYlGn_r',
+            text=totals,
+            texttemplate="%{text:,.0f}",
+            hovertemplate="Voice: %{y}<br>Email: %{x}<br>CHF %{z:,.2f}/month<extra></extra>",
+            colorbar=dict(title="CHF/month")
+        ))
+        fig.update_layout(height=120 + 45 * len(voice_order), xaxis_title="Email model",
+                          yaxis_title="Voice model", yaxis_autorange='reversed')
+        st.plotly_chart(fig, use_container_width=True)
+
+        v, e = np.unravel_index(np.argmin(matrix['totals']), matrix['totals'].shape)
+        current = voice_model_key in matrix['voice_keys'] and email_model_key in matrix['email_keys']
+        cheapest = float(matrix['totals'][v, e])
+        message = (f"Cheapest pair: **{voice_model_names[matrix['voice_keys'][v]]}** + "
+                   f"**{email_model_names[matrix['email_keys'][e]]}** at CHF {cheapest:,.2f}/month")
+        if current:
+            message += f" (current selection CHF {combined_total:,.2f}, {combined_total - cheapest:+,.2f})"
+        st.info(message)
+
+        pairs = pd.DataFrame({
+            "Voice Model": np.repeat(voice_names, len(email_names)),
+            "Voice Deployment": np.repeat(matrix['voice_deployments'], len(email_names)),
+            "Email Model": np.tile(email_names, len(voice_names)),
+            "Email Deployment": np.tile(matrix['email_deployments'], len(voice_names)),
+            "Monthly Cost": matrix['totals'].ravel()
+        }).sort_values("Monthly Cost", kind='stable')
+        with st.expander(f"All {len(pairs)} pairs (click a column header to sort)"):
+            st.dataframe(pairs, use_container_width=True, hide_index=True, column_config={
+                "Monthly Cost": chf_column("Monthly Cost")
+            })
 
     # Combined breakdown pie
     st.subheader("🥧 Combined Cost Breakdown")
 
     all_costs = {
-        "Voice - AI Audio": voice_results['ai_audio'],
-        "Voice - AI Text": voice_results['ai_text'],
-        "Voice - Phone Calls": voice_results['acs'],
-        "Voice - Container": voice_results['container'],
-        "Voice - Phone Numbers": voice_results['phone'],
-        "Email - AI Model": email_results['llm'],
-        "Email - Functions": email_results['functions'],
+        "Voice - AI Audio": voice_results.ai_audio,
+        "Voice - AI Text": voice_results.ai_text,
+        "Voice - Phone Calls": voice_results.acs,
+        "Voice - Container": voice_results.container,
+        "Voice - Phone Numbers": voice_results.phone,
+        "Email - AI Model": email_results.llm,
+        "Email - Functions": email_results.functions,
         "Shared - Blob Storage": blob_total
     }
 
@@ -926,83 +913,55 @@ with tab3:
     fig.update_layout(title="All Services Combined", height=500)
     st.plotly_chart(fig, use_container_width=True)
 
+    # RAG retrieval I/O (blob operations; not part of the totals above)
+    if email_enable_rag:
+        st.subheader("📚 RAG Retrieval I/O")
+
+        rag_cache_pct = st.slider("Local read cache hit ratio (%)", min_value=0, max_value=100, value=90, step=5,
+                                  help="Share of knowledge-base reads served from a cache in container memory")
+        io_table = rag_io.cache_break_even(pricing, np.arange(0, rag_io.MAX_PAGES + 1, 100),
+                                           email_emails_per_day, voice_calls_per_day, rag_cache_pct / 100)
+        current = io_table.iloc[int(np.argmin(np.abs(io_table['pages'] - email_num_pages)))]
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("I/O without cache", f"CHF {current['io_no_cache']:,.4f}",
+                      help="Re-indexing writes plus retrieval reads per month")
+        with col2:
+            st.metric("I/O with cache", f"CHF {current['io_with_cache']:,.4f}",
+                      delta=f"{-current['saving']:,.4f}", delta_color="inverse")
+        with col3:
+            st.metric("Index build (one-off)", f"CHF {current['build_cost']:,.4f}")
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=io_table['pages'], y=io_table['io_no_cache'], name="Blob reads only"))
+        fig.add_trace(go.Scatter(x=io_table['pages'], y=io_table['io_with_cache'],
+                                 name=f"With {rag_cache_pct}% cache"))
+        fig.add_vline(x=email_num_pages, line_dash="dash", annotation_text="Current")
+        fig.update_layout(title="Monthly retrieval I/O by knowledge-base size", height=400,
+                          xaxis_title="Manual pages", yaxis_title="CHF/month")
+        st.plotly_chart(fig, use_container_width=True)
+
+        if current['saving'] > 0:
+            st.success(f"A {rag_cache_pct}% read cache saves CHF {current['saving']:,.4f}/month at "
+                       f"{email_num_pages:,} pages.")
+        else:
+            st.info(f"At {email_num_pages:,} pages a {rag_cache_pct}% read cache pays for itself above "
+                    f"{current['break_even_retrievals']:,.0f} retrievals/month "
+                    f"(currently {current['retrievals']:,.0f}).")
+        st.caption("Assumptions in pricing_config.json (shared.rag_retrieval). Retrieval I/O is not "
+                   "included in the totals above.")
+
     # Cost optimization recommendations
     st.subheader("💡 Cost Optimization Recommendations")
 
-    recommendations = []
-
-    # Voice recommendations
-    if voice_model_key == 'gpt_realtime':
-        savings = voice_results['ai_total'] * 0.68  # Approximate savings
-        recommendations.append({
-            "Channel": "Voice",
-            "Suggestion": "Switch to GPT-Realtime-mini",
-            "Savings": f"CHF {savings:.2f}/month",
-            "Impact": "Slightly lower quality, excellent for most calls"
-        })
-
-    if voice_min_replicas >= 2:
-        temp_results = calculate_voice_cost(
-            voice_minutes_per_call, voice_calls_per_day,
-            voice_model_key, voice_num_phones, 1,
-            voice_operating_hours
-        )
-        savings = voice_results['total'] - temp_results['total']
-        recommendations.append({
-            "Channel": "Voice",
-            "Suggestion": f"Reduce to 1 replica (from {voice_min_replicas})",
-            "Savings": f"CHF {savings:.2f}/month",
-            "Impact": "Still no cold starts, maintain availability"
-        })
-
-    # Email recommendations
-    if email_model_key in ['gpt_5', 'gpt_4o'] and email_results['emails'] > 100:
-        temp_results = calculate_email_cost(
-            email_emails_per_day, email_polling_interval,
-            'gpt_5_mini', email_enable_rag, email_num_pages,
-            email_operating_hours
-        )
-        savings = email_results['total'] - temp_results['total']
-        recommendations.append({
-            "Channel": "Email",
-            "Suggestion": "Switch to GPT-5-mini",
-            "Savings": f"CHF {savings:.2f}/month",
-            "Impact": "Minimal quality loss for email responses"
-        })
-
-    if email_polling_interval == 1 and email_results['emails'] < 1000:
-        temp_results = calculate_email_cost(
-            email_emails_per_day, 5,
-            email_model_key, email_enable_rag, email_num_pages,
-            email_operating_hours
-        )
-        savings = email_results['functions'] - temp_results['functions']
-        recommendations.append({
-            "Channel": "Email",
-            "Suggestion": "Increase polling to 5 minutes",
-            "Savings": f"CHF {savings:.2f}/month",
-            "Impact": "5-min delay acceptable for email (vs instant)"
-        })
-
-    if not email_operating_hours and email_emails_per_day < 100:
-        temp_results = calculate_email_cost(
-            email_emails_per_day, email_polling_interval,
-            email_model_key, email_enable_rag, email_num_pages,
-            True
-        )
-        savings = email_results['functions'] - temp_results['functions']
-        recommendations.append({
-            "Channel": "Email",
-            "Suggestion": "Enable business hours only",
-            "Savings": f"CHF {savings:.2f}/month",
-            "Impact": "No email processing nights/weekends"
-        })
+    recommendations = cost_graph.get('recommendations')
 
     if recommendations:
         for i, rec in enumerate(recommendations, 1):
             with st.expander(f"💰 Recommendation {i}: {rec['Suggestion']}"):
                 st.write(f"**Channel:** {rec['Channel']}")
-                st.write(f"**Potential Savings:** {rec['Savings']}")
+                st.write(f"**Potential Savings:** CHF {rec['Savings']:.2f}/month")
                 st.write(f"**Impact:** {rec['Impact']}")
     else:
         st.success("✅ Your configuration is well-optimized!")
@@ -1017,6 +976,42 @@ with tab3:
     else:
         st.success(f"✅ Economical configuration: CHF {combined_total:,.2f}/month")
 
+    # Sensitivity (exact derivatives from one pass through the calculators)
+    st.subheader("📐 Cost Sensitivity")
+
+    sens = sensitivity.cost_sensitivities(
+        pricing,
+        dict(minutes_per_call=voice_minutes_per_call, calls_per_day=voice_calls_per_day,
+             model_key=voice_model_key, num_phones=voice_num_phones, min_replicas=voice_min_replicas,
+             business_hours_only=voice_operating_hours, audio_cache_ratio=voice_audio_cache_pct / 100,
+             text_cache_ratio=voice_text_cache_pct / 100),
+        dict(emails_per_day=email_emails_per_day, polling_minutes=email_polling_interval,
+             model_key=email_model_key, enable_rag=email_enable_rag, num_pages=email_num_pages,
+             business_hours_only=email_operating_hours, input_cache_ratio=email_input_cache_pct / 100)
+    )
+    top = sens['parameters'].head(15).iloc[::-1]
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(y=top['parameter'], x=-top['impact_10pct'], orientation='h', name="Parameter -10%"))
+    fig.add_trace(go.Bar(y=top['parameter'], x=top['impact_10pct'], orientation='h', name="Parameter +10%"))
+    fig.update_layout(
+        title="Change in monthly total when one parameter moves by ±10%",
+        barmode='overlay', height=550, xaxis_title="Δ Monthly Cost (CHF)"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    with st.expander("🔍 Partial derivatives, elasticities and free-tier kinks"):
+        st.caption("Elasticity = % change of the monthly total per 1% change of the parameter. "
+                   "Bars are linear: a ±10% move that crosses a free-tier limit changes the slope.")
+        st.dataframe(sens['parameters'].rename(columns={
+            'parameter': "Parameter", 'value': "Value", 'derivative': "∂Total/∂Parameter",
+            'elasticity': "Elasticity", 'impact_10pct': "Δ CHF at +10%"
+        }), use_container_width=True, hide_index=True)
+        st.dataframe(sens['kinks'].rename(columns={
+            'kink': "Free tier", 'usage': "Usage", 'threshold': "Free allowance", 'state': "State",
+            'nearest_parameter': "Closest parameter to cross", 'change_to_cross_pct': "Change needed (%)"
+        }), use_container_width=True, hide_index=True)
+
     # Export configuration
     st.subheader("📥 Export Configuration")
 
@@ -1027,8 +1022,12 @@ with tab3:
             "calls_per_day": voice_calls_per_day,
             "minutes_per_call": voice_minutes_per_call,
             "model": voice_model_names[voice_model_key],
+            "model_key": voice_model_key,
             "phone_numbers": voice_num_phones,
             "min_replicas": voice_min_replicas,
+            "business_hours_only": voice_operating_hours,
+            "audio_cache_ratio": voice_audio_cache_pct / 100,
+            "text_cache_ratio": voice_text_cache_pct / 100,
             "monthly_cost": float(voice_total)
         },
         "email_agent": {
@@ -1036,13 +1035,15 @@ with tab3:
             "polling_minutes": email_polling_interval,
             "business_hours_only": email_operating_hours,
             "model": email_model_names[email_model_key],
+            "model_key": email_model_key,
             "manual_pages": email_num_pages if email_enable_rag else 0,
             "rag_enabled": email_enable_rag,
+            "input_cache_ratio": email_input_cache_pct / 100,
             "monthly_cost": float(email_total)
         },
         "shared": {
             "blob_storage_cost": float(blob_total),
-            "blob_storage_gb": float(blob_results['storage_gb']) if email_enable_rag else 0
+            "blob_storage_gb": float(blob_results.storage_gb) if email_enable_rag else 0
         },
         "totals": {
             "combined_cost": float(combined_total),
@@ -1060,6 +1061,18 @@ with tab3:
         mime="application/json"
     )
 
+    # Derivation of each number
+    with st.expander("🔍 How was each number calculated?"):
+        recomputed = cost_graph.take_recomputed()
+        st.caption(f"Last change recomputed {len(recomputed)} of {len(cost_graph.nodes)} quantities"
+                   + (f": {', '.join(recomputed)}" if 0 < len(recomputed) <= 15 else ""))
+        quantity = st.selectbox(
+            "Quantity",
+            options=sorted(cost_graph.nodes),
+            index=sorted(cost_graph.nodes).index('combined_total')
+        )
+        st.code(cost_graph.explain(quantity), language=None)
+
 # ==============================================================================
 # SIDEBAR: ASSUMPTIONS
 # ==============================================================================
@@ -1090,6 +1103,7 @@ with st.sidebar.expander("📋 Calculation Assumptions"):
     - Index overhead: {int((pricing['shared']['blob_storage']['index_overhead_multiplier']-1)*100)}% additional storage
 
     **Prompt Caching:**
-    - Not included in calculations (conservative estimates)
-    - Available: Voice models have cached_input rates, Email models have cached_input rates
+    - Cache hits billed at each model's cached input rate (sidebar hit ratios, default 0%)
+    - Voice: audio {voice_audio_cache_pct}% and text {voice_text_cache_pct}% of input tokens cached
+    - Email: {email_input_cache_pct}% of input tokens cached (system prompt + RAG context)
     """)
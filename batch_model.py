@@ -0,0 +1,513 @@
+"""
+Vectorized (NumPy) evaluation of the cost model over many scenarios at once.
+
+The formulas mirror calculate_voice_cost / calculate_email_cost /
+calculate_blob_storage_cost in cost_model.py operation for operation, so a
+batch result matches the scalar calculators for every scenario.
+
+A scenario table is any mapping of column name -> array-like (a dict or a
+pandas DataFrame) using the same input names as cost_graph.py:
+
+    voice_minutes_per_call, voice_calls_per_day, voice_model_key,
+    voice_num_phones, voice_min_replicas, voice_business_hours,
+    email_emails_per_day, email_polling_minutes, email_model_key,
+    email_enable_rag, email_num_pages, email_business_hours
+
+The prompt-cache hit ratios (CACHE_COLUMNS) are optional and default to 0.
+
+Pricing is compiled once into flat arrays (compile_pricing) and reused.
+"""
+
+import numpy as np
+
+VOICE_COLUMNS = (
+    'voice_minutes_per_call', 'voice_calls_per_day', 'voice_model_key',
+    'voice_num_phones', 'voice_min_replicas', 'voice_business_hours'
+)
+
+EMAIL_COLUMNS = (
+    'email_emails_per_day', 'email_polling_minutes', 'email_model_key',
+    'email_enable_rag', 'email_num_pages', 'email_business_hours'
+)
+
+SCENARIO_COLUMNS = VOICE_COLUMNS + EMAIL_COLUMNS
+
+# Optional columns (share of input tokens served from the prompt cache, 0-1)
+CACHE_COLUMNS = ('voice_audio_cache_ratio', 'voice_text_cache_ratio', 'email_input_cache_ratio')
+
+# Cost components reported per scenario (all CHF/month)
+COMPONENTS = (
+    'voice_phone', 'voice_acs', 'voice_container_vcpu', 'voice_container_memory',
+    'voice_container_requests', 'voice_container', 'voice_audio_input', 'voice_audio_output',
+    'voice_text_input', 'voice_text_output', 'voice_total',
+    'email_execution', 'email_compute', 'email_functions', 'email_llm_input', 'email_llm_output',
+    'email_llm', 'email_total', 'blob_storage', 'combined_total'
+)
+
+POLLING_OPTIONS = [1, 2, 5, 10, 15, 30, 60]
+
+# ==============================================================================
+# PRICING COMPILATION
+# ==============================================================================
+
+class CompiledPricing:
+    """Pricing flattened into scalars and per-model rate arrays"""
+
+    def __init__(self, pricing):
+        self.version = pricing['version']
+        self.last_updated = pricing['last_updated']
+        self.region = pricing['region']
+
+        voice_models = pricing['voice_agent']['models']
+        self.voice_model_keys = list(voice_models)
+        self.voice_index = {key: i for i, key in enumerate(self.voice_model_keys)}
+        self.voice_deployments = [m['deployment'] for m in voice_models.values()]
+        self.audio_input_rate = np.array([m['audio_input_per_m_tokens'] for m in voice_models.values()])
+        self.audio_output_rate = np.array([m['audio_output_per_m_tokens'] for m in voice_models.values()])
+        self.text_input_rate = np.array([m['text_input_per_m_tokens'] for m in voice_models.values()])
+        self.text_output_rate = np.array([m['text_output_per_m_tokens'] for m in voice_models.values()])
+        self.audio_cached_rate = np.array([m['audio_cached_input_per_m_tokens'] for m in voice_models.values()])
+        self.text_cached_rate = np.array([m['text_cached_input_per_m_tokens'] for m in voice_models.values()])
+        self.tokens_per_call = np.array([m['tokens_per_call'] for m in voice_models.values()])
+
+        email_models = pricing['email_agent']['models']
+        self.email_model_keys = list(email_models)
+        self.email_index = {key: i for i, key in enumerate(self.email_model_keys)}
+        self.email_deployments = [m['deployment'] for m in email_models.values()]
+        self.llm_input_rate = np.array([m['input_per_m_tokens'] for m in email_models.values()])
+        self.llm_output_rate = np.array([m['output_per_m_tokens'] for m in email_models.values()])
+        self.llm_cached_rate = np.array([m['cached_input_per_m_tokens'] for m in email_models.values()])
+
+        self.acs = dict(pricing['voice_agent']['acs'])
+        self.container = dict(pricing['voice_agent']['container_apps'])
+        self.audio = dict(pricing['voice_agent']['audio_conversion'])
+        self.functions = dict(pricing['email_agent']['azure_functions'])
+        self.tokens = dict(pricing['email_agent']['tokens'])
+        self.hours = dict(pricing['email_agent']['operating_hours'])
+        self.blob = dict(pricing['shared']['blob_storage'])
+
+        c = self.container
+        vcpu_rate = c['vcpu_per_replica'] * c['vcpu_active_per_second']
+        memory_rate = c['memory_gb_per_replica'] * c['memory_gb_active_per_second']
+        total_rate = vcpu_rate + memory_rate
+        self.idle_vcpu_portion = (vcpu_rate / total_rate) if total_rate > 0 else 0.5
+        self.idle_memory_portion = (memory_rate / total_rate) if total_rate > 0 else 0.5
+
+    def model_indices(self, keys, channel):
+        """Map an array of model keys to row indices into the rate arrays"""
+        index = self.voice_index if channel == 'voice' else self.email_index
+        keys = np.asarray(keys)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        missing = [k for k in unique if k not in index]
+        if missing:
+            raise KeyError(f"{channel} model(s) not in pricing {self.version}: {', '.join(map(str, missing))}")
+        return np.array([index[k] for k in unique], dtype=np.intp)[inverse].reshape(keys.shape)
+
+
+def compile_pricing(pricing):
+    return CompiledPricing(pricing)
+
+# ==============================================================================
+# VECTORIZED CALCULATORS
+# ==============================================================================
+
+def _free_tier(used, free, billable_cost):
+    return np.where(used > free, billable_cost(used - free), 0.0)
+
+
+def voice_costs(cp, minutes_per_call, calls_per_day, model_index, num_phones, min_replicas, business_hours,
+                audio_cache_ratio=0.0, text_cache_ratio=0.0):
+    """Voice agent monthly cost components for arrays of inputs"""
+    minutes_per_call = np.asarray(minutes_per_call)
+    calls_per_day = np.asarray(calls_per_day)
+    num_phones = np.asarray(num_phones)
+    min_replicas = np.asarray(min_replicas)
+    business_hours = np.asarray(business_hours, dtype=bool)
+    c = cp.container
+
+    # Volume
+    calls_per_month = calls_per_day * 30
+    total_minutes = calls_per_month * minutes_per_call
+
+    # ACS
+    phone_cost = num_phones * cp.acs['phone_number_per_month']
+    acs_call_cost = total_minutes * cp.acs['inbound_per_minute']
+
+    # Container time
+    serverless = min_replicas == 0
+    operating_hours = np.where(business_hours, cp.hours['business_hours_per_month'],
+                               cp.hours['full_time_hours_per_month'])
+    monthly_seconds = operating_hours * 3600
+    active_seconds = calls_per_month * (minutes_per_call * 60)
+    idle_seconds = np.maximum(monthly_seconds - active_seconds, 0)
+
+    # Serverless: free tier on active usage
+    sv_vcpu_cost = _free_tier(active_seconds, c['free_vcpu_seconds_per_month'],
+                              lambda billable: billable * c['vcpu_per_replica'] * c['vcpu_active_per_second'])
+    sv_gb_seconds = active_seconds * c['memory_gb_per_replica']
+    sv_memory_cost = _free_tier(sv_gb_seconds, c['free_gb_seconds_per_month'],
+                                lambda billable: billable * c['memory_gb_active_per_second'])
+
+    # Always-on: active + flat idle rate
+    active_vcpu_cost = min_replicas * active_seconds * c['vcpu_per_replica'] * c['vcpu_active_per_second']
+    active_memory_cost = min_replicas * active_seconds * c['memory_gb_per_replica'] * c['memory_gb_active_per_second']
+    idle_cost = min_replicas * idle_seconds * c['idle_per_second']
+
+    vcpu_cost = np.where(serverless, sv_vcpu_cost, active_vcpu_cost + idle_cost * cp.idle_vcpu_portion)
+    memory_cost = np.where(serverless, sv_memory_cost, active_memory_cost + idle_cost * cp.idle_memory_portion)
+    vcpu_seconds = np.where(serverless, active_seconds, min_replicas * monthly_seconds)
+    gb_seconds = np.where(serverless, sv_gb_seconds, min_replicas * monthly_seconds * c['memory_gb_per_replica'])
+
+    health_checks = np.where(serverless, 0, np.where(business_hours, operating_hours * 60, 30 * 24 * 60))
+    requests = health_checks + calls_per_month * 2
+    request_cost = _free_tier(requests, c['free_requests_per_month'],
+                              lambda billable: (billable / 1_000_000) * c['requests_per_million'])
+
+    container_cost = np.where(
+        serverless,
+        vcpu_cost + memory_cost + request_cost,
+        (active_vcpu_cost + active_memory_cost) + idle_cost + request_cost
+    )
+
+    # AI audio
+    total_audio_tokens = total_minutes * cp.audio['tokens_per_minute_audio']
+    audio_input_tokens = total_audio_tokens * cp.audio['input_split']
+    cached_audio_tokens = audio_input_tokens * np.asarray(audio_cache_ratio)
+    audio_input_cost = ((audio_input_tokens - cached_audio_tokens) / 1_000_000) * cp.audio_input_rate[model_index] + \
+                       (cached_audio_tokens / 1_000_000) * cp.audio_cached_rate[model_index]
+    audio_output_cost = ((total_audio_tokens * cp.audio['output_split']) / 1_000_000) * cp.audio_output_rate[model_index]
+
+    # AI text reasoning (70% input / 30% output per call)
+    tokens_per_call = cp.tokens_per_call[model_index]
+    text_input_tokens = tokens_per_call * 0.7
+    cached_text_tokens = text_input_tokens * np.asarray(text_cache_ratio)
+    text_input_cost = calls_per_month * ((text_input_tokens - cached_text_tokens) / 1_000_000) * cp.text_input_rate[model_index] + \
+                      calls_per_month * (cached_text_tokens / 1_000_000) * cp.text_cached_rate[model_index]
+    text_output_cost = calls_per_month * ((tokens_per_call * 0.3) / 1_000_000) * cp.text_output_rate[model_index]
+
+    ai_cost = audio_input_cost + audio_output_cost + text_input_cost + text_output_cost
+    total_cost = phone_cost + acs_call_cost + container_cost + ai_cost
+    cache_savings = (cached_audio_tokens / 1_000_000) * (cp.audio_input_rate[model_index] - cp.audio_cached_rate[model_index]) + \
+                    calls_per_month * (cached_text_tokens / 1_000_000) * (cp.text_input_rate[model_index] - cp.text_cached_rate[model_index])
+
+    return {
+        'phone': phone_cost,
+        'acs': acs_call_cost,
+        'container_vcpu': vcpu_cost,
+        'container_memory': memory_cost,
+        'container_requests': request_cost,
+        'container': container_cost,
+        'audio_input': audio_input_cost,
+        'audio_output': audio_output_cost,
+        'text_input': text_input_cost,
+        'text_output': text_output_cost,
+        'ai_audio': audio_input_cost + audio_output_cost,
+        'ai_text': text_input_cost + text_output_cost,
+        'ai_total': ai_cost,
+        'cache_savings': cache_savings,
+        'total': total_cost,
+        'calls': calls_per_month,
+        'minutes': total_minutes,
+        'vcpu_seconds': vcpu_seconds,
+        'gb_seconds': gb_seconds,
+        'requests': requests
+    }
+
+
+def email_costs(cp, emails_per_day, polling_minutes, model_index, enable_rag, business_hours, input_cache_ratio=0.0):
+    """Email agent monthly cost components for arrays of inputs"""
+    emails_per_day = np.asarray(emails_per_day)
+    polling_minutes = np.asarray(polling_minutes)
+    enable_rag = np.asarray(enable_rag, dtype=bool)
+    business_hours = np.asarray(business_hours, dtype=bool)
+    f = cp.functions
+
+    emails_per_month = emails_per_day * 30
+    hours_per_month = np.where(business_hours, cp.hours['business_hours_per_month'],
+                               cp.hours['full_time_hours_per_month'])
+    checks_per_month = (hours_per_month * 60) / polling_minutes
+
+    # Azure Functions
+    execution_cost = _free_tier(checks_per_month, f['free_executions_per_month'],
+                                lambda billable: (billable / 1_000_000) * f['execution_cost_per_million'])
+    gb_seconds = checks_per_month * f['seconds_per_execution'] * f['memory_gb']
+    compute_cost = _free_tier(gb_seconds, f['free_gb_seconds_per_month'],
+                              lambda billable: billable * f['compute_cost_per_gb_second'])
+    functions_cost = execution_cost + compute_cost
+
+    # LLM
+    input_tokens_per_email = np.where(enable_rag, cp.tokens['base_input_tokens'] + cp.tokens['rag_additional_tokens'],
+                                      cp.tokens['base_input_tokens'])
+    total_input_tokens = emails_per_month * input_tokens_per_email
+    cached_input_tokens = total_input_tokens * np.asarray(input_cache_ratio)
+    llm_input_cost = ((total_input_tokens - cached_input_tokens) / 1_000_000) * cp.llm_input_rate[model_index] + \
+                     (cached_input_tokens / 1_000_000) * cp.llm_cached_rate[model_index]
+    llm_output_cost = ((emails_per_month * cp.tokens['output_tokens']) / 1_000_000) * cp.llm_output_rate[model_index]
+    llm_cost = llm_input_cost + llm_output_cost
+    cache_savings = (cached_input_tokens / 1_000_000) * (cp.llm_input_rate[model_index] - cp.llm_cached_rate[model_index])
+
+    return {
+        'execution_cost': execution_cost,
+        'compute_cost': compute_cost,
+        'functions': functions_cost,
+        'llm_input': llm_input_cost,
+        'llm_output': llm_output_cost,
+        'llm': llm_cost,
+        'cache_savings': cache_savings,
+        'total': functions_cost + llm_cost,
+        'emails': emails_per_month,
+        'checks': checks_per_month,
+        'gb_seconds': gb_seconds
+    }
+
+
+def blob_costs(cp, num_pages, enable_rag):
+    """Shared blob storage cost for arrays of inputs"""
+    num_pages = np.asarray(num_pages)
+    enable_rag = np.asarray(enable_rag, dtype=bool)
+    b = cp.blob
+    storage_gb = np.where(enable_rag & (num_pages != 0),
+                          (num_pages * b['mb_per_page'] / 1024) * b['index_overhead_multiplier'], 0.0)
+    return {'cost': storage_gb * b['hot_tier_per_gb_month'], 'storage_gb': storage_gb}
+
+# ==============================================================================
+# RESULT RECORDS
+# ==============================================================================
+
+# Structured dtypes with the fields of cost_model.VoiceResult / EmailResult, for
+# results of many scenarios (one fixed-size row each, no per-result objects).
+# Volumes are float64 like the scalar records: the quote API accepts
+# fractional calls, minutes and emails per day.
+VOICE_RESULT_DTYPE = np.dtype(
+    [(name, np.float64) for name in ('total', 'phone', 'acs', 'container', 'ai_audio', 'ai_text', 'ai_total',
+                                     'cache_savings', 'calls', 'minutes', 'cost_per_call', 'vcpu_seconds',
+                                     'gb_seconds', 'requests')]
+    + [('business_hours', np.bool_)]
+    + [(name, np.float64) for name in ('container_vcpu', 'container_memory', 'container_requests',
+                                       'audio_input', 'audio_output', 'text_input', 'text_output')]
+)
+
+EMAIL_RESULT_DTYPE = np.dtype(
+    [(name, np.float64) for name in ('total', 'functions', 'llm', 'emails', 'checks', 'cost_per_email', 'gb_seconds',
+                                     'execution_cost', 'compute_cost', 'llm_input', 'llm_output', 'cache_savings')]
+    + [('business_hours', np.bool_)]
+)
+
+
+def _records(columns, dtype):
+    shape = np.broadcast_shapes(*(np.shape(values) for values in columns.values()))
+    records = np.empty(shape, dtype=dtype)
+    for name in dtype.names:
+        records[name] = columns[name]
+    return records
+
+
+def voice_records(cp, minutes_per_call, calls_per_day, model_index, num_phones, min_replicas, business_hours,
+                  audio_cache_ratio=0.0, text_cache_ratio=0.0):
+    """voice_costs packed into a VOICE_RESULT_DTYPE array"""
+    results = voice_costs(cp, minutes_per_call, calls_per_day, model_index, num_phones, min_replicas,
+                          business_hours, audio_cache_ratio, text_cache_ratio)
+    calls = results['calls']
+    results['cost_per_call'] = np.where(calls > 0, results['total'] / np.where(calls > 0, calls, 1), 0.0)
+    results['business_hours'] = np.asarray(business_hours, dtype=bool)
+    return _records(results, VOICE_RESULT_DTYPE)
+
+
+def email_records(cp, emails_per_day, polling_minutes, model_index, enable_rag, business_hours, input_cache_ratio=0.0):
+    """email_costs packed into an EMAIL_RESULT_DTYPE array"""
+    results = email_costs(cp, emails_per_day, polling_minutes, model_index, enable_rag, business_hours,
+                          input_cache_ratio)
+    emails = results['emails']
+    results['cost_per_email'] = np.where(emails > 0, results['total'] / np.where(emails > 0, emails, 1), 0.0)
+    results['business_hours'] = np.asarray(business_hours, dtype=bool)
+    return _records(results, EMAIL_RESULT_DTYPE)
+
+# ==============================================================================
+# SCENARIO TABLES
+# ==============================================================================
+
+def _optional(table, column, default=0.0):
+    return table[column] if column in table else default
+
+
+def evaluate_scenarios(cp, table):
+    """Evaluate a scenario table; returns {component: array} for COMPONENTS"""
+    voice = voice_costs(
+        cp,
+        table['voice_minutes_per_call'], table['voice_calls_per_day'],
+        cp.model_indices(table['voice_model_key'], 'voice'),
+        table['voice_num_phones'], table['voice_min_replicas'], table['voice_business_hours'],
+        _optional(table, 'voice_audio_cache_ratio'), _optional(table, 'voice_text_cache_ratio')
+    )
+    email = email_costs(
+        cp,
+        table['email_emails_per_day'], table['email_polling_minutes'],
+        cp.model_indices(table['email_model_key'], 'email'),
+        table['email_enable_rag'], table['email_business_hours'],
+        _optional(table, 'email_input_cache_ratio')
+    )
+    blob = blob_costs(cp, table['email_num_pages'], table['email_enable_rag'])
+    return scenario_components(voice, email, blob)
+
+
+def scenario_components(voice, email, blob):
+    """Flatten voice / email / blob results into {component: array} for COMPONENTS"""
+    return {
+        'voice_phone': voice['phone'],
+        'voice_acs': voice['acs'],
+        'voice_container_vcpu': voice['container_vcpu'],
+        'voice_container_memory': voice['container_memory'],
+        'voice_container_requests': voice['container_requests'],
+        'voice_container': voice['container'],
+        'voice_audio_input': voice['audio_input'],
+        'voice_audio_output': voice['audio_output'],
+        'voice_text_input': voice['text_input'],
+        'voice_text_output': voice['text_output'],
+        'voice_total': voice['total'],
+        'email_execution': email['execution_cost'],
+        'email_compute': email['compute_cost'],
+        'email_functions': email['functions'],
+        'email_llm_input': email['llm_input'],
+        'email_llm_output': email['llm_output'],
+        'email_llm': email['llm'],
+        'email_total': email['total'],
+        'blob_storage': blob['cost'],
+        'combined_total': voice['total'] + email['total'] + blob['cost']
+    }
+
+
+# Calculator parameter (as returned by cost_model.parse_config_export) -> scenario column
+INPUT_COLUMNS = {
+    'voice': {
+        'minutes_per_call': 'voice_minutes_per_call', 'calls_per_day': 'voice_calls_per_day',
+        'model_key': 'voice_model_key', 'num_phones': 'voice_num_phones', 'min_replicas': 'voice_min_replicas',
+        'business_hours_only': 'voice_business_hours', 'audio_cache_ratio': 'voice_audio_cache_ratio',
+        'text_cache_ratio': 'voice_text_cache_ratio'
+    },
+    'email': {
+        'emails_per_day': 'email_emails_per_day', 'polling_minutes': 'email_polling_minutes',
+        'model_key': 'email_model_key', 'enable_rag': 'email_enable_rag', 'num_pages': 'email_num_pages',
+        'business_hours_only': 'email_business_hours', 'input_cache_ratio': 'email_input_cache_ratio'
+    }
+}
+
+
+def scenario_table(inputs):
+    """Scenario table from a list of parsed configurations (cost_model.parse_config_export results)"""
+    return {column: np.array([item[channel][name] for item in inputs])
+            for channel, names in INPUT_COLUMNS.items() for name, column in names.items()}
+
+
+def random_scenarios(pricing, count, seed=0):
+    """Random scenario table drawn from the sidebar input domain"""
+    rng = np.random.default_rng(seed)
+    enable_rag = rng.random(count) < 0.8
+    return {
+        'voice_minutes_per_call': rng.integers(1, 31, count),
+        'voice_calls_per_day': rng.integers(0, 100, count) * 5 + 1,
+        'voice_model_key': rng.choice(list(pricing['voice_agent']['models']), count),
+        'voice_num_phones': rng.integers(1, 21, count),
+        'voice_min_replicas': rng.integers(0, 11, count),
+        'voice_business_hours': rng.random(count) < 0.5,
+        'email_emails_per_day': rng.integers(0, 200, count) * 5 + 1,
+        'email_polling_minutes': rng.choice(POLLING_OPTIONS, count),
+        'email_model_key': rng.choice(list(pricing['email_agent']['models']), count),
+        'email_enable_rag': enable_rag,
+        'email_num_pages': np.where(enable_rag, rng.integers(0, 501, count) * 100, 0),
+        'email_business_hours': rng.random(count) < 0.5,
+        'voice_audio_cache_ratio': rng.integers(0, 21, count) * 0.05,
+        'voice_text_cache_ratio': rng.integers(0, 21, count) * 0.05,
+        'email_input_cache_ratio': rng.integers(0, 21, count) * 0.05
+    }
+
+# ==============================================================================
+# PROMPT-CACHE SWEEPS
+# ==============================================================================
+
+CACHE_CLASSES = {
+    'voice': ('audio_cache_ratio', 'text_cache_ratio'),
+    'email': ('input_cache_ratio',)
+}
+
+
+def cache_sweep(cp, channel, inputs, ratios, classes=None):
+    """Monthly total of every model at every cache hit ratio, in one pass.
+
+    `inputs` are calculator keyword arguments (as returned by
+    cost_model.parse_config_export); model_key is ignored. The swept ratio is
+    applied to `classes` (default: every token class of the channel), other
+    cache ratios keep their value from `inputs`. Returns (model_keys, ratios,
+    totals) with totals shaped (models, ratios).
+    """
+    ratios = np.asarray(ratios, dtype=float)
+    keys = cp.voice_model_keys if channel == 'voice' else cp.email_model_keys
+    model_index = np.arange(len(keys))[:, None]
+    swept = {name: inputs.get(name, 0.0) for name in CACHE_CLASSES[channel]}
+    for name in classes or CACHE_CLASSES[channel]:
+        swept[name] = ratios[None, :]
+
+    if channel == 'voice':
+        result = voice_costs(cp, inputs['minutes_per_call'], inputs['calls_per_day'], model_index,
+                             inputs['num_phones'], inputs['min_replicas'], inputs['business_hours_only'], **swept)
+    else:
+        result = email_costs(cp, inputs['emails_per_day'], inputs['polling_minutes'], model_index,
+                             inputs['enable_rag'], inputs['business_hours_only'], **swept)
+    totals = np.broadcast_to(result['total'], (len(keys), len(ratios)))
+    return list(keys), ratios, totals
+
+
+def cache_crossovers(model_keys, ratios, totals):
+    """Model pairs whose cost order flips somewhere along a sweep.
+
+    Returns rows (cheaper model without caching, model that overtakes it,
+    first ratio at which it is no longer cheaper), sorted by that ratio.
+    """
+    diff = totals[:, None, :] - totals[None, :, :]
+    cheaper_at_start = diff[:, :, 0] < 0
+    overtaken = cheaper_at_start[:, :, None] & (diff >= 0)
+    rows = []
+    for a, b in zip(*np.nonzero(overtaken.any(axis=2))):
+        first = int(np.argmax(overtaken[a, b]))
+        rows.append({'cheaper': model_keys[a], 'overtaken_by': model_keys[b], 'ratio': float(ratios[first])})
+    return sorted(rows, key=lambda row: (row['ratio'], row['cheaper']))
+
+# ==============================================================================
+# MODEL MATRIX
+# ==============================================================================
+
+def model_matrix(cp, voice_inputs, email_inputs, deployments=None):
+    """Combined monthly total of every voice model x email model pair, in one pass.
+
+    `voice_inputs` / `email_inputs` are calculator keyword arguments (as
+    returned by cost_model.parse_config_export); model_key is ignored. Only
+    models whose deployment is in `deployments` are kept (default: all).
+    Every model of a channel is evaluated once, so the matrix costs one row
+    per model rather than one evaluation per pair. Returns a dict with the
+    kept model keys and deployments, the per-channel totals and `totals`
+    shaped (voice models, email models).
+    """
+    voice_keep = [i for i, d in enumerate(cp.voice_deployments) if deployments is None or d in deployments]
+    email_keep = [i for i, d in enumerate(cp.email_deployments) if deployments is None or d in deployments]
+    voice_index = np.array(voice_keep, dtype=np.intp)
+    email_index = np.array(email_keep, dtype=np.intp)
+
+    voice = voice_costs(cp, voice_inputs['minutes_per_call'], voice_inputs['calls_per_day'], voice_index,
+                        voice_inputs['num_phones'], voice_inputs['min_replicas'], voice_inputs['business_hours_only'],
+                        voice_inputs.get('audio_cache_ratio', 0.0), voice_inputs.get('text_cache_ratio', 0.0))
+    email = email_costs(cp, email_inputs['emails_per_day'], email_inputs['polling_minutes'], email_index,
+                        email_inputs['enable_rag'], email_inputs['business_hours_only'],
+                        email_inputs.get('input_cache_ratio', 0.0))
+    blob = blob_costs(cp, email_inputs['num_pages'], email_inputs['enable_rag'])
+
+    voice_total = np.broadcast_to(voice['total'], voice_index.shape)
+    email_total = np.broadcast_to(email['total'], email_index.shape)
+    return {
+        'voice_keys': [cp.voice_model_keys[i] for i in voice_keep],
+        'email_keys': [cp.email_model_keys[i] for i in email_keep],
+        'voice_deployments': [cp.voice_deployments[i] for i in voice_keep],
+        'email_deployments': [cp.email_deployments[i] for i in email_keep],
+        'voice_total': voice_total,
+        'email_total': email_total,
+        'blob': float(blob['cost']),
+        'totals': voice_total[:, None] + email_total[None, :] + blob['cost']
+    }
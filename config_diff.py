@@ -0,0 +1,320 @@
+"""
+Batch diff of exported configuration JSONs.
+
+Customers send back the files produced by the "Download Configuration
+(JSON)" button, often many versions over time. This tool loads a directory
+of such exports, re-prices all of them under the current pricing in one
+batched evaluation (batch_model.py) and reports, per customer and version:
+
+- which inputs changed since the previous version (field: old -> new);
+- the cost delta per component since the previous version;
+- the difference between the current price and the cost recorded in the file
+  when it was exported (pricing changes since then).
+
+Exports are grouped by customer: the export's 'customer' key if present,
+otherwise the subdirectory the file is in (a flat directory is one
+customer). Versions are ordered by 'generated_date', then file name. Files
+are read by a thread pool; files that cannot be parsed or name unknown
+models are listed and skipped.
+
+Usage:
+    python config_diff.py diff exports/ [--output diff.csv] [--customer acme]
+    python config_diff.py sample --out exports/ [--customers 500 --versions 10]
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import batch_model
+import cost_model
+
+# Component -> (export section, recorded cost key)
+RECORDED = {
+    'voice_total': ('voice_agent', 'monthly_cost'),
+    'email_total': ('email_agent', 'monthly_cost'),
+    'blob_storage': ('shared', 'blob_storage_cost'),
+    'combined_total': ('totals', 'combined_cost')
+}
+
+SUMMARY_COMPONENTS = ('voice_total', 'email_total', 'blob_storage', 'combined_total')
+
+# ==============================================================================
+# LOADING
+# ==============================================================================
+
+def _read_export(path):
+    """(path, export, error) for one file (thread pool worker)"""
+    try:
+        with open(path, 'r') as f:
+            return path, json.load(f), None
+    except (OSError, ValueError) as e:
+        return path, None, str(e)
+
+
+def _customer(directory, path, export):
+    if export.get('customer'):
+        return str(export['customer'])
+    parent = os.path.relpath(os.path.dirname(path), directory)
+    return os.path.basename(os.path.abspath(directory)) if parent == '.' else parent
+
+
+def load_exports(directory, workers=None):
+    """Read every *.json under `directory` in parallel; returns ([(customer, path, export)], [(path, error)])"""
+    paths = sorted(glob.glob(os.path.join(directory, '**', '*.json'), recursive=True))
+    exports, errors = [], []
+    with ThreadPoolExecutor(workers or min(32, 4 * (os.cpu_count() or 1))) as pool:
+        for path, export, error in pool.map(_read_export, paths, chunksize=64):
+            if error:
+                errors.append((path, error))
+            elif not isinstance(export, dict):
+                errors.append((path, "not a configuration export"))
+            else:
+                exports.append((_customer(directory, path, export), path, export))
+    return exports, errors
+
+# ==============================================================================
+# DIFF
+# ==============================================================================
+
+def _recorded(export, section, key):
+    value = export.get(section, {}).get(key)
+    return float(value) if isinstance(value, (int, float)) else np.nan
+
+
+def _value(value):
+    # shift() turns integer columns into floats; show 76 rather than 76.0, 0.3 rather than 0.30000000000000004
+    return f'{value:.10g}' if isinstance(value, float) else str(value)
+
+
+def _changes(values, previous, changed):
+    """'field old -> new' strings for the changed scenario columns of each row"""
+    columns = list(values.columns)
+    text = []
+    for row, prev, mask in zip(values.itertuples(index=False), previous.itertuples(index=False), changed):
+        text.append('; '.join(f"{columns[i]} {_value(prev[i])} -> {_value(row[i])}" for i in np.flatnonzero(mask)))
+    return text
+
+
+def diff_exports(pricing, exports):
+    """Re-price exports and diff consecutive versions per customer.
+
+    `exports` is a list of (customer, path, export). Returns (frame, errors):
+    one row per priced export with its inputs, current component costs,
+    '<component>_delta' against the customer's previous version (NaN for the
+    first), 'changes' (changed inputs) and, for the summary components,
+    '<component>_recorded' and '<component>_vs_recorded'.
+    """
+    rows, inputs, errors = [], [], []
+    for customer, path, export in exports:
+        try:
+            inputs.append(cost_model.parse_config_export(pricing, export))
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append((path, f"{type(e).__name__}: {e}"))
+            continue
+        rows.append({
+            'customer': customer,
+            'file': path,
+            'generated_date': str(export.get('generated_date', '')),
+            'export_pricing': export.get('version'),
+            **{f'{component}_recorded': _recorded(export, *RECORDED[component]) for component in RECORDED}
+        })
+    if not rows:
+        return pd.DataFrame(), errors
+
+    table = batch_model.scenario_table(inputs)
+    costs = batch_model.evaluate_scenarios(batch_model.compile_pricing(pricing), table)
+    frame = pd.concat([pd.DataFrame(rows), pd.DataFrame(table), pd.DataFrame(costs)], axis=1)
+    frame = frame.sort_values(['customer', 'generated_date', 'file'], kind='stable').reset_index(drop=True)
+
+    first = frame['customer'] != frame['customer'].shift()
+    frame.insert(1, 'revision', frame.groupby('customer').cumcount() + 1)
+
+    columns = [column for column in table if column in frame]
+    values = frame[columns]
+    previous = values.shift()
+    changed = (values != previous).to_numpy() & ~first.to_numpy()[:, None]
+    frame['changes'] = _changes(values, previous, changed)
+
+    for component in batch_model.COMPONENTS:
+        frame[f'{component}_delta'] = (frame[component] - frame[component].shift()).mask(first)
+    for component in RECORDED:
+        frame[f'{component}_vs_recorded'] = frame[component] - frame[f'{component}_recorded']
+    return frame, errors
+
+
+def customer_summary(frame):
+    """First and latest version of each customer at current pricing"""
+    groups = frame.groupby('customer', sort=False)
+    summary = pd.DataFrame({
+        'versions': groups.size(),
+        'first_total': groups['combined_total'].first(),
+        'latest_total': groups['combined_total'].last(),
+        'latest_recorded': groups['combined_total_recorded'].last(),
+    })
+    summary['change'] = summary['latest_total'] - summary['first_total']
+    summary['vs_recorded'] = summary['latest_total'] - summary['latest_recorded']
+    return summary.reset_index()
+
+# ==============================================================================
+# SAMPLE EXPORTS
+# ==============================================================================
+
+def _export(pricing, inputs, costs, i, generated):
+    """An export in the "Download Configuration (JSON)" layout for row i of a scenario table"""
+    voice, email = inputs['voice'], inputs['email']
+    return {
+        'version': pricing['version'],
+        'generated_date': generated.isoformat(),
+        'voice_agent': {
+            'calls_per_day': voice['calls_per_day'],
+            'minutes_per_call': voice['minutes_per_call'],
+            'model': pricing['voice_agent']['models'][voice['model_key']]['name'],
+            'model_key': voice['model_key'],
+            'phone_numbers': voice['num_phones'],
+            'min_replicas': voice['min_replicas'],
+            'business_hours_only': voice['business_hours_only'],
+            'audio_cache_ratio': voice['audio_cache_ratio'],
+            'text_cache_ratio': voice['text_cache_ratio'],
+            'monthly_cost': float(costs['voice_total'][i])
+        },
+        'email_agent': {
+            'emails_per_day': email['emails_per_day'],
+            'polling_minutes': email['polling_minutes'],
+            'business_hours_only': email['business_hours_only'],
+            'model': pricing['email_agent']['models'][email['model_key']]['name'],
+            'model_key': email['model_key'],
+            'manual_pages': email['num_pages'],
+            'rag_enabled': email['enable_rag'],
+            'input_cache_ratio': email['input_cache_ratio'],
+            'monthly_cost': float(costs['email_total'][i])
+        },
+        'shared': {'blob_storage_cost': float(costs['blob_storage'][i])},
+        'totals': {'combined_cost': float(costs['combined_total'][i])}
+    }
+
+
+def write_sample_exports(pricing, out_dir, customers=100, versions=5, seed=0):
+    """Export histories with a few random input changes per version (for trying the tool)"""
+    rng = np.random.default_rng(seed)
+    count = customers * versions
+    table = batch_model.random_scenarios(pricing, count, seed)
+    # Each version keeps most inputs of the previous one
+    for column, values in table.items():
+        keep = rng.random(count) < 0.8
+        keep[::versions] = False
+        for i in np.flatnonzero(keep):
+            values[i] = values[i - 1]
+    costs = batch_model.evaluate_scenarios(batch_model.compile_pricing(pricing), table)
+
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        customer, version = divmod(i, versions)
+        inputs = {channel: {name: table[column][i].item() for name, column in names.items()}
+                  for channel, names in batch_model.INPUT_COLUMNS.items()}
+        directory = os.path.join(out_dir, f'customer_{customer:05d}')
+        os.makedirs(directory, exist_ok=True)
+        generated = start + timedelta(days=30 * version, seconds=int(rng.integers(0, 86400)))
+        with open(os.path.join(directory, f"ai_agent_config_{generated:%Y%m%d_%H%M%S}.json"), 'w') as f:
+            json.dump(_export(pricing, inputs, costs, i, generated), f, indent=2)
+    return out_dir
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def _cmd_diff(args):
+    pricing = cost_model.load_pricing(args.pricing)
+    started = time.perf_counter()
+    exports, errors = load_exports(args.directory, args.workers)
+    read = time.perf_counter() - started
+    files = len(exports) + len(errors)
+    if args.customer:
+        exports = [item for item in exports if item[0] == args.customer]
+    started = time.perf_counter()
+    frame, skipped = diff_exports(pricing, exports)
+    priced = time.perf_counter() - started
+    errors += skipped
+
+    print(f"Read {files:,} files in {read:.2f}s, re-priced and diffed {len(frame):,} "
+          f"exports in {priced:.2f}s (pricing {pricing['version']})")
+    for path, error in errors:
+        print(f"  skipped {path}: {error}")
+    if frame.empty:
+        return
+
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_colwidth', 80)
+    float_format = lambda x: f'{x:,.2f}'
+    if frame['customer'].nunique() == 1:
+        history = frame[['revision', 'generated_date', 'export_pricing']].copy()
+        for component in SUMMARY_COMPONENTS:
+            history[component.replace('_total', '')] = frame[component]
+            history[f'Δ {component.replace("_total", "")}'] = frame[f'{component}_delta']
+        history['recorded'] = frame['combined_total_recorded']
+        history['vs recorded'] = frame['combined_total_vs_recorded']
+        print(f"\nCustomer {frame['customer'].iloc[0]} (CHF/month at current pricing)")
+        print(history.to_string(index=False, float_format=float_format, na_rep='-'))
+        print("\nInput changes")
+        for revision, changes in zip(frame['revision'], frame['changes']):
+            if changes:
+                print(f"  v{revision}: {changes}")
+    else:
+        summary = customer_summary(frame)
+        print(f"\n{len(summary):,} customers: total CHF {summary['latest_total'].sum():,.2f}/month at current "
+              f"pricing (latest versions) vs CHF {summary['latest_recorded'].sum():,.2f} recorded")
+        print(f"\nLargest changes between consecutive versions (top {args.top})")
+        steps = frame.dropna(subset=['combined_total_delta'])
+        steps = steps.loc[steps['combined_total_delta'].abs().sort_values(ascending=False).index[:args.top]]
+        print(steps[['customer', 'revision', 'combined_total', 'combined_total_delta', 'changes']]
+              .to_string(index=False, float_format=float_format))
+        print(f"\nLargest differences to the recorded cost (top {args.top})")
+        drift = summary.dropna(subset=['vs_recorded'])
+        drift = drift.loc[drift['vs_recorded'].abs().sort_values(ascending=False).index[:args.top]]
+        print(drift.to_string(index=False, float_format=float_format))
+
+    if args.output:
+        frame.to_csv(args.output, index=False)
+        print(f"\nPer-export components, deltas and input changes written to {args.output}")
+
+
+def _cmd_sample(args):
+    pricing = cost_model.load_pricing(args.pricing)
+    out_dir = write_sample_exports(pricing, args.out, args.customers, args.versions, args.seed)
+    print(f"{args.customers * args.versions:,} sample exports written to {out_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-price and diff exported configuration JSONs")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('diff', help="Re-price a directory of exports and diff consecutive versions")
+    p.add_argument('directory', help="Directory of configuration exports (one subdirectory per customer)")
+    p.add_argument('--customer', help="Only this customer (prints its full history)")
+    p.add_argument('--output', help="CSV with every export's components, deltas and input changes")
+    p.add_argument('--top', type=int, default=10, help="Rows of the largest-change tables")
+    p.add_argument('--workers', type=int, help="File reader threads")
+    p.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    p.set_defaults(func=_cmd_diff)
+
+    p = sub.add_parser('sample', help="Write synthetic export histories")
+    p.add_argument('--out', required=True)
+    p.add_argument('--customers', type=int, default=100)
+    p.add_argument('--versions', type=int, default=5)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    p.set_defaults(func=_cmd_sample)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
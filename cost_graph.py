@@ -0,0 +1,602 @@
+"""
+Cost model as a dependency graph of named intermediate quantities.
+
+Every intermediate value of calculate_voice_cost / calculate_email_cost /
+calculate_blob_storage_cost (calls_per_month, total_minutes, audio tokens,
+idle_seconds, gb_seconds, ...) is a node with explicit dependencies. Setting
+an input only marks its dependents dirty; reading a node recomputes the
+minimal set of nodes needed. A node whose dependencies recomputed to the
+same values is not re-run (e.g. a polling change that stays inside the free
+tier stops at execution_cost).
+
+The graph can explain how each number was derived:
+
+    graph = build_cost_graph(pricing)
+    graph.set_inputs(email_polling_minutes=5)
+    print(graph.explain('email_total'))
+"""
+
+from collections import defaultdict
+
+import cost_model
+
+# Inputs fed from the sidebar, with the sidebar defaults
+VOICE_INPUTS = {
+    'voice_minutes_per_call': 5,
+    'voice_calls_per_day': 50,
+    'voice_model_key': 'gpt_realtime_mini_global',
+    'voice_num_phones': 1,
+    'voice_min_replicas': 0,
+    'voice_business_hours': False,
+    'voice_audio_cache_ratio': 0.0,
+    'voice_text_cache_ratio': 0.0
+}
+
+EMAIL_INPUTS = {
+    'email_emails_per_day': 50,
+    'email_polling_minutes': 1,
+    'email_model_key': 'gpt_5_mini_global',
+    'email_enable_rag': True,
+    'email_num_pages': 5000,
+    'email_business_hours': False,
+    'email_input_cache_ratio': 0.0
+}
+
+# Pricing sections are separate inputs so a price change only dirties the
+# nodes that read that section
+PRICING_SECTIONS = {
+    'acs': ('voice_agent', 'acs'),
+    'container_apps': ('voice_agent', 'container_apps'),
+    'audio_conversion': ('voice_agent', 'audio_conversion'),
+    'voice_models': ('voice_agent', 'models'),
+    'azure_functions': ('email_agent', 'azure_functions'),
+    'email_models': ('email_agent', 'models'),
+    'email_tokens': ('email_agent', 'tokens'),
+    'operating_hours': ('email_agent', 'operating_hours'),
+    'blob_storage': ('shared', 'blob_storage')
+}
+
+
+class _Node:
+    __slots__ = ('name', 'deps', 'func', 'formula', 'seen_versions')
+
+    def __init__(self, name, deps, func, formula):
+        self.name = name
+        self.deps = tuple(deps)
+        self.func = func
+        self.formula = formula
+        self.seen_versions = None
+
+
+class CostGraph:
+    """Named quantities with dirty tracking and early cutoff"""
+
+    def __init__(self):
+        self.inputs = {}
+        self.nodes = {}
+        self.values = {}
+        self.versions = defaultdict(int)
+        self.dependents = defaultdict(set)
+        self.dirty = set()
+        self.recomputed = []
+
+    def add_input(self, name, value, description=''):
+        self.inputs[name] = description
+        self.values[name] = value
+        self.versions[name] += 1
+
+    def add_node(self, name, deps, func, formula):
+        for dep in deps:
+            if dep not in self.inputs and dep not in self.nodes:
+                raise KeyError(f"node '{name}' depends on unknown quantity '{dep}'")
+            self.dependents[dep].add(name)
+        self.nodes[name] = _Node(name, deps, func, formula)
+        self.dirty.add(name)
+
+    # --------------------------------------------------------------------------
+    # Updates
+    # --------------------------------------------------------------------------
+
+    def _mark_dirty(self, name):
+        stack = list(self.dependents[name])
+        while stack:
+            node = stack.pop()
+            if node not in self.dirty:
+                self.dirty.add(node)
+                stack.extend(self.dependents[node])
+
+    def set_input(self, name, value):
+        """Change one input; returns True if it actually changed"""
+        if name not in self.inputs:
+            raise KeyError(f"unknown input '{name}'")
+        old = self.values[name]
+        if old == value and type(old) is type(value):
+            return False
+        self.values[name] = value
+        self.versions[name] += 1
+        self._mark_dirty(name)
+        return True
+
+    def set_inputs(self, **values):
+        return [name for name, value in values.items() if self.set_input(name, value)]
+
+    def set_pricing(self, pricing):
+        """Feed pricing_config.json; only changed sections dirty anything"""
+        for name, (agent, section) in PRICING_SECTIONS.items():
+            self.set_input(name, pricing[agent][section])
+        self.set_input('pricing', pricing)
+
+    # --------------------------------------------------------------------------
+    # Evaluation
+    # --------------------------------------------------------------------------
+
+    def _evaluate(self, name):
+        if name not in self.dirty:
+            return
+        node = self.nodes[name]
+        for dep in node.deps:
+            self._evaluate(dep)
+
+        dep_versions = tuple(self.versions[dep] for dep in node.deps)
+        if dep_versions != node.seen_versions:
+            value = node.func(*(self.values[dep] for dep in node.deps))
+            self.recomputed.append(name)
+            node.seen_versions = dep_versions
+            if name not in self.values or self.values[name] != value:
+                self.values[name] = value
+                self.versions[name] += 1
+        self.dirty.discard(name)
+
+    def get(self, name):
+        if name in self.nodes:
+            self._evaluate(name)
+        return self.values[name]
+
+    def take_recomputed(self):
+        """Names recomputed since the last call (in evaluation order)"""
+        recomputed, self.recomputed = self.recomputed, []
+        return recomputed
+
+    # --------------------------------------------------------------------------
+    # Inspection
+    # --------------------------------------------------------------------------
+
+    def _format(self, value):
+        if isinstance(value, bool) or isinstance(value, str):
+            return str(value)
+        if isinstance(value, (int, float)):
+            return f"{value:,.6g}" if abs(value) < 1e6 else f"{value:,.0f}"
+        if isinstance(value, dict):
+            return "{pricing section}"
+        if isinstance(value, list):
+            return f"[{len(value)} item(s)]"
+        return repr(value)
+
+    def explain(self, name, max_depth=None):
+        """Derivation tree of a quantity as indented text lines"""
+        lines = []
+        seen = set()
+
+        def walk(node_name, depth):
+            value = self._format(self.get(node_name))
+            indent = '  ' * depth
+            if node_name in self.inputs:
+                lines.append(f"{indent}{node_name} = {value}  (input)")
+                return
+            node = self.nodes[node_name]
+            if node_name in seen:
+                lines.append(f"{indent}{node_name} = {value}  (see above)")
+                return
+            seen.add(node_name)
+            lines.append(f"{indent}{node_name} = {value}  <- {node.formula}")
+            if max_depth is None or depth < max_depth:
+                for dep in node.deps:
+                    if dep in PRICING_SECTIONS or dep == 'pricing':
+                        continue
+                    walk(dep, depth + 1)
+
+        walk(name, 0)
+        return '\n'.join(lines)
+
+    # --------------------------------------------------------------------------
+    # Results in the shape returned by the calculators
+    # --------------------------------------------------------------------------
+
+    def voice_results(self):
+        g = self.get
+        return cost_model.VoiceResult(
+            total=g('voice_total'),
+            phone=g('phone_cost'),
+            acs=g('acs_call_cost'),
+            container=g('container_cost'),
+            ai_audio=g('ai_audio_cost'),
+            ai_text=g('ai_text_cost'),
+            ai_total=g('ai_cost'),
+            cache_savings=g('voice_cache_savings'),
+            calls=g('calls_per_month'),
+            minutes=g('total_minutes'),
+            cost_per_call=g('cost_per_call'),
+            vcpu_seconds=g('vcpu_seconds'),
+            gb_seconds=g('voice_gb_seconds'),
+            requests=g('container_requests'),
+            business_hours=g('voice_business_hours'),
+            container_vcpu=g('container_vcpu_cost'),
+            container_memory=g('container_memory_cost'),
+            container_requests=g('container_request_cost'),
+            audio_input=g('audio_input_cost'),
+            audio_output=g('audio_output_cost'),
+            text_input=g('text_input_cost'),
+            text_output=g('text_output_cost')
+        )
+
+    def email_results(self):
+        g = self.get
+        return cost_model.EmailResult(
+            total=g('email_total'),
+            functions=g('functions_cost'),
+            llm=g('llm_cost'),
+            emails=g('emails_per_month'),
+            checks=g('checks_per_month'),
+            cost_per_email=g('cost_per_email'),
+            gb_seconds=g('email_gb_seconds'),
+            execution_cost=g('execution_cost'),
+            compute_cost=g('compute_cost'),
+            llm_input=g('llm_input_cost'),
+            llm_output=g('llm_output_cost'),
+            cache_savings=g('email_cache_savings'),
+            business_hours=g('email_business_hours')
+        )
+
+    def blob_results(self):
+        return cost_model.BlobResult(cost=self.get('blob_cost'), storage_gb=self.get('storage_gb'))
+
+# ==============================================================================
+# GRAPH DEFINITION
+# ==============================================================================
+
+def _free_tier(used, free, cost):
+    return cost(used - free) if used > free else 0
+
+
+def _add_voice_nodes(g):
+    n = g.add_node
+
+    n('voice_model', ['voice_models', 'voice_model_key'], lambda models, key: models[key],
+      "voice_models[voice_model_key]")
+
+    # Volume
+    n('calls_per_month', ['voice_calls_per_day'], lambda calls: calls * 30,
+      "voice_calls_per_day × 30")
+    n('total_minutes', ['calls_per_month', 'voice_minutes_per_call'], lambda calls, minutes: calls * minutes,
+      "calls_per_month × voice_minutes_per_call")
+
+    # ACS
+    n('phone_cost', ['voice_num_phones', 'acs'], lambda phones, acs: phones * acs['phone_number_per_month'],
+      "voice_num_phones × acs.phone_number_per_month")
+    n('acs_call_cost', ['total_minutes', 'acs'], lambda minutes, acs: minutes * acs['inbound_per_minute'],
+      "total_minutes × acs.inbound_per_minute")
+
+    # Container time
+    n('active_seconds', ['calls_per_month', 'voice_minutes_per_call'],
+      lambda calls, minutes: calls * (minutes * 60),
+      "calls_per_month × voice_minutes_per_call × 60")
+    n('voice_operating_hours', ['voice_business_hours', 'operating_hours'],
+      lambda bh, hours: hours['business_hours_per_month'] if bh else hours['full_time_hours_per_month'],
+      "business or full-time hours per month")
+    n('monthly_seconds', ['voice_operating_hours'], lambda hours: hours * 3600,
+      "voice_operating_hours × 3600")
+    n('idle_seconds', ['monthly_seconds', 'active_seconds'], lambda monthly, active: max(monthly - active, 0),
+      "max(0, monthly_seconds − active_seconds)")
+    n('vcpu_seconds', ['voice_min_replicas', 'active_seconds', 'monthly_seconds'],
+      lambda replicas, active, monthly: active if replicas == 0 else replicas * monthly,
+      "active_seconds (serverless) or voice_min_replicas × monthly_seconds")
+    n('voice_gb_seconds', ['voice_min_replicas', 'active_seconds', 'monthly_seconds', 'container_apps'],
+      lambda replicas, active, monthly, c: (active * c['memory_gb_per_replica'] if replicas == 0
+                                            else replicas * monthly * c['memory_gb_per_replica']),
+      "(active_seconds or voice_min_replicas × monthly_seconds) × container_apps.memory_gb_per_replica")
+
+    # Container requests
+    n('health_checks', ['voice_min_replicas', 'voice_business_hours', 'voice_operating_hours'],
+      lambda replicas, bh, hours: 0 if replicas == 0 else (hours * 60 if bh else 30 * 24 * 60),
+      "1 health check per operating minute (always-on only)")
+    n('container_requests', ['calls_per_month', 'health_checks'],
+      lambda calls, checks: checks + calls * 2,
+      "health_checks + calls_per_month × 2")
+    n('container_request_cost', ['container_requests', 'container_apps'],
+      lambda requests, c: _free_tier(requests, c['free_requests_per_month'],
+                                     lambda billable: (billable / 1_000_000) * c['requests_per_million']),
+      "max(0, container_requests − free_requests) ÷ 1M × container_apps.requests_per_million")
+
+    # Always-on: active + flat idle rate
+    n('container_active_vcpu_cost', ['voice_min_replicas', 'active_seconds', 'container_apps'],
+      lambda replicas, active, c: replicas * active * c['vcpu_per_replica'] * c['vcpu_active_per_second'],
+      "voice_min_replicas × active_seconds × vcpu_per_replica × vcpu_active_per_second")
+    n('container_active_memory_cost', ['voice_min_replicas', 'active_seconds', 'container_apps'],
+      lambda replicas, active, c: replicas * active * c['memory_gb_per_replica'] * c['memory_gb_active_per_second'],
+      "voice_min_replicas × active_seconds × memory_gb_per_replica × memory_gb_active_per_second")
+    n('container_idle_cost', ['voice_min_replicas', 'idle_seconds', 'container_apps'],
+      lambda replicas, idle, c: replicas * idle * c['idle_per_second'],
+      "voice_min_replicas × idle_seconds × container_apps.idle_per_second")
+    n('idle_vcpu_portion', ['container_apps'], _idle_vcpu_portion,
+      "vCPU share of the combined active rate (splits the flat idle rate)")
+
+    n('container_vcpu_cost',
+      ['voice_min_replicas', 'vcpu_seconds', 'container_active_vcpu_cost', 'container_idle_cost',
+       'idle_vcpu_portion', 'container_apps'],
+      _container_vcpu_cost,
+      "serverless: max(0, vcpu_seconds − free) × vcpu_per_replica × rate; "
+      "always-on: container_active_vcpu_cost + container_idle_cost × idle_vcpu_portion")
+    n('container_memory_cost',
+      ['voice_min_replicas', 'voice_gb_seconds', 'container_active_memory_cost', 'container_idle_cost',
+       'idle_vcpu_portion', 'container_apps'],
+      _container_memory_cost,
+      "serverless: max(0, voice_gb_seconds − free) × rate; "
+      "always-on: container_active_memory_cost + container_idle_cost × (1 − idle_vcpu_portion)")
+    n('container_cost',
+      ['voice_min_replicas', 'container_vcpu_cost', 'container_memory_cost', 'container_active_vcpu_cost',
+       'container_active_memory_cost', 'container_idle_cost', 'container_request_cost'],
+      lambda replicas, vcpu, memory, active_vcpu, active_memory, idle, requests: (
+          vcpu + memory + requests if replicas == 0
+          else (active_vcpu + active_memory) + idle + requests),
+      "serverless: vCPU + memory + requests; always-on: active + idle + requests")
+
+    # AI audio
+    n('total_audio_tokens', ['total_minutes', 'audio_conversion'],
+      lambda minutes, a: minutes * a['tokens_per_minute_audio'],
+      "total_minutes × audio_conversion.tokens_per_minute_audio")
+    n('audio_input_tokens', ['total_audio_tokens', 'audio_conversion'], lambda t, a: t * a['input_split'],
+      "total_audio_tokens × audio_conversion.input_split")
+    n('audio_output_tokens', ['total_audio_tokens', 'audio_conversion'], lambda t, a: t * a['output_split'],
+      "total_audio_tokens × audio_conversion.output_split")
+    n('cached_audio_tokens', ['audio_input_tokens', 'voice_audio_cache_ratio'], lambda t, ratio: t * ratio,
+      "audio_input_tokens × voice_audio_cache_ratio")
+    n('audio_input_cost', ['audio_input_tokens', 'cached_audio_tokens', 'voice_model'],
+      lambda t, cached, m: ((t - cached) / 1_000_000) * m['audio_input_per_m_tokens'] +
+                           (cached / 1_000_000) * m['audio_cached_input_per_m_tokens'],
+      "(audio_input_tokens − cached_audio_tokens) ÷ 1M × audio_input_per_m_tokens + "
+      "cached_audio_tokens ÷ 1M × audio_cached_input_per_m_tokens")
+    n('audio_output_cost', ['audio_output_tokens', 'voice_model'],
+      lambda t, m: (t / 1_000_000) * m['audio_output_per_m_tokens'],
+      "audio_output_tokens ÷ 1M × voice_model.audio_output_per_m_tokens")
+
+    # AI text reasoning (70% input / 30% output per call)
+    n('cached_text_tokens_per_call', ['voice_model', 'voice_text_cache_ratio'],
+      lambda m, ratio: (m['tokens_per_call'] * 0.7) * ratio,
+      "tokens_per_call × 0.7 × voice_text_cache_ratio")
+    n('text_input_cost', ['calls_per_month', 'cached_text_tokens_per_call', 'voice_model'],
+      lambda calls, cached, m: calls * ((m['tokens_per_call'] * 0.7 - cached) / 1_000_000) * m['text_input_per_m_tokens'] +
+                               calls * (cached / 1_000_000) * m['text_cached_input_per_m_tokens'],
+      "calls_per_month × (tokens_per_call × 0.7 − cached_text_tokens_per_call) ÷ 1M × text_input_per_m_tokens + "
+      "calls_per_month × cached_text_tokens_per_call ÷ 1M × text_cached_input_per_m_tokens")
+    n('text_output_cost', ['calls_per_month', 'voice_model'],
+      lambda calls, m: calls * ((m['tokens_per_call'] * 0.3) / 1_000_000) * m['text_output_per_m_tokens'],
+      "calls_per_month × tokens_per_call × 0.3 ÷ 1M × voice_model.text_output_per_m_tokens")
+
+    n('ai_audio_cost', ['audio_input_cost', 'audio_output_cost'], lambda i, o: i + o,
+      "audio_input_cost + audio_output_cost")
+    n('ai_text_cost', ['text_input_cost', 'text_output_cost'], lambda i, o: i + o,
+      "text_input_cost + text_output_cost")
+    n('ai_cost', ['ai_audio_cost', 'text_input_cost', 'text_output_cost'], lambda audio, ti, to: audio + ti + to,
+      "ai_audio_cost + ai_text_cost")
+
+    n('voice_cache_savings', ['cached_audio_tokens', 'calls_per_month', 'cached_text_tokens_per_call', 'voice_model'],
+      lambda audio, calls, text, m: (audio / 1_000_000) * (m['audio_input_per_m_tokens'] - m['audio_cached_input_per_m_tokens']) +
+                                    calls * (text / 1_000_000) * (m['text_input_per_m_tokens'] - m['text_cached_input_per_m_tokens']),
+      "cached tokens × (input rate − cached input rate)")
+
+    n('voice_total', ['phone_cost', 'acs_call_cost', 'container_cost', 'ai_cost'],
+      lambda phone, acs, container, ai: phone + acs + container + ai,
+      "phone_cost + acs_call_cost + container_cost + ai_cost")
+    n('cost_per_call', ['voice_total', 'calls_per_month'], lambda total, calls: total / calls if calls > 0 else 0,
+      "voice_total ÷ calls_per_month")
+
+
+def _idle_vcpu_portion(c):
+    vcpu_rate = c['vcpu_per_replica'] * c['vcpu_active_per_second']
+    memory_rate = c['memory_gb_per_replica'] * c['memory_gb_active_per_second']
+    total_rate = vcpu_rate + memory_rate
+    return (vcpu_rate / total_rate) if total_rate > 0 else 0.5
+
+
+def _idle_memory_portion(c):
+    vcpu_rate = c['vcpu_per_replica'] * c['vcpu_active_per_second']
+    memory_rate = c['memory_gb_per_replica'] * c['memory_gb_active_per_second']
+    total_rate = vcpu_rate + memory_rate
+    return (memory_rate / total_rate) if total_rate > 0 else 0.5
+
+
+def _container_vcpu_cost(replicas, vcpu_seconds, active_vcpu, idle, vcpu_portion, c):
+    if replicas == 0:
+        return _free_tier(vcpu_seconds, c['free_vcpu_seconds_per_month'],
+                          lambda billable: billable * c['vcpu_per_replica'] * c['vcpu_active_per_second'])
+    return active_vcpu + idle * vcpu_portion
+
+
+def _container_memory_cost(replicas, gb_seconds, active_memory, idle, vcpu_portion, c):
+    if replicas == 0:
+        return _free_tier(gb_seconds, c['free_gb_seconds_per_month'],
+                          lambda billable: billable * c['memory_gb_active_per_second'])
+    return active_memory + idle * _idle_memory_portion(c)
+
+
+def _add_email_nodes(g):
+    n = g.add_node
+
+    n('email_model', ['email_models', 'email_model_key'], lambda models, key: models[key],
+      "email_models[email_model_key]")
+    n('emails_per_month', ['email_emails_per_day'], lambda emails: emails * 30,
+      "email_emails_per_day × 30")
+
+    # Azure Functions polling
+    n('email_hours_per_month', ['email_business_hours', 'operating_hours'],
+      lambda bh, hours: hours['business_hours_per_month'] if bh else hours['full_time_hours_per_month'],
+      "business or full-time hours per month")
+    n('checks_per_month', ['email_hours_per_month', 'email_polling_minutes'],
+      lambda hours, polling: (hours * 60) / polling,
+      "email_hours_per_month × 60 ÷ email_polling_minutes")
+    n('execution_cost', ['checks_per_month', 'azure_functions'],
+      lambda checks, f: _free_tier(checks, f['free_executions_per_month'],
+                                   lambda billable: (billable / 1_000_000) * f['execution_cost_per_million']),
+      "max(0, checks_per_month − free_executions) ÷ 1M × azure_functions.execution_cost_per_million")
+    n('execution_seconds', ['checks_per_month', 'azure_functions'],
+      lambda checks, f: checks * f['seconds_per_execution'],
+      "checks_per_month × azure_functions.seconds_per_execution")
+    n('email_gb_seconds', ['execution_seconds', 'azure_functions'],
+      lambda seconds, f: seconds * f['memory_gb'],
+      "execution_seconds × azure_functions.memory_gb")
+    n('compute_cost', ['email_gb_seconds', 'azure_functions'],
+      lambda gb_seconds, f: _free_tier(gb_seconds, f['free_gb_seconds_per_month'],
+                                       lambda billable: billable * f['compute_cost_per_gb_second']),
+      "max(0, email_gb_seconds − free_gb_seconds) × azure_functions.compute_cost_per_gb_second")
+    n('functions_cost', ['execution_cost', 'compute_cost'], lambda execution, compute: execution + compute,
+      "execution_cost + compute_cost")
+
+    # LLM
+    n('input_tokens_per_email', ['email_enable_rag', 'email_tokens'],
+      lambda rag, t: t['base_input_tokens'] + t['rag_additional_tokens'] if rag else t['base_input_tokens'],
+      "base_input_tokens (+ rag_additional_tokens when RAG is enabled)")
+    n('total_input_tokens', ['emails_per_month', 'input_tokens_per_email'], lambda emails, t: emails * t,
+      "emails_per_month × input_tokens_per_email")
+    n('total_output_tokens', ['emails_per_month', 'email_tokens'], lambda emails, t: emails * t['output_tokens'],
+      "emails_per_month × email_tokens.output_tokens")
+    n('cached_input_tokens', ['total_input_tokens', 'email_input_cache_ratio'], lambda t, ratio: t * ratio,
+      "total_input_tokens × email_input_cache_ratio")
+    n('llm_input_cost', ['total_input_tokens', 'cached_input_tokens', 'email_model'],
+      lambda t, cached, m: ((t - cached) / 1_000_000) * m['input_per_m_tokens'] +
+                           (cached / 1_000_000) * m['cached_input_per_m_tokens'],
+      "(total_input_tokens − cached_input_tokens) ÷ 1M × input_per_m_tokens + "
+      "cached_input_tokens ÷ 1M × cached_input_per_m_tokens")
+    n('llm_output_cost', ['total_output_tokens', 'email_model'],
+      lambda t, m: (t / 1_000_000) * m['output_per_m_tokens'],
+      "total_output_tokens ÷ 1M × email_model.output_per_m_tokens")
+    n('llm_cost', ['llm_input_cost', 'llm_output_cost'], lambda i, o: i + o,
+      "llm_input_cost + llm_output_cost")
+    n('email_cache_savings', ['cached_input_tokens', 'email_model'],
+      lambda cached, m: (cached / 1_000_000) * (m['input_per_m_tokens'] - m['cached_input_per_m_tokens']),
+      "cached_input_tokens ÷ 1M × (input_per_m_tokens − cached_input_per_m_tokens)")
+
+    n('email_total', ['functions_cost', 'llm_cost'], lambda functions, llm: functions + llm,
+      "functions_cost + llm_cost")
+    n('cost_per_email', ['email_total', 'emails_per_month'],
+      lambda total, emails: total / emails if emails > 0 else 0,
+      "email_total ÷ emails_per_month")
+
+    # Shared blob storage
+    n('storage_gb', ['email_enable_rag', 'email_num_pages', 'blob_storage'],
+      lambda rag, pages, b: (0 if not rag or pages == 0
+                             else (pages * b['mb_per_page'] / 1024) * b['index_overhead_multiplier']),
+      "email_num_pages × mb_per_page ÷ 1024 × index_overhead_multiplier")
+    n('blob_cost', ['storage_gb', 'blob_storage'], lambda gb, b: gb * b['hot_tier_per_gb_month'] if gb else 0,
+      "storage_gb × blob_storage.hot_tier_per_gb_month")
+
+
+def _add_combined_nodes(g):
+    n = g.add_node
+
+    n('combined_total', ['voice_total', 'email_total', 'blob_cost'], lambda v, e, b: v + e + b,
+      "voice_total + email_total + blob_cost")
+    n('total_interactions', ['calls_per_month', 'emails_per_month'], lambda calls, emails: calls + emails,
+      "calls_per_month + emails_per_month")
+    n('avg_cost_per_interaction', ['combined_total', 'total_interactions'],
+      lambda total, interactions: total / interactions if interactions > 0 else 0,
+      "combined_total ÷ total_interactions")
+    for part, node in (('voice', 'voice_total'), ('email', 'email_total'), ('blob', 'blob_cost')):
+        n(f'{part}_pct', [node, 'combined_total'],
+          lambda cost, total: (cost / total * 100) if total > 0 else 0,
+          f"{node} ÷ combined_total × 100")
+
+
+def _add_recommendation_nodes(g):
+    """Optimization suggestions from the Combined tab, each with its own inputs"""
+    n = g.add_node
+    voice_args = ['voice_minutes_per_call', 'voice_calls_per_day', 'voice_model_key', 'voice_num_phones',
+                  'voice_audio_cache_ratio', 'voice_text_cache_ratio']
+    email_args = ['email_emails_per_day', 'email_polling_minutes', 'email_model_key', 'email_enable_rag',
+                  'email_num_pages', 'email_input_cache_ratio']
+
+    def rec_voice_model(model_key, ai_cost):
+        if model_key != 'gpt_realtime':
+            return None
+        return {
+            "Channel": "Voice",
+            "Suggestion": "Switch to GPT-Realtime-mini",
+            "Savings": ai_cost * 0.68,  # Approximate savings
+            "Impact": "Slightly lower quality, excellent for most calls"
+        }
+
+    def rec_replicas(pricing, minutes, calls, model_key, phones, audio_cache, text_cache, replicas, bh, voice_total):
+        if replicas < 2:
+            return None
+        temp = cost_model.calculate_voice_cost(pricing, minutes, calls, model_key, phones, 1, bh,
+                                               audio_cache, text_cache)
+        return {
+            "Channel": "Voice",
+            "Suggestion": f"Reduce to 1 replica (from {replicas})",
+            "Savings": voice_total - temp['total'],
+            "Impact": "Still no cold starts, maintain availability"
+        }
+
+    def rec_email_model(pricing, emails_day, polling, model_key, rag, pages, cache, bh, emails, email_total):
+        if model_key not in ['gpt_5', 'gpt_4o'] or emails <= 100:
+            return None
+        temp = cost_model.calculate_email_cost(pricing, emails_day, polling, 'gpt_5_mini', rag, pages, bh, cache)
+        return {
+            "Channel": "Email",
+            "Suggestion": "Switch to GPT-5-mini",
+            "Savings": email_total - temp['total'],
+            "Impact": "Minimal quality loss for email responses"
+        }
+
+    def rec_polling(pricing, emails_day, polling, model_key, rag, pages, cache, bh, emails, functions):
+        if polling != 1 or emails >= 1000:
+            return None
+        temp = cost_model.calculate_email_cost(pricing, emails_day, 5, model_key, rag, pages, bh, cache)
+        return {
+            "Channel": "Email",
+            "Suggestion": "Increase polling to 5 minutes",
+            "Savings": functions - temp['functions'],
+            "Impact": "5-min delay acceptable for email (vs instant)"
+        }
+
+    def rec_business_hours(pricing, emails_day, polling, model_key, rag, pages, cache, bh, functions):
+        if bh or emails_day >= 100:
+            return None
+        temp = cost_model.calculate_email_cost(pricing, emails_day, polling, model_key, rag, pages, True, cache)
+        return {
+            "Channel": "Email",
+            "Suggestion": "Enable business hours only",
+            "Savings": functions - temp['functions'],
+            "Impact": "No email processing nights/weekends"
+        }
+
+    n('rec_voice_model', ['voice_model_key', 'ai_cost'], rec_voice_model,
+      "cheaper realtime model saves ~68% of ai_cost")
+    n('rec_replicas', ['pricing'] + voice_args + ['voice_min_replicas', 'voice_business_hours', 'voice_total'],
+      rec_replicas, "voice_total − voice total with 1 replica")
+    n('rec_email_model', ['pricing'] + email_args + ['email_business_hours', 'emails_per_month', 'email_total'],
+      rec_email_model, "email_total − email total with GPT-5-mini")
+    n('rec_polling', ['pricing'] + email_args + ['email_business_hours', 'emails_per_month', 'functions_cost'],
+      rec_polling, "functions_cost − functions cost at 5-minute polling")
+    n('rec_business_hours', ['pricing'] + email_args + ['email_business_hours', 'functions_cost'],
+      rec_business_hours, "functions_cost − functions cost during business hours only")
+    n('recommendations', ['rec_voice_model', 'rec_replicas', 'rec_email_model', 'rec_polling', 'rec_business_hours'],
+      lambda *recs: [rec for rec in recs if rec is not None],
+      "applicable optimization suggestions")
+
+
+def build_cost_graph(pricing, **inputs):
+    """Build the full voice + email + shared cost graph"""
+    g = CostGraph()
+    for name, default in {**VOICE_INPUTS, **EMAIL_INPUTS}.items():
+        g.add_input(name, inputs.pop(name, default))
+    if inputs:
+        raise KeyError(f"unknown input(s): {', '.join(sorted(inputs))}")
+    for name, (agent, section) in PRICING_SECTIONS.items():
+        g.add_input(name, pricing[agent][section], f"pricing_config.json {agent}.{section}")
+    g.add_input('pricing', pricing, "pricing_config.json")
+
+    _add_voice_nodes(g)
+    _add_email_nodes(g)
+    _add_combined_nodes(g)
+    _add_recommendation_nodes(g)
+    return g
@@ -0,0 +1,545 @@
+import json
+import math
+import os
+from dataclasses import dataclass
+
+PRICING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pricing_config.json')
+
+# ==============================================================================
+# LOAD PRICING CONFIGURATION
+# ==============================================================================
+
+def load_pricing(path=PRICING_PATH):
+    """Load pricing configuration from JSON file"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+# ==============================================================================
+# RESULT TYPES
+# ==============================================================================
+
+class _Record:
+    """Mapping-style access for the result dataclasses below.
+
+    Fields are read as attributes (result.total); result['total'], get(),
+    keys() and dict(result) also work, so code written against the former result
+    dicts keeps working. Values are raw numbers; formatting is left to the caller.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def get(self, key, default=None):
+        return self[key] if key in self.keys() else default
+
+    def keys(self):
+        return self.__slots__
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.keys()}
+
+
+# Mapping view of VoiceResult (result['...'], dict(result), exports): the
+# former top-level keys, with the per-service fields nested under 'breakdown'
+VOICE_RESULT_KEYS = (
+    'total', 'phone', 'acs', 'container', 'ai_audio', 'ai_text', 'ai_total', 'cache_savings', 'calls', 'minutes',
+    'cost_per_call', 'vcpu_seconds', 'gb_seconds', 'requests', 'business_hours', 'breakdown'
+)
+
+
+@dataclass(slots=True)
+class VoiceResult(_Record):
+    """Result of calculate_voice_cost (CHF/month unless noted)"""
+
+    total: float
+    phone: float
+    acs: float
+    container: float
+    ai_audio: float
+    ai_text: float
+    ai_total: float
+    cache_savings: float
+    calls: float
+    minutes: float
+    cost_per_call: float
+    vcpu_seconds: float
+    gb_seconds: float
+    requests: float
+    business_hours: bool
+    container_vcpu: float
+    container_memory: float
+    container_requests: float
+    audio_input: float
+    audio_output: float
+    text_input: float
+    text_output: float
+
+    @property
+    def breakdown(self):
+        """Per-service costs in the nested layout of earlier versions"""
+        return {
+            'phone_cost': self.phone,
+            'acs_cost': self.acs,
+            'container_cost': self.container,
+            'container_vcpu': self.container_vcpu,
+            'container_memory': self.container_memory,
+            'container_requests': self.container_requests,
+            'audio_input': self.audio_input,
+            'audio_output': self.audio_output,
+            'text_input': self.text_input,
+            'text_output': self.text_output
+        }
+
+    def keys(self):
+        return VOICE_RESULT_KEYS
+
+
+@dataclass(slots=True)
+class EmailResult(_Record):
+    """Result of calculate_email_cost (CHF/month unless noted)"""
+
+    total: float
+    functions: float
+    llm: float
+    emails: float
+    checks: float
+    cost_per_email: float
+    gb_seconds: float
+    execution_cost: float
+    compute_cost: float
+    llm_input: float
+    llm_output: float
+    cache_savings: float
+    business_hours: bool
+
+
+@dataclass(slots=True)
+class BlobResult(_Record):
+    """Result of calculate_blob_storage_cost"""
+
+    cost: float
+    storage_gb: float
+
+# ==============================================================================
+# CALCULATION FUNCTIONS
+# ==============================================================================
+
+def calculate_blob_storage_cost(pricing, num_pages, enable_rag):
+    """Calculate shared blob storage cost"""
+    if not enable_rag or num_pages == 0:
+        return BlobResult(cost=0, storage_gb=0)
+
+    blob_config = pricing['shared']['blob_storage']
+
+    # Document storage
+    storage_gb = (num_pages * blob_config['mb_per_page'] / 1024) * blob_config['index_overhead_multiplier']
+
+    # Cost
+    blob_cost = storage_gb * blob_config['hot_tier_per_gb_month']
+
+    return BlobResult(cost=blob_cost, storage_gb=storage_gb)
+
+
+def calculate_voice_cost(pricing, minutes_per_call, calls_per_day, model_key, num_phones, min_replicas, business_hours_only=False,
+                         audio_cache_ratio=0.0, text_cache_ratio=0.0):
+    """Calculate voice agent monthly costs
+
+    audio_cache_ratio / text_cache_ratio are the shares (0-1) of audio and text
+    input tokens served from the prompt cache and billed at the cached rate.
+    """
+
+    # Load pricing
+    acs_pricing = pricing['voice_agent']['acs']
+    container_config = pricing['voice_agent']['container_apps']
+    model = pricing['voice_agent']['models'][model_key]
+    audio_conversion = pricing['voice_agent']['audio_conversion']
+    operating_hours_config = pricing['email_agent']['operating_hours']
+
+    # Volume calculations
+    calls_per_month = calls_per_day * 30
+    total_minutes = calls_per_month * minutes_per_call
+
+    # ACS costs
+    phone_cost = num_phones * acs_pricing['phone_number_per_month']
+    acs_call_cost = total_minutes * acs_pricing['inbound_per_minute']
+
+    # Container costs
+    if min_replicas == 0:
+        # Serverless: only pay during calls
+        call_seconds = calls_per_month * (minutes_per_call * 60)
+
+        # vCPU cost
+        vcpu_seconds = call_seconds
+        if vcpu_seconds > container_config['free_vcpu_seconds_per_month']:
+            vcpu_cost = (vcpu_seconds - container_config['free_vcpu_seconds_per_month']) * container_config['vcpu_per_replica'] * container_config['vcpu_active_per_second']
+        else:
+            vcpu_cost = 0
+
+        # Memory cost
+        gb_seconds = call_seconds * container_config['memory_gb_per_replica']
+        if gb_seconds > container_config['free_gb_seconds_per_month']:
+            memory_cost = (gb_seconds - container_config['free_gb_seconds_per_month']) * container_config['memory_gb_active_per_second']
+        else:
+            memory_cost = 0
+
+        # Request cost (NEW)
+        # Serverless: each call generates ~2 requests (connection + messages)
+        requests = calls_per_month * 2
+        if requests > container_config['free_requests_per_month']:
+            request_cost = ((requests - container_config['free_requests_per_month']) / 1_000_000) * container_config['requests_per_million']
+        else:
+            request_cost = 0
+
+        container_cost = vcpu_cost + memory_cost + request_cost
+
+    else:
+        # Always-on: pay for operating hours (business hours or 24/7)
+        if business_hours_only:
+            # Business hours: ~227.3 hours/month
+            operating_hours = operating_hours_config['business_hours_per_month']
+        else:
+            # Full time: 720 hours/month (30 days × 24 hours)
+            operating_hours = operating_hours_config['full_time_hours_per_month']
+
+        monthly_seconds = operating_hours * 3600  # Convert hours to seconds
+
+        # Active time: during calls (no idle time once calls fill the operating hours)
+        active_seconds = calls_per_month * (minutes_per_call * 60)
+        idle_seconds = monthly_seconds - active_seconds
+        if idle_seconds < 0:
+            idle_seconds = 0
+
+        # Active costs (separate vCPU and memory for breakdown)
+        active_vcpu_cost = min_replicas * active_seconds * container_config['vcpu_per_replica'] * container_config['vcpu_active_per_second']
+        active_memory_cost = min_replicas * active_seconds * container_config['memory_gb_per_replica'] * container_config['memory_gb_active_per_second']
+        active_cost = active_vcpu_cost + active_memory_cost
+
+        # Idle costs (flat rate for both vCPU + memory combined)
+        idle_cost = min_replicas * idle_seconds * container_config['idle_per_second']
+
+        # Calculate separate vcpu and memory costs for breakdown
+        # For idle, we split the flat rate proportionally based on active rates
+        total_active_rate = (container_config['vcpu_per_replica'] * container_config['vcpu_active_per_second']) + \
+                           (container_config['memory_gb_per_replica'] * container_config['memory_gb_active_per_second'])
+        vcpu_active_rate = container_config['vcpu_per_replica'] * container_config['vcpu_active_per_second']
+        memory_active_rate = container_config['memory_gb_per_replica'] * container_config['memory_gb_active_per_second']
+
+        vcpu_idle_portion = (vcpu_active_rate / total_active_rate) if total_active_rate > 0 else 0.5
+        memory_idle_portion = (memory_active_rate / total_active_rate) if total_active_rate > 0 else 0.5
+
+        idle_vcpu_cost = idle_cost * vcpu_idle_portion
+        idle_memory_cost = idle_cost * memory_idle_portion
+
+        vcpu_cost = active_vcpu_cost + idle_vcpu_cost
+        memory_cost = active_memory_cost + idle_memory_cost
+
+        # vCPU and Memory seconds for always-on
+        vcpu_seconds = min_replicas * monthly_seconds
+        gb_seconds = min_replicas * monthly_seconds * container_config['memory_gb_per_replica']
+
+        # Request cost (NEW)
+        # Always-on: health checks + actual requests
+        # Azure does ~1 health check per minute
+        if business_hours_only:
+            health_checks_per_month = operating_hours * 60  # 1 per minute during operating hours
+        else:
+            health_checks_per_month = 30 * 24 * 60  # 43,200/month for 24/7
+
+        actual_requests = calls_per_month * 2
+        requests = health_checks_per_month + actual_requests
+        if requests > container_config['free_requests_per_month']:
+            request_cost = ((requests - container_config['free_requests_per_month']) / 1_000_000) * container_config['requests_per_million']
+        else:
+            request_cost = 0
+
+        container_cost = active_cost + idle_cost + request_cost
+
+    # AI Audio costs (per million tokens, convert to per-minute)
+    tokens_per_minute = audio_conversion['tokens_per_minute_audio']
+    total_audio_tokens = total_minutes * tokens_per_minute
+
+    # Split: use config values (40% customer input, 60% AI output)
+    input_tokens = total_audio_tokens * audio_conversion['input_split']
+    output_tokens = total_audio_tokens * audio_conversion['output_split']
+
+    # Prompt caching: cache hits are billed at the cached input rate
+    cached_audio_tokens = input_tokens * audio_cache_ratio
+    audio_input_cost = ((input_tokens - cached_audio_tokens) / 1_000_000) * model['audio_input_per_m_tokens'] + \
+                       (cached_audio_tokens / 1_000_000) * model['audio_cached_input_per_m_tokens']
+    audio_output_cost = (output_tokens / 1_000_000) * model['audio_output_per_m_tokens']
+
+    # Text reasoning costs (2000 tokens per call)
+    text_tokens = model['tokens_per_call']
+    text_input_tokens = text_tokens * 0.7
+    text_output_tokens = text_tokens * 0.3
+
+    cached_text_tokens = text_input_tokens * text_cache_ratio
+    text_input_cost = calls_per_month * ((text_input_tokens - cached_text_tokens) / 1_000_000) * model['text_input_per_m_tokens'] + \
+                      calls_per_month * (cached_text_tokens / 1_000_000) * model['text_cached_input_per_m_tokens']
+    text_output_cost = calls_per_month * (text_output_tokens / 1_000_000) * model['text_output_per_m_tokens']
+
+    # Total AI cost
+    ai_cost = audio_input_cost + audio_output_cost + text_input_cost + text_output_cost
+
+    # What the cached tokens would have cost at the full input rate
+    cache_savings = (cached_audio_tokens / 1_000_000) * (model['audio_input_per_m_tokens'] - model['audio_cached_input_per_m_tokens']) + \
+                    calls_per_month * (cached_text_tokens / 1_000_000) * (model['text_input_per_m_tokens'] - model['text_cached_input_per_m_tokens'])
+
+    # Total
+    total_cost = phone_cost + acs_call_cost + container_cost + ai_cost
+
+    return VoiceResult(
+        total=total_cost,
+        phone=phone_cost,
+        acs=acs_call_cost,
+        container=container_cost,
+        ai_audio=audio_input_cost + audio_output_cost,
+        ai_text=text_input_cost + text_output_cost,
+        ai_total=ai_cost,
+        cache_savings=cache_savings,
+        calls=calls_per_month,
+        minutes=total_minutes,
+        cost_per_call=total_cost / calls_per_month if calls_per_month > 0 else 0,
+        vcpu_seconds=vcpu_seconds,
+        gb_seconds=gb_seconds,
+        requests=requests,
+        business_hours=business_hours_only,
+        container_vcpu=vcpu_cost,
+        container_memory=memory_cost,
+        container_requests=request_cost,
+        audio_input=audio_input_cost,
+        audio_output=audio_output_cost,
+        text_input=text_input_cost,
+        text_output=text_output_cost
+    )
+
+
+INGESTION_MODES = ('polling', 'push')
+
+
+def push_batch(pricing, emails_per_day, business_hours_only, emails_per_execution=1):
+    """Average emails per push execution and the longest wait of an email for its micro-batch (seconds).
+
+    A micro-batch is flushed when emails_per_execution emails have arrived or
+    max_batch_wait_seconds after it was opened, whichever comes first. At low
+    volume the window closes with fewer emails (at least one) than requested.
+    """
+    if emails_per_execution <= 1:
+        return 1, 0
+    operating_hours = pricing['email_agent']['operating_hours']
+    hours_per_month = operating_hours['business_hours_per_month' if business_hours_only
+                                      else 'full_time_hours_per_month']
+    arrivals_per_second = emails_per_day * 30 / (hours_per_month * 3600)
+    max_wait = pricing['email_agent']['push_ingestion']['max_batch_wait_seconds']
+    batch_size = min(emails_per_execution, max(1, arrivals_per_second * max_wait))
+    if batch_size < emails_per_execution:
+        return batch_size, max_wait
+    return batch_size, min((emails_per_execution - 1) / arrivals_per_second, max_wait)
+
+
+def push_executions(pricing, emails_per_day, business_hours_only, emails_per_execution=1):
+    """Functions executions per month when mail notifications trigger the agent"""
+    push = pricing['email_agent']['push_ingestion']
+    renewals = math.ceil(30 * 24 * 60 / push['subscription_lifetime_minutes'])
+    batch_size, _ = push_batch(pricing, emails_per_day, business_hours_only, emails_per_execution)
+    return math.ceil(emails_per_day * 30 / batch_size) + renewals
+
+
+def calculate_email_cost(pricing, emails_per_day, polling_minutes, model_key, enable_rag, num_pages, business_hours_only,
+                         input_cache_ratio=0.0, ingestion='polling', emails_per_execution=1):
+    """Calculate email agent monthly costs
+
+    input_cache_ratio is the share (0-1) of input tokens (system prompt, RAG
+    context) served from the prompt cache and billed at the cached rate.
+
+    ingestion='push' replaces polling with notification-triggered executions:
+    one per micro-batch of up to emails_per_execution emails (see push_batch)
+    plus subscription renewals (polling_minutes is ignored). 'checks' then
+    counts those executions.
+    """
+    if ingestion not in INGESTION_MODES:
+        raise ValueError(f"unknown ingestion mode '{ingestion}' (expected one of {', '.join(INGESTION_MODES)})")
+
+    # Load pricing
+    functions_config = pricing['email_agent']['azure_functions']
+    model = pricing['email_agent']['models'][model_key]
+    token_config = pricing['email_agent']['tokens']
+    operating_hours = pricing['email_agent']['operating_hours']
+
+    # Volume
+    emails_per_month = emails_per_day * 30
+
+    # Adjust checks for business hours (use config values)
+    if business_hours_only:
+        hours_per_month = operating_hours['business_hours_per_month']
+    else:
+        hours_per_month = operating_hours['full_time_hours_per_month']
+
+    if ingestion == 'push':
+        checks_per_month = push_executions(pricing, emails_per_day, business_hours_only, emails_per_execution)
+    else:
+        checks_per_month = (hours_per_month * 60) / polling_minutes
+
+    # Azure Functions cost
+    # Execution cost
+    if checks_per_month > functions_config['free_executions_per_month']:
+        execution_cost = ((checks_per_month - functions_config['free_executions_per_month']) / 1_000_000) * functions_config['execution_cost_per_million']
+    else:
+        execution_cost = 0
+
+    # Compute cost (3 seconds per check, 0.5 GB memory)
+    execution_seconds = checks_per_month * functions_config['seconds_per_execution']
+    gb_seconds = execution_seconds * functions_config['memory_gb']
+
+    if gb_seconds > functions_config['free_gb_seconds_per_month']:
+        compute_cost = (gb_seconds - functions_config['free_gb_seconds_per_month']) * functions_config['compute_cost_per_gb_second']
+    else:
+        compute_cost = 0
+
+    functions_cost = execution_cost + compute_cost
+
+    # LLM costs (per million tokens, NOT per 1K)
+    if enable_rag:
+        input_tokens_per_email = token_config['base_input_tokens'] + token_config['rag_additional_tokens']
+    else:
+        input_tokens_per_email = token_config['base_input_tokens']
+
+    output_tokens_per_email = token_config['output_tokens']
+
+    total_input_tokens = emails_per_month * input_tokens_per_email
+    total_output_tokens = emails_per_month * output_tokens_per_email
+
+    # Prompt caching: cache hits are billed at the cached input rate
+    cached_input_tokens = total_input_tokens * input_cache_ratio
+    llm_input_cost = ((total_input_tokens - cached_input_tokens) / 1_000_000) * model['input_per_m_tokens'] + \
+                     (cached_input_tokens / 1_000_000) * model['cached_input_per_m_tokens']
+    llm_output_cost = (total_output_tokens / 1_000_000) * model['output_per_m_tokens']
+    llm_cost = llm_input_cost + llm_output_cost
+    cache_savings = (cached_input_tokens / 1_000_000) * (model['input_per_m_tokens'] - model['cached_input_per_m_tokens'])
+
+    # Total (blob storage calculated separately as shared resource)
+    total_cost = functions_cost + llm_cost
+
+    return EmailResult(
+        total=total_cost,
+        functions=functions_cost,
+        llm=llm_cost,
+        emails=emails_per_month,
+        checks=checks_per_month,
+        cost_per_email=total_cost / emails_per_month if emails_per_month > 0 else 0,
+        gb_seconds=gb_seconds,
+        execution_cost=execution_cost,
+        compute_cost=compute_cost,
+        llm_input=llm_input_cost,
+        llm_output=llm_output_cost,
+        cache_savings=cache_savings,
+        business_hours=business_hours_only
+    )
+
+
+def calculate_email_latency(pricing, emails_per_day, polling_minutes, business_hours_only, ingestion='polling',
+                            emails_per_execution=1):
+    """Average and worst-case seconds from an email's arrival to the agent's reply.
+
+    Polling: an email waits for the next check (half an interval on average).
+    Push: notification delay, plus the wait for the micro-batch to be
+    flushed (push_batch, the same batches that are billed).
+    Both add one execution's processing time.
+    """
+    processing = pricing['email_agent']['azure_functions']['seconds_per_execution']
+    if ingestion == 'push':
+        _, worst_wait = push_batch(pricing, emails_per_day, business_hours_only, emails_per_execution)
+        delay = pricing['email_agent']['push_ingestion']['notification_latency_seconds'] + processing
+    else:
+        worst_wait = polling_minutes * 60
+        delay = processing
+    return delay + worst_wait / 2, delay + worst_wait
+
+
+def calculate_combined_totals(voice_results, email_results, blob_results):
+    """Combine voice, email and shared storage results into overall totals"""
+    voice_total = voice_results['total']
+    email_total = email_results['total']
+    blob_total = blob_results['cost']
+    combined_total = voice_total + email_total + blob_total
+
+    total_interactions = voice_results['calls'] + email_results['emails']
+    avg_cost = combined_total / total_interactions if total_interactions > 0 else 0
+
+    return {
+        'voice': voice_total,
+        'email': email_total,
+        'blob': blob_total,
+        'combined': combined_total,
+        'interactions': total_interactions,
+        'avg_cost': avg_cost,
+        'voice_pct': (voice_total / combined_total * 100) if combined_total > 0 else 0,
+        'email_pct': (email_total / combined_total * 100) if combined_total > 0 else 0,
+        'blob_pct': (blob_total / combined_total * 100) if combined_total > 0 else 0
+    }
+
+# ==============================================================================
+# CONFIGURATION EXPORTS
+# ==============================================================================
+
+# Sidebar defaults as an export (same as cost_graph.VOICE_INPUTS / EMAIL_INPUTS)
+DEFAULT_EXPORT = {
+    'voice_agent': {'minutes_per_call': 5, 'calls_per_day': 50, 'model_key': 'gpt_realtime_mini_global',
+                    'phone_numbers': 1, 'min_replicas': 0},
+    'email_agent': {'emails_per_day': 50, 'polling_minutes': 1, 'model_key': 'gpt_5_mini_global',
+                    'rag_enabled': True, 'manual_pages': 5000}
+}
+
+
+def _resolve_model_key(models, section, channel):
+    """Find the model key of an exported agent section (by key, falling back to display name)"""
+    key = section.get('model_key')
+    if key in models:
+        return key
+    for model_key, model in models.items():
+        if model['name'] == section.get('model'):
+            return model_key
+    raise ValueError(f"unknown {channel} model {section.get('model_key') or section.get('model')!r}")
+
+
+def parse_config_export(pricing, export):
+    """Turn a "Download Configuration (JSON)" export back into calculator inputs.
+
+    Returns {'voice': {...}, 'email': {...}} with keys matching the parameters of
+    calculate_voice_cost / calculate_email_cost. Older exports without model keys
+    are resolved through the model display names, and exports without cache
+    ratios assume no prompt caching.
+    """
+    voice = export['voice_agent']
+    email = export['email_agent']
+    enable_rag = bool(email.get('rag_enabled', email.get('manual_pages', 0) > 0))
+
+    return {
+        'voice': {
+            'minutes_per_call': voice['minutes_per_call'],
+            'calls_per_day': voice['calls_per_day'],
+            'model_key': _resolve_model_key(pricing['voice_agent']['models'], voice, 'voice'),
+            'num_phones': voice['phone_numbers'],
+            'min_replicas': voice['min_replicas'],
+            'business_hours_only': bool(voice.get('business_hours_only', False)),
+            'audio_cache_ratio': float(voice.get('audio_cache_ratio', 0.0)),
+            'text_cache_ratio': float(voice.get('text_cache_ratio', 0.0))
+        },
+        'email': {
+            'emails_per_day': email['emails_per_day'],
+            'polling_minutes': email['polling_minutes'],
+            'model_key': _resolve_model_key(pricing['email_agent']['models'], email, 'email'),
+            'enable_rag': enable_rag,
+            'num_pages': email.get('manual_pages', 0) if enable_rag else 0,
+            'business_hours_only': bool(email.get('business_hours_only', False)),
+            'input_cache_ratio': float(email.get('input_cache_ratio', 0.0))
+        }
+    }
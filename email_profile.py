@@ -0,0 +1,463 @@
+"""
+Email length profiles from a local sample corpus.
+
+calculate_email_cost() prices every email at the fixed token counts in
+pricing['email_agent']['tokens']. Real email lengths are heavy-tailed: most
+messages are short, a few long threads carry much of the volume. This module
+streams a sample corpus, estimates each email's tokens, fits a log-normal
+length distribution and prices the email agent at the measured mean length
+(the expected cost, since LLM cost is linear in tokens) and at percentiles.
+
+Sources:
+- an mbox file (optionally gzipped), read one message at a time;
+- a directory of .eml files (searched recursively);
+- a CSV of lengths with a `tokens` or `chars` column per email (optionally
+  `output_tokens` for the replies), read in chunks; empty or non-numeric
+  cells are skipped and counted.
+
+Tokens are estimated from the readable text (subject, text/plain parts or
+tag-stripped HTML; attachments skipped) at CHARS_PER_TOKEN characters per
+token. Memory stays bounded whatever the corpus size: per distribution only
+running log-moments and a fixed log-spaced histogram (100 bins per decade,
+so percentiles are within ~2.3%) are kept.
+
+Profiles are cached in email_profiles/, keyed by the paths, sizes and
+modification times of the source files, so rerunning on an unchanged corpus
+loads the profile instead of re-reading it.
+
+Usage:
+    python email_profile.py profile mail.mbox [--config ai_agent_config.json] [--rebuild]
+    python email_profile.py sample --out sample.mbox [--count 100000]
+"""
+
+import argparse
+import copy
+import email
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import cost_model
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'email_profiles')
+PROFILE_VERSION = 2
+
+CHARS_PER_TOKEN = 4.0
+BINS_PER_DECADE = 100
+HIST_DECADES = 7                     # 1 to 10M tokens
+HIST_BINS = BINS_PER_DECADE * HIST_DECADES
+PERCENTILES = (0.5, 0.9, 0.99)
+
+BATCH_MESSAGES = 2_000
+CHUNK_ROWS = 1_000_000
+MAX_MESSAGE_BYTES = 32 * 1024 * 1024  # longer messages are truncated (attachments)
+
+_TAGS = re.compile(r'<[^>]*>')
+_SPACES = re.compile(r'\s+')
+
+# ==============================================================================
+# STREAMING STATISTICS
+# ==============================================================================
+
+class TokenStats:
+    """Running log-moments and a log-spaced histogram of token counts (bounded memory)"""
+
+    def __init__(self):
+        self.count = 0
+        self.skipped = 0                 # empty or non-numeric cells
+        self.total = 0.0
+        self.max = 0.0
+        # Emails of at least one token (the log-normal fit and the histogram)
+        self.positive = 0
+        self.log_sum = 0.0
+        self.log_sum_sq = 0.0
+        self.histogram = np.zeros(HIST_BINS, dtype=np.int64)
+
+    def add(self, tokens):
+        tokens = np.asarray(tokens, dtype=float)
+        finite = np.isfinite(tokens)
+        if not finite.all():
+            self.skipped += int(tokens.size - finite.sum())
+            tokens = tokens[finite]
+        if not tokens.size:
+            return
+        self.count += tokens.size
+        self.total += float(tokens.sum())
+        self.max = max(self.max, float(tokens.max()))
+        positive = tokens[tokens >= 1]
+        logs = np.log(positive)
+        self.positive += positive.size
+        self.log_sum += float(logs.sum())
+        self.log_sum_sq += float((logs * logs).sum())
+        bins = np.minimum((np.log10(positive) * BINS_PER_DECADE).astype(np.int64), HIST_BINS - 1)
+        self.histogram += np.bincount(bins, minlength=HIST_BINS)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        """Token count at quantile q (0-1), interpolated log-linearly within a histogram bin"""
+        rank = q * self.count
+        zeros = self.count - self.positive
+        if rank <= zeros or not self.positive:
+            return 0.0
+        cumulative = zeros + np.cumsum(self.histogram)
+        i = min(int(np.searchsorted(cumulative, rank)), HIST_BINS - 1)
+        within = (rank - (cumulative[i] - self.histogram[i])) / max(self.histogram[i], 1)
+        return float(min(10 ** ((i + within) / BINS_PER_DECADE), max(self.max, 1.0)))
+
+    def lognormal(self):
+        """Maximum-likelihood log-normal fit of the positive counts and its KS distance to the data"""
+        if not self.positive:
+            return {'mu': 0.0, 'sigma': 0.0, 'mean': 0.0, 'ks': 0.0}
+        mu = self.log_sum / self.positive
+        sigma = math.sqrt(max(self.log_sum_sq / self.positive - mu * mu, 0.0))
+        edges = np.log(10.0) * np.arange(1, HIST_BINS + 1) / BINS_PER_DECADE
+        empirical = np.cumsum(self.histogram) / self.positive
+        if sigma > 0:
+            fitted = np.array([0.5 * (1 + math.erf((edge - mu) / (sigma * math.sqrt(2)))) for edge in edges])
+        else:
+            fitted = (edges >= mu).astype(float)
+        return {
+            'mu': mu,
+            'sigma': sigma,
+            'mean': math.exp(mu + sigma * sigma / 2),
+            'ks': float(np.abs(empirical - fitted).max())
+        }
+
+    def summary(self):
+        return {
+            'emails': self.count,
+            'skipped': self.skipped,
+            'mean': self.mean(),
+            **{f'p{q * 100:g}': self.percentile(q) for q in PERCENTILES},
+            'max': self.max,
+            'lognormal': self.lognormal()
+        }
+
+    def to_dict(self):
+        return {
+            'count': self.count, 'skipped': self.skipped, 'total': self.total, 'max': self.max, 'positive': self.positive,
+            'log_sum': self.log_sum, 'log_sum_sq': self.log_sum_sq,
+            'histogram': self.histogram.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        for key in ('count', 'total', 'max', 'positive', 'log_sum', 'log_sum_sq'):
+            setattr(stats, key, data[key])
+        stats.skipped = data.get('skipped', 0)
+        stats.histogram = np.asarray(data['histogram'], dtype=np.int64)
+        return stats
+
+# ==============================================================================
+# CORPUS READERS
+# ==============================================================================
+
+def text_length(raw):
+    """Characters of readable text in one raw RFC 822 message (attachments skipped)"""
+    message = email.message_from_bytes(raw)
+    plain = html = 0
+    for part in message.walk():
+        if part.is_multipart() or part.get_content_maintype() != 'text':
+            continue
+        if part.get_content_disposition() == 'attachment' or part.get_filename():
+            continue
+        payload = part.get_payload(decode=True) or b''
+        try:
+            text = payload.decode(part.get_content_charset() or 'utf-8', errors='replace')
+        except LookupError:
+            text = payload.decode('latin-1')
+        if part.get_content_subtype() == 'html':
+            html += len(_SPACES.sub(' ', _TAGS.sub(' ', text)).strip())
+        else:
+            plain += len(text)
+    return len(str(message.get('Subject', ''))) + (plain or html)
+
+
+def _batch_tokens(messages, chars_per_token):
+    """Worker: estimated tokens of a batch of raw messages"""
+    return np.array([math.ceil(text_length(raw) / chars_per_token) for raw in messages], dtype=float)
+
+
+def _mbox_messages(path):
+    """Raw messages of an mbox file, one at a time"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        lines, size = [], 0
+        for line in f:
+            if line.startswith(b'From '):
+                if lines:
+                    yield b''.join(lines)
+                lines, size = [], 0
+            elif size < MAX_MESSAGE_BYTES:
+                lines.append(line)
+                size += len(line)
+        if lines:
+            yield b''.join(lines)
+
+
+def _source_files(source):
+    """Files making up a corpus, in a stable order"""
+    if not os.path.isdir(source):
+        return [source]
+    files = []
+    for root, dirs, names in os.walk(source):
+        dirs.sort()
+        files.extend(os.path.join(root, name) for name in sorted(names) if name.lower().endswith('.eml'))
+    return files
+
+
+def _eml_messages(source):
+    for path in _source_files(source):
+        with open(path, 'rb') as f:
+            yield f.read(MAX_MESSAGE_BYTES)
+
+
+def _batches(messages, size=BATCH_MESSAGES):
+    batch = []
+    for raw in messages:
+        batch.append(raw)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _read_messages(messages, stats, chars_per_token, workers):
+    """Stream raw messages through the token estimator (at most two batches in flight per worker)"""
+    if workers <= 1:
+        for batch in _batches(messages):
+            stats.add(_batch_tokens(batch, chars_per_token))
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = set()
+        for batch in _batches(messages):
+            pending.add(pool.submit(_batch_tokens, batch, chars_per_token))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats.add(future.result())
+        for future in pending:
+            stats.add(future.result())
+
+
+def _numeric(column):
+    """Column as floats; empty or non-numeric cells become NaN (skipped by TokenStats.add)"""
+    return pd.to_numeric(column, errors='coerce').to_numpy(dtype=float)
+
+
+def _read_lengths(path, content, output, chars_per_token, chunksize):
+    """Stream a CSV with one row per email (tokens or chars, optionally output_tokens)"""
+    columns = ('tokens', 'chars', 'output_tokens')
+    for chunk in pd.read_csv(path, usecols=lambda c: c in columns, chunksize=chunksize, engine='c'):
+        if 'tokens' in chunk.columns:
+            content.add(_numeric(chunk['tokens']))
+        elif 'chars' in chunk.columns:
+            content.add(np.ceil(_numeric(chunk['chars']) / chars_per_token))
+        else:
+            raise ValueError(f"{path}: expected a 'tokens' or 'chars' column")
+        if 'output_tokens' in chunk.columns:
+            output.add(_numeric(chunk['output_tokens']))
+
+# ==============================================================================
+# PROFILES
+# ==============================================================================
+
+def _is_csv(source):
+    return source.endswith(('.csv', '.csv.gz'))
+
+
+def source_fingerprint(source, chars_per_token=CHARS_PER_TOKEN):
+    """SHA-256 over the corpus files' paths, sizes and modification times and the estimator settings"""
+    h = hashlib.sha256(f'{PROFILE_VERSION}|{chars_per_token}|{os.path.abspath(source)}\n'.encode())
+    for path in _source_files(source):
+        stat = os.stat(path)
+        h.update(f'{os.path.relpath(path, source)}|{stat.st_size}|{stat.st_mtime_ns}\n'.encode())
+    return h.hexdigest()
+
+
+def build_profile(source, chars_per_token=CHARS_PER_TOKEN, workers=None, chunksize=CHUNK_ROWS):
+    """Stream a corpus into a length profile (content tokens, and reply tokens if the CSV has them)"""
+    started = time.perf_counter()
+    content, output = TokenStats(), TokenStats()
+    if _is_csv(source):
+        _read_lengths(source, content, output, chars_per_token, chunksize)
+    else:
+        messages = _eml_messages(source) if os.path.isdir(source) else _mbox_messages(source)
+        _read_messages(messages, content, chars_per_token, workers or os.cpu_count() or 1)
+    return {
+        'version': PROFILE_VERSION,
+        'source': os.path.abspath(source),
+        'fingerprint': source_fingerprint(source, chars_per_token),
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+        'seconds': round(time.perf_counter() - started, 3),
+        'chars_per_token': chars_per_token,
+        'summary': {'content': content.summary(), 'output': output.summary() if output.count else None},
+        'content': content.to_dict(),
+        'output': output.to_dict() if output.count else None
+    }
+
+
+def load_profile(source, chars_per_token=CHARS_PER_TOKEN, workers=None, cache_dir=CACHE_DIR, rebuild=False):
+    """Cached profile of an unchanged corpus, otherwise build and cache it; returns (profile, cached)"""
+    fingerprint = source_fingerprint(source, chars_per_token)
+    path = os.path.join(cache_dir, f'{fingerprint[:16]}.json')
+    if not rebuild and os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f), True
+
+    profile = build_profile(source, chars_per_token, workers)
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = f'{path}.tmp-{os.getpid()}'
+    with open(staging, 'w') as f:
+        json.dump(profile, f)
+    os.replace(staging, path)
+    return profile, False
+
+# ==============================================================================
+# PRICING
+# ==============================================================================
+
+def profiled_pricing(pricing, content_tokens, output_tokens=None):
+    """Copy of the pricing with the email content (and optionally reply) tokens replaced"""
+    profiled = copy.deepcopy(pricing)
+    tokens = profiled['email_agent']['tokens']
+    tokens['base_input_tokens'] = tokens['system_prompt_tokens'] + content_tokens
+    if output_tokens is not None:
+        tokens['output_tokens'] = output_tokens
+    return profiled
+
+
+def cost_table(pricing, profile, email_inputs):
+    """Email agent cost at the configured, mean and percentile email lengths.
+
+    The mean row is the expected monthly cost. A percentile row prices every
+    email at that length (content and reply at the same percentile).
+    """
+    tokens = pricing['email_agent']['tokens']
+    content = TokenStats.from_dict(profile['content'])
+    output = TokenStats.from_dict(profile['output']) if profile['output'] else None
+    rows = [('configured', tokens['base_input_tokens'] - tokens['system_prompt_tokens'], tokens['output_tokens']),
+            ('mean (expected)', content.mean(), output.mean() if output else None)]
+    rows += [(f'p{q * 100:g}', content.percentile(q), output.percentile(q) if output else None) for q in PERCENTILES]
+
+    records = []
+    for label, content_tokens, output_tokens in rows:
+        profiled = profiled_pricing(pricing, content_tokens, output_tokens)
+        result = cost_model.calculate_email_cost(profiled, **email_inputs)
+        used = profiled['email_agent']['tokens']
+        records.append({
+            'Length': label,
+            'Email tokens': round(content_tokens),
+            'Input tokens': round(used['base_input_tokens'] + (used['rag_additional_tokens'] if email_inputs['enable_rag'] else 0)),
+            'Output tokens': round(used['output_tokens']),
+            'LLM/1k emails': 1000 * result.llm / result.emails if result.emails else 0.0,
+            'LLM/month': result.llm,
+            'Total/month': result.total
+        })
+    return pd.DataFrame(records)
+
+# ==============================================================================
+# SAMPLE CORPUS
+# ==============================================================================
+
+def write_sample_mbox(path, count=100_000, median_tokens=300, sigma=1.0, chars_per_token=CHARS_PER_TOKEN, seed=0):
+    """Synthetic mbox with log-normal body lengths (for trying the pipeline)"""
+    rng = np.random.default_rng(seed)
+    words = ['Bestellung', 'Lieferung', 'Rechnung', 'bitte', 'danke', 'order', 'invoice', 'the', 'and', 'status']
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wb') as f:
+        for i, tokens in enumerate(rng.lognormal(math.log(median_tokens), sigma, count)):
+            chars = int(tokens * chars_per_token)
+            body = ' '.join(rng.choice(words, chars // 7 + 1))[:chars]
+            f.write((f"From customer{i}@example.com Mon Jan  6 09:00:00 2025\n"
+                     f"From: customer{i}@example.com\nTo: support@example.com\n"
+                     f"Subject: Anfrage {i}\nContent-Type: text/plain; charset=utf-8\n\n"
+                     f"{body}\n\n").encode())
+    return path
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def _cmd_profile(args):
+    pricing = cost_model.load_pricing(args.pricing)
+    export = cost_model.DEFAULT_EXPORT
+    if args.config:
+        with open(args.config, 'r') as f:
+            export = json.load(f)
+    email_inputs = cost_model.parse_config_export(pricing, export)['email']
+
+    started = time.perf_counter()
+    profile, cached = load_profile(args.source, args.chars_per_token, args.workers, rebuild=args.rebuild)
+    elapsed = time.perf_counter() - started
+
+    content = profile['summary']['content']
+    fit = content['lognormal']
+    if cached:
+        print(f"Loaded cached profile of {profile['source']} ({elapsed:.3f}s, built {profile['built_at']})")
+    else:
+        print(f"Profiled {content['emails']:,} emails from {profile['source']} in {elapsed:.2f}s "
+              f"({content['emails'] / max(elapsed, 1e-9):,.0f} emails/s)")
+    if content['skipped']:
+        print(f"Skipped {content['skipped']:,} rows without a valid length")
+    print(f"Email tokens: mean {content['mean']:,.0f}, " +
+          ', '.join(f"p{q * 100:g} {content[f'p{q * 100:g}']:,.0f}" for q in PERCENTILES) +
+          f", max {content['max']:,.0f}")
+    print(f"Log-normal fit: mu {fit['mu']:.3f}, sigma {fit['sigma']:.3f}, mean {fit['mean']:,.0f} tokens, "
+          f"KS distance {fit['ks']:.3f}")
+    if profile['output']:
+        output = profile['summary']['output']
+        print(f"Reply tokens: mean {output['mean']:,.0f}, p90 {output['p90']:,.0f}, p99 {output['p99']:,.0f}" +
+              (f" ({output['skipped']:,} rows without a valid length skipped)" if output['skipped'] else ''))
+
+    pd.set_option('display.width', 200)
+    print(f"\n{email_inputs['emails_per_day']} emails/day, {email_inputs['model_key']}, "
+          f"RAG {'on' if email_inputs['enable_rag'] else 'off'} (CHF)")
+    print(cost_table(pricing, profile, email_inputs).to_string(index=False, float_format=lambda x: f'{x:,.4f}'))
+
+
+def _cmd_sample(args):
+    path = write_sample_mbox(args.out, args.count, args.median_tokens, args.sigma, seed=args.seed)
+    print(f"Sample mbox with {args.count:,} emails written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Email length profiles from a sample corpus and their cost")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('profile', help="Profile an mbox, .eml directory or CSV of lengths and price it")
+    p.add_argument('source', help="mbox file (.gz ok), directory of .eml files, or CSV with tokens/chars")
+    p.add_argument('--config', help="Configuration export JSON (default: sidebar defaults)")
+    p.add_argument('--chars-per-token', type=float, default=CHARS_PER_TOKEN)
+    p.add_argument('--workers', type=int, help="Parallel message parsers (default: CPU count)")
+    p.add_argument('--rebuild', action='store_true', help="Ignore a cached profile")
+    p.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    p.set_defaults(func=_cmd_profile)
+
+    p = sub.add_parser('sample', help="Write a synthetic mbox with log-normal lengths")
+    p.add_argument('--out', required=True)
+    p.add_argument('--count', type=int, default=100_000)
+    p.add_argument('--median-tokens', type=float, default=300)
+    p.add_argument('--sigma', type=float, default=1.0)
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=_cmd_sample)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
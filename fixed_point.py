@@ -0,0 +1,509 @@
+"""
+Exact fixed-point evaluation of the cost model in integer micro-CHF.
+
+batch_model.py computes in floats. Terms such as `(input_tokens / 1_000_000)
+* rate` carry a small rounding error, and when millions of scenarios are
+summed the errors add up, and the result depends on the summation order. This
+module evaluates the same formulas over int64 arrays:
+
+- rates are compiled once into integer pico-CHF (1e-12 CHF) per billing unit,
+  taken exactly from their decimal value in pricing_config.json;
+- usage is counted in whole billing units (tokens, seconds, executions,
+  requests); fractional quantities are rounded half-even to whole units;
+- every cost component is rounded once, half-even, to micro-CHF (1e-6 CHF);
+- subtotals and totals are integer sums of the rounded components. They add
+  up exactly, and any roll-up gives the same result in any order.
+
+The rounding rule of each component is listed in TECHNICAL_DOCUMENTATION.md
+(section 8.6). Results are int64 micro-CHF; to_chf() / format_chf() convert
+them for display.
+
+Usage:
+    python fixed_point.py bench --count 1000000
+    python fixed_point.py price --config ai_agent_config.json
+"""
+
+import argparse
+import json
+import math
+import time
+from decimal import ROUND_HALF_EVEN, Decimal
+from fractions import Fraction
+
+import numpy as np
+
+import batch_model
+import cost_model
+
+MICRO = 1_000_000            # micro-CHF per CHF (unit of all results)
+PICO_PER_MICRO = 1_000_000   # rates are pico-CHF per billing unit
+BASIS_POINTS = 10_000        # prompt-cache hit ratios are taken to 0.01%
+PER_MILLION = Fraction(1, 1_000_000)
+INT64_MAX = np.iinfo(np.int64).max
+
+# Text reasoning tokens per call: 70% input / 30% output (as in cost_model)
+TEXT_INPUT_SHARE = Fraction(7, 10)
+TEXT_OUTPUT_SHARE = Fraction(3, 10)
+
+# ==============================================================================
+# INTEGER ARITHMETIC
+# ==============================================================================
+
+def _fraction(value):
+    """Exact value of a pricing number as written (0.1 is 1/10, not the nearest double)"""
+    return value if isinstance(value, Fraction) else Fraction(str(value))
+
+
+def _whole(value):
+    """Pricing number rounded half-even to an integer"""
+    return round(_fraction(value))
+
+
+def _pico(*factors):
+    """Product of pricing numbers as integer pico-CHF (half-even below 1 pCHF)"""
+    amount = Fraction(MICRO * PICO_PER_MICRO)
+    for factor in factors:
+        amount *= _fraction(factor)
+    return round(amount)
+
+
+def _round_div(numerator, denominator):
+    """numerator / denominator rounded half-even, in integer arithmetic (denominator > 0)"""
+    # Round half up with one floor division, then move exact halves that
+    # landed on an odd quotient back down (only even denominators have halves)
+    half = denominator // 2
+    quotient = (numerator + half) // denominator
+    if not np.ndim(denominator) and denominator % 2:
+        return quotient
+    tie = (quotient * denominator - numerator == half) & ((quotient & 1) == 1)
+    if np.ndim(denominator):
+        tie &= denominator % 2 == 0
+    return quotient - tie
+
+
+def _scale(quantity, fraction):
+    """Whole units of quantity x fraction (rounded half-even)"""
+    if fraction.denominator == 1:
+        return quantity * fraction.numerator
+    return _round_div(quantity * fraction.numerator, fraction.denominator)
+
+
+def _max_abs(values):
+    return int(np.max(np.abs(values))) if np.size(values) else 0
+
+
+def _amount(*terms, scale=1):
+    """Sum of (quantity, pico-CHF rate) terms, divided by scale and rounded once to micro-CHF"""
+    bound = sum(_max_abs(quantity) * _max_abs(rate) for quantity, rate in terms) + scale * PICO_PER_MICRO
+    if bound > INT64_MAX:
+        raise OverflowError(f"fixed-point amount of up to {bound / scale / MICRO / PICO_PER_MICRO:,.0f} CHF "
+                            "exceeds int64 range")
+    pico = sum(quantity * rate for quantity, rate in terms)
+    return _round_div(pico, scale * PICO_PER_MICRO)
+
+
+def _units(values, name):
+    """Input quantities as int64 (they must be whole numbers)"""
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        whole = np.rint(values)
+        if np.any(whole != values):
+            raise ValueError(f"{name} must be whole numbers for fixed-point evaluation")
+        values = whole
+    return values.astype(np.int64, copy=False)
+
+
+def _basis_points(ratio):
+    return np.rint(np.asarray(ratio, dtype=float) * BASIS_POINTS).astype(np.int64)
+
+# ==============================================================================
+# PRICING COMPILATION
+# ==============================================================================
+
+def _per_token(models, key):
+    return np.array([_pico(m[key], PER_MILLION) for m in models], dtype=np.int64)
+
+
+class FixedPricing:
+    """Pricing compiled into integer pico-CHF rates and exact unit fractions"""
+
+    model_indices = batch_model.CompiledPricing.model_indices
+
+    def __init__(self, pricing):
+        self.version = pricing['version']
+        self.region = pricing['region']
+
+        voice_models = pricing['voice_agent']['models']
+        self.voice_model_keys = list(voice_models)
+        self.voice_index = {key: i for i, key in enumerate(self.voice_model_keys)}
+        models = list(voice_models.values())
+        self.audio_input_rate = _per_token(models, 'audio_input_per_m_tokens')
+        self.audio_cached_rate = _per_token(models, 'audio_cached_input_per_m_tokens')
+        self.audio_output_rate = _per_token(models, 'audio_output_per_m_tokens')
+        self.text_input_rate = _per_token(models, 'text_input_per_m_tokens')
+        self.text_cached_rate = _per_token(models, 'text_cached_input_per_m_tokens')
+        self.text_output_rate = _per_token(models, 'text_output_per_m_tokens')
+        self.tokens_per_call = np.array([_whole(m['tokens_per_call']) for m in models], dtype=np.int64)
+
+        email_models = pricing['email_agent']['models']
+        self.email_model_keys = list(email_models)
+        self.email_index = {key: i for i, key in enumerate(self.email_model_keys)}
+        models = list(email_models.values())
+        self.llm_input_rate = _per_token(models, 'input_per_m_tokens')
+        self.llm_cached_rate = _per_token(models, 'cached_input_per_m_tokens')
+        self.llm_output_rate = _per_token(models, 'output_per_m_tokens')
+
+        acs = pricing['voice_agent']['acs']
+        self.phone_rate = _pico(acs['phone_number_per_month'])
+        self.inbound_rate = _pico(acs['inbound_per_minute'])
+
+        # Container Apps: rates per replica-second; serverless memory is
+        # counted in 1/memory_scale GB-seconds so the free tier stays exact
+        c = pricing['voice_agent']['container_apps']
+        memory_gb = _fraction(c['memory_gb_per_replica'])
+        self.vcpu_rate = _pico(c['vcpu_per_replica'], c['vcpu_active_per_second'])
+        self.memory_rate = _pico(memory_gb, c['memory_gb_active_per_second'])
+        self.idle_rate = _pico(c['idle_per_second'])
+        self.memory_gb_rate = _pico(c['memory_gb_active_per_second'])
+        self.memory_units = memory_gb.numerator
+        self.memory_scale = memory_gb.denominator
+        self.free_vcpu_seconds = _whole(c['free_vcpu_seconds_per_month'])
+        self.free_memory_units = _whole(_fraction(c['free_gb_seconds_per_month']) * memory_gb.denominator)
+        self.free_requests = _whole(c['free_requests_per_month'])
+        self.request_rate = _pico(c['requests_per_million'], PER_MILLION)
+
+        hours = pricing['email_agent']['operating_hours']
+        business_hours = _fraction(hours['business_hours_per_month'])
+        full_time_hours = _fraction(hours['full_time_hours_per_month'])
+        self.business_seconds = _whole(business_hours * 3600)
+        self.full_time_seconds = _whole(full_time_hours * 3600)
+        self.business_health_checks = _whole(business_hours * 60)
+        # Operating minutes as numerators over a common denominator (polling checks)
+        self.minutes_scale = math.lcm((business_hours * 60).denominator, (full_time_hours * 60).denominator)
+        self.business_minutes = int(business_hours * 60 * self.minutes_scale)
+        self.full_time_minutes = int(full_time_hours * 60 * self.minutes_scale)
+
+        audio = pricing['voice_agent']['audio_conversion']
+        self.tokens_per_minute = _fraction(audio['tokens_per_minute_audio'])
+        self.input_split = _fraction(audio['input_split'])
+        self.output_split = _fraction(audio['output_split'])
+
+        f = pricing['email_agent']['azure_functions']
+        gb_seconds = _fraction(f['seconds_per_execution']) * _fraction(f['memory_gb'])
+        self.free_executions = _whole(f['free_executions_per_month'])
+        self.execution_rate = _pico(f['execution_cost_per_million'], PER_MILLION)
+        self.execution_units = gb_seconds.numerator
+        self.execution_scale = gb_seconds.denominator
+        self.free_compute_units = _whole(_fraction(f['free_gb_seconds_per_month']) * gb_seconds.denominator)
+        self.compute_rate = _pico(f['compute_cost_per_gb_second'])
+
+        tokens = pricing['email_agent']['tokens']
+        self.base_input_tokens = _whole(tokens['base_input_tokens'])
+        self.rag_input_tokens = _whole(tokens['base_input_tokens']) + _whole(tokens['rag_additional_tokens'])
+        self.output_tokens = _whole(tokens['output_tokens'])
+
+        # Blob storage: GB per page = mb_per_page / 1024 x index overhead
+        b = pricing['shared']['blob_storage']
+        gb_per_page = _fraction(b['mb_per_page']) / 1024 * _fraction(b['index_overhead_multiplier'])
+        self.page_rate = _pico(b['hot_tier_per_gb_month']) * gb_per_page.numerator
+        self.page_scale = gb_per_page.denominator
+
+
+def compile_fixed_pricing(pricing):
+    return FixedPricing(pricing)
+
+# ==============================================================================
+# VECTORIZED CALCULATORS (int64 micro-CHF)
+# ==============================================================================
+
+def voice_costs_micro(fp, minutes_per_call, calls_per_day, model_index, num_phones, min_replicas, business_hours,
+                      audio_cache_ratio=0.0, text_cache_ratio=0.0):
+    """Voice agent monthly cost components in micro-CHF (same keys as batch_model.voice_costs)"""
+    minutes_per_call = _units(minutes_per_call, 'minutes_per_call')
+    calls_per_day = _units(calls_per_day, 'calls_per_day')
+    num_phones = _units(num_phones, 'num_phones')
+    min_replicas = _units(min_replicas, 'min_replicas')
+    business_hours = np.asarray(business_hours, dtype=bool)
+
+    # Volume
+    calls_per_month = calls_per_day * 30
+    total_minutes = calls_per_month * minutes_per_call
+
+    # ACS
+    phone_cost = _amount((num_phones, fp.phone_rate))
+    acs_call_cost = _amount((total_minutes, fp.inbound_rate))
+
+    # Container time
+    serverless = min_replicas == 0
+    monthly_seconds = np.where(business_hours, fp.business_seconds, fp.full_time_seconds)
+    active_seconds = total_minutes * 60
+    idle_seconds = np.maximum(monthly_seconds - active_seconds, 0)
+
+    # Serverless: free tier on active usage
+    sv_vcpu_cost = _amount((np.maximum(active_seconds - fp.free_vcpu_seconds, 0), fp.vcpu_rate))
+    sv_memory_units = active_seconds * fp.memory_units
+    sv_memory_cost = _amount((np.maximum(sv_memory_units - fp.free_memory_units, 0), fp.memory_gb_rate),
+                             scale=fp.memory_scale)
+
+    # Always-on: active + flat idle rate; idle is split by the vCPU/memory rates
+    # and the memory part takes the remainder, so the parts add up to the whole
+    replica_seconds = min_replicas * active_seconds
+    active_vcpu_cost = _amount((replica_seconds, fp.vcpu_rate))
+    active_memory_cost = _amount((replica_seconds, fp.memory_rate))
+    idle_cost = _amount((min_replicas * idle_seconds, fp.idle_rate))
+    if fp.vcpu_rate + fp.memory_rate > 0:
+        idle_vcpu_cost = _round_div(idle_cost * fp.vcpu_rate, fp.vcpu_rate + fp.memory_rate)
+    else:
+        idle_vcpu_cost = _round_div(idle_cost, 2)
+    idle_memory_cost = idle_cost - idle_vcpu_cost
+
+    vcpu_cost = np.where(serverless, sv_vcpu_cost, active_vcpu_cost + idle_vcpu_cost)
+    memory_cost = np.where(serverless, sv_memory_cost, active_memory_cost + idle_memory_cost)
+    vcpu_seconds = np.where(serverless, active_seconds, min_replicas * monthly_seconds)
+
+    health_checks = np.where(serverless, 0, np.where(business_hours, fp.business_health_checks, 30 * 24 * 60))
+    requests = health_checks + calls_per_month * 2
+    request_cost = _amount((np.maximum(requests - fp.free_requests, 0), fp.request_rate))
+    container_cost = vcpu_cost + memory_cost + request_cost
+
+    # AI audio (whole tokens; the cached share is rounded to whole tokens)
+    total_audio_tokens = _scale(total_minutes, fp.tokens_per_minute)
+    audio_input_tokens = _scale(total_audio_tokens, fp.input_split)
+    audio_output_tokens = _scale(total_audio_tokens, fp.output_split)
+    cached_audio_tokens = _round_div(audio_input_tokens * _basis_points(audio_cache_ratio), BASIS_POINTS)
+    audio_input_cost = _amount((audio_input_tokens - cached_audio_tokens, fp.audio_input_rate[model_index]),
+                               (cached_audio_tokens, fp.audio_cached_rate[model_index]))
+    audio_output_cost = _amount((audio_output_tokens, fp.audio_output_rate[model_index]))
+
+    # AI text reasoning (70% input / 30% output per call, counted per month)
+    tokens_per_call = calls_per_month * fp.tokens_per_call[model_index]
+    text_input_tokens = _scale(tokens_per_call, TEXT_INPUT_SHARE)
+    text_output_tokens = _scale(tokens_per_call, TEXT_OUTPUT_SHARE)
+    cached_text_tokens = _round_div(text_input_tokens * _basis_points(text_cache_ratio), BASIS_POINTS)
+    text_input_cost = _amount((text_input_tokens - cached_text_tokens, fp.text_input_rate[model_index]),
+                              (cached_text_tokens, fp.text_cached_rate[model_index]))
+    text_output_cost = _amount((text_output_tokens, fp.text_output_rate[model_index]))
+
+    ai_cost = audio_input_cost + audio_output_cost + text_input_cost + text_output_cost
+    cache_savings = _amount(
+        (cached_audio_tokens, fp.audio_input_rate[model_index] - fp.audio_cached_rate[model_index]),
+        (cached_text_tokens, fp.text_input_rate[model_index] - fp.text_cached_rate[model_index])
+    )
+
+    return {
+        'phone': phone_cost,
+        'acs': acs_call_cost,
+        'container_vcpu': vcpu_cost,
+        'container_memory': memory_cost,
+        'container_requests': request_cost,
+        'container': container_cost,
+        'audio_input': audio_input_cost,
+        'audio_output': audio_output_cost,
+        'text_input': text_input_cost,
+        'text_output': text_output_cost,
+        'ai_audio': audio_input_cost + audio_output_cost,
+        'ai_text': text_input_cost + text_output_cost,
+        'ai_total': ai_cost,
+        'cache_savings': cache_savings,
+        'total': phone_cost + acs_call_cost + container_cost + ai_cost,
+        'calls': calls_per_month,
+        'minutes': total_minutes,
+        'vcpu_seconds': vcpu_seconds,
+        'requests': requests
+    }
+
+
+def email_costs_micro(fp, emails_per_day, polling_minutes, model_index, enable_rag, business_hours,
+                      input_cache_ratio=0.0):
+    """Email agent monthly cost components in micro-CHF (same keys as batch_model.email_costs)"""
+    emails_per_day = _units(emails_per_day, 'emails_per_day')
+    polling_minutes = _units(polling_minutes, 'polling_minutes')
+    enable_rag = np.asarray(enable_rag, dtype=bool)
+    business_hours = np.asarray(business_hours, dtype=bool)
+
+    emails_per_month = emails_per_day * 30
+    operating_minutes = np.where(business_hours, fp.business_minutes, fp.full_time_minutes)
+    checks_per_month = _round_div(operating_minutes, fp.minutes_scale * polling_minutes)
+
+    # Azure Functions (whole executions; GB-seconds in 1/execution_scale units)
+    execution_cost = _amount((np.maximum(checks_per_month - fp.free_executions, 0), fp.execution_rate))
+    compute_units = checks_per_month * fp.execution_units
+    compute_cost = _amount((np.maximum(compute_units - fp.free_compute_units, 0), fp.compute_rate),
+                           scale=fp.execution_scale)
+    functions_cost = execution_cost + compute_cost
+
+    # LLM
+    total_input_tokens = emails_per_month * np.where(enable_rag, fp.rag_input_tokens, fp.base_input_tokens)
+    cached_input_tokens = _round_div(total_input_tokens * _basis_points(input_cache_ratio), BASIS_POINTS)
+    llm_input_cost = _amount((total_input_tokens - cached_input_tokens, fp.llm_input_rate[model_index]),
+                             (cached_input_tokens, fp.llm_cached_rate[model_index]))
+    llm_output_cost = _amount((emails_per_month * fp.output_tokens, fp.llm_output_rate[model_index]))
+    llm_cost = llm_input_cost + llm_output_cost
+    cache_savings = _amount((cached_input_tokens, fp.llm_input_rate[model_index] - fp.llm_cached_rate[model_index]))
+
+    return {
+        'execution_cost': execution_cost,
+        'compute_cost': compute_cost,
+        'functions': functions_cost,
+        'llm_input': llm_input_cost,
+        'llm_output': llm_output_cost,
+        'llm': llm_cost,
+        'cache_savings': cache_savings,
+        'total': functions_cost + llm_cost,
+        'emails': emails_per_month,
+        'checks': checks_per_month
+    }
+
+
+def blob_costs_micro(fp, num_pages, enable_rag):
+    """Shared blob storage cost in micro-CHF"""
+    num_pages = _units(num_pages, 'num_pages')
+    enable_rag = np.asarray(enable_rag, dtype=bool)
+    stored_pages = np.where(enable_rag, num_pages, 0)
+    return {'cost': _amount((stored_pages, fp.page_rate), scale=fp.page_scale), 'pages': stored_pages}
+
+
+def evaluate_scenarios_micro(fp, table):
+    """Evaluate a scenario table; returns {component: int64 micro-CHF array} for batch_model.COMPONENTS"""
+    optional = batch_model._optional
+    voice = voice_costs_micro(
+        fp,
+        table['voice_minutes_per_call'], table['voice_calls_per_day'],
+        fp.model_indices(table['voice_model_key'], 'voice'),
+        table['voice_num_phones'], table['voice_min_replicas'], table['voice_business_hours'],
+        optional(table, 'voice_audio_cache_ratio'), optional(table, 'voice_text_cache_ratio')
+    )
+    email = email_costs_micro(
+        fp,
+        table['email_emails_per_day'], table['email_polling_minutes'],
+        fp.model_indices(table['email_model_key'], 'email'),
+        table['email_enable_rag'], table['email_business_hours'],
+        optional(table, 'email_input_cache_ratio')
+    )
+    blob = blob_costs_micro(fp, table['email_num_pages'], table['email_enable_rag'])
+    return batch_model.scenario_components(voice, email, blob)
+
+
+def voice_total_micro(fp, voice):
+    """Voice monthly total of one configuration (calculate_voice_cost inputs) in micro-CHF"""
+    return int(voice_costs_micro(
+        fp, voice['minutes_per_call'], voice['calls_per_day'], fp.voice_index[voice['model_key']],
+        voice['num_phones'], voice['min_replicas'], voice.get('business_hours_only', False),
+        voice.get('audio_cache_ratio', 0.0), voice.get('text_cache_ratio', 0.0)
+    )['total'])
+
+
+def email_total_micro(fp, email):
+    """Email monthly total of one configuration (calculate_email_cost inputs) in micro-CHF"""
+    return int(email_costs_micro(
+        fp, email['emails_per_day'], email['polling_minutes'], fp.email_index[email['model_key']],
+        email['enable_rag'], email['business_hours_only'], email.get('input_cache_ratio', 0.0)
+    )['total'])
+
+
+def blob_cost_micro(fp, email):
+    """Blob storage cost of one configuration (calculate_email_cost inputs) in micro-CHF"""
+    return int(blob_costs_micro(fp, email['num_pages'], email['enable_rag'])['cost'])
+
+
+def price_inputs(fp, inputs):
+    """Exact monthly cost of one configuration (cost_model.parse_config_export inputs).
+
+    Returns {'voice', 'email', 'shared'} in micro-CHF.
+    """
+    return {
+        'voice': voice_total_micro(fp, inputs['voice']),
+        'email': email_total_micro(fp, inputs['email']),
+        'shared': blob_cost_micro(fp, inputs['email'])
+    }
+
+# ==============================================================================
+# CONVERSION
+# ==============================================================================
+
+def to_chf(micro):
+    """micro-CHF -> float CHF (for display and plotting only)"""
+    return np.asarray(micro) / MICRO
+
+
+def format_chf(micro, decimals=2):
+    """Exact decimal string of a micro-CHF amount, rounded half-even to `decimals` places"""
+    value = Decimal(int(micro)).scaleb(-6).quantize(Decimal(1).scaleb(-decimals), rounding=ROUND_HALF_EVEN)
+    return f"{value:,.{decimals}f}"
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def _best_time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _cmd_bench(args):
+    pricing = cost_model.load_pricing(args.pricing)
+    cp = batch_model.compile_pricing(pricing)
+    fp = compile_fixed_pricing(pricing)
+    table = batch_model.random_scenarios(pricing, args.count, args.seed)
+
+    float_time, floats = _best_time(lambda: batch_model.evaluate_scenarios(cp, table), args.repeat)
+    fixed_time, fixed = _best_time(lambda: evaluate_scenarios_micro(fp, table), args.repeat)
+    print(f"{args.count:,} scenarios, best of {args.repeat}:")
+    print(f"  float64        {float_time:.3f}s")
+    print(f"  int64 micro    {fixed_time:.3f}s ({fixed_time / float_time:.2f}x)")
+
+    totals = floats['combined_total']
+    exact = fixed['combined_total']
+    order = np.random.default_rng(args.seed + 1).permutation(args.count)
+    float_sums = [float(np.sum(totals)), float(np.sum(totals[order])), sum(totals.tolist())]
+    fixed_sums = [int(np.sum(exact)), int(np.sum(exact[order])), sum(exact.tolist())]
+    print("\nCombined total over all scenarios (pairwise sum, shuffled pairwise sum, sequential sum):")
+    print("  float64        " + " / ".join(f"{s:,.6f}" for s in float_sums)
+          + f"  (spread {max(float_sums) - min(float_sums):.3g} CHF, "
+            f"{max(abs(s - math.fsum(totals)) for s in float_sums):.3g} CHF from the exact sum of the floats)")
+    print("  int64 micro    " + " / ".join(format_chf(s, 6) for s in fixed_sums)
+          + f"  ({'identical' if len(set(fixed_sums)) == 1 else 'DIFFERENT'})")
+
+    print("\nPer-scenario difference, fixed - float (whole billing units, micro-CHF rounding):")
+    for component in batch_model.COMPONENTS:
+        diff = to_chf(fixed[component]) - floats[component]
+        print(f"  {component:<26} max |diff| {np.max(np.abs(diff)):>12.6f} CHF   "
+              f"sum {np.sum(diff):>+14.6f} CHF")
+
+
+def _cmd_price(args):
+    pricing = cost_model.load_pricing(args.pricing)
+    fp = compile_fixed_pricing(pricing)
+    with open(args.config, 'r') as f:
+        inputs = cost_model.parse_config_export(pricing, json.load(f))
+    costs = price_inputs(fp, inputs)
+    for channel, micro in costs.items():
+        print(f"  {channel:<8} CHF {format_chf(micro, 6):>18}")
+    print(f"  {'total':<8} CHF {format_chf(sum(costs.values()), 6):>18}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact fixed-point (micro-CHF) cost evaluation")
+    parser.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('bench', help="Compare the float and fixed-point modes (speed and drift)")
+    p.add_argument('--count', type=int, default=1_000_000)
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=_cmd_bench)
+
+    p = sub.add_parser('price', help="Exact monthly cost of one configuration export")
+    p.add_argument('--config', required=True, help="Configuration export JSON")
+    p.set_defaults(func=_cmd_price)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Load test for the local quoting API (quote_server.py).
+
+Opens N keep-alive connections and fires requests as fast as the server
+answers, then reports requests/sec and latency percentiles. By default an
+in-process server is started on a free port so the test runs fully offline.
+
+Usage:
+    python loadtest_quote_server.py                      # in-process server
+    python loadtest_quote_server.py --url http://127.0.0.1:8765 --connections 32
+    python loadtest_quote_server.py --endpoint batch --batch-size 100
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+import cost_model
+import quote_server
+
+POLLING_OPTIONS = [1, 2, 5, 10, 15, 30, 60]
+
+
+def random_scenario(rng, pricing, kind):
+    """Random scenario drawn from the sidebar input domain"""
+    voice = {
+        'minutes_per_call': rng.randint(1, 30),
+        'calls_per_day': rng.randrange(1, 501, 5),
+        'model': rng.choice(list(pricing['voice_agent']['models'])),
+        'num_phones': rng.randint(1, 20),
+        'min_replicas': rng.randint(0, 10),
+        'business_hours_only': rng.random() < 0.5
+    }
+    email = {
+        'emails_per_day': rng.randrange(1, 1001, 5),
+        'polling_minutes': rng.choice(POLLING_OPTIONS),
+        'model': rng.choice(list(pricing['email_agent']['models'])),
+        'enable_rag': rng.random() < 0.8,
+        'num_pages': rng.randrange(0, 50001, 100),
+        'business_hours_only': rng.random() < 0.5
+    }
+    if kind == 'voice':
+        return voice
+    if kind == 'email':
+        return email
+    return {'voice': voice, 'email': email}
+
+
+def build_bodies(pricing, endpoint, count, batch_size, seed):
+    rng = random.Random(seed)
+    bodies = []
+    for _ in range(count):
+        if endpoint == 'batch':
+            scenarios = []
+            for _ in range(batch_size):
+                kind = rng.choice(['voice', 'email', 'combined'])
+                scenarios.append(dict(random_scenario(rng, pricing, kind), type=kind))
+            payload = {'scenarios': scenarios}
+        else:
+            payload = random_scenario(rng, pricing, endpoint)
+        bodies.append(json.dumps(payload).encode())
+    return bodies
+
+
+async def _worker(host, port, path, bodies, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            request = (
+                f"POST {path} HTTP/1.1\r\n"
+                f"Host: {host}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "\r\n"
+            ).encode('latin-1') + body
+
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+
+            if b' 200 ' not in status_line:
+                errors.append(status_line.decode('latin-1').strip())
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(args):
+    pricing = cost_model.load_pricing(args.pricing)
+    path = f"/quote/{args.endpoint}"
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        service = quote_server.QuoteService(args.pricing)
+        server = await quote_server.start_server(service, '127.0.0.1', 0)
+        host, port = server.sockets[0].getsockname()[:2]
+
+    # Draw from a limited pool of distinct scenarios so repeated inputs
+    # exercise the response cache like real CRM traffic would
+    pool = build_bodies(pricing, args.endpoint, args.distinct, args.batch_size, args.seed)
+    rng = random.Random(args.seed + 1)
+    per_connection = args.requests // args.connections
+    plans = [[rng.choice(pool) for _ in range(per_connection)] for _ in range(args.connections)]
+
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _worker(host, port, path, plan, latencies, errors) for plan in plans
+    ))
+    elapsed = time.perf_counter() - started
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+    latencies.sort()
+    total = len(latencies)
+    scenarios = total * (args.batch_size if args.endpoint == 'batch' else 1)
+    print(f"Endpoint:      {path}")
+    print(f"Connections:   {args.connections} (keep-alive)")
+    print(f"Requests:      {total:,} in {elapsed:.2f}s ({len(errors)} errors)")
+    print(f"Throughput:    {total / elapsed:,.0f} requests/sec, {scenarios / elapsed:,.0f} scenarios/sec")
+    print(f"Latency p50:   {percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"Latency p99:   {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"Latency max:   {latencies[-1] * 1000 if latencies else 0:.2f} ms")
+    if errors:
+        print(f"First error:   {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the local quoting API")
+    parser.add_argument('--url', help="Target server (default: start one in-process)")
+    parser.add_argument('--endpoint', choices=['voice', 'email', 'combined', 'batch'], default='combined')
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--batch-size', type=int, default=50, help="Scenarios per batch request")
+    parser.add_argument('--distinct', type=int, default=1_000, help="Distinct request bodies to cycle through")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
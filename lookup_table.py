@@ -0,0 +1,453 @@
+"""
+Precomputed cost tables covering the whole sidebar input domain.
+
+Every sidebar input is bounded and discrete, so all voice and email results
+can be computed ahead of time. The cost model separates into a few small
+tables (each cost component only depends on some inputs), e.g. the container
+cost only on minutes, calls, replicas and business hours, and the AI cost only
+on model, minutes and calls. A lookup is a handful of array indexes, and the
+totals are added in the same order as in cost_model.py, so results are
+identical to the calculators.
+
+Tables are built with batch_model, saved as .npy files under
+lookup_tables/<pricing sha256>-v<TABLE_VERSION>/ and memory-mapped when
+loaded. A new pricing config (or formula change) gets its own tables. Other
+processes may map the tables of other configs, so a build only removes table
+sets that have not been loaded for STALE_AFTER_DAYS. Inputs outside the
+domain, and non-zero prompt-cache ratios, are not covered: lookups return
+None and callers fall back to the calculators.
+
+Usage:
+    python lookup_table.py build [--pricing pricing_config.json]
+    python lookup_table.py status
+    python lookup_table.py bench --count 100000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+import batch_model
+import cost_model
+from pricing_store import pricing_fingerprint
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lookup_tables')
+
+# Bumped when the cost formulas change, so tables built by older formulas are rebuilt
+TABLE_VERSION = 2
+
+# Input domain (sidebar ranges; calls and emails cover every integer, not only the slider steps)
+MINUTES = (1, 30)
+CALLS = (1, 500)
+PHONES = (1, 20)
+REPLICAS = (0, 10)
+EMAILS = (1, 1000)
+PAGES = (0, 50_000, 100)
+
+# table name -> (axes, fields); every table is float64 shaped axes + (len(fields),)
+TABLES = {
+    'voice_phone': (('num_phones',), ('phone',)),
+    'voice_acs': (('minutes_per_call', 'calls_per_day'), ('acs',)),
+    'voice_container': (
+        ('minutes_per_call', 'calls_per_day', 'min_replicas', 'business_hours'),
+        ('container_vcpu', 'container_memory', 'container_requests', 'container',
+         'vcpu_seconds', 'gb_seconds', 'requests')
+    ),
+    'voice_ai': (
+        ('model', 'minutes_per_call', 'calls_per_day'),
+        ('audio_input', 'audio_output', 'text_input', 'text_output', 'ai_audio', 'ai_text', 'ai_total')
+    ),
+    'email_functions': (
+        ('polling_minutes', 'business_hours'),
+        ('execution_cost', 'compute_cost', 'functions', 'checks', 'gb_seconds')
+    ),
+    'email_llm': (('model', 'enable_rag', 'emails_per_day'), ('llm_input', 'llm_output', 'llm')),
+    'blob': (('num_pages',), ('cost', 'storage_gb'))
+}
+
+
+def _span(bounds):
+    low, high = bounds[:2]
+    step = bounds[2] if len(bounds) > 2 else 1
+    return np.arange(low, high + 1, step)
+
+
+def _positions(bounds):
+    """{input value: position in its axis} (a dict lookup doubles as the domain check)"""
+    return {int(value): i for i, value in enumerate(_span(bounds))}
+
+# ==============================================================================
+# BUILDING
+# ==============================================================================
+
+def _stack(results, fields):
+    return np.stack([np.asarray(results[field], dtype=np.float64) for field in fields], axis=-1)
+
+
+def build_tables(pricing):
+    """All lookup tables for a pricing config, as {name: array}"""
+    cp = batch_model.compile_pricing(pricing)
+    minutes, calls, phones = _span(MINUTES), _span(CALLS), _span(PHONES)
+    replicas, hours = _span(REPLICAS), np.array([False, True])
+    voice_models = np.arange(len(cp.voice_model_keys))
+    email_models = np.arange(len(cp.email_model_keys))
+    polling = np.array(batch_model.POLLING_OPTIONS)
+    emails, rag = _span(EMAILS), np.array([False, True])
+    tables = {}
+
+    m, c, r, h = np.meshgrid(minutes, calls, replicas, hours, indexing='ij')
+    voice = batch_model.voice_costs(cp, m, c, 0, 1, r, h)
+    tables['voice_container'] = _stack(voice, TABLES['voice_container'][1])
+    tables['voice_acs'] = _stack(voice, TABLES['voice_acs'][1])[:, :, 0, 0]
+
+    k, m, c = np.meshgrid(voice_models, minutes, calls, indexing='ij')
+    tables['voice_ai'] = _stack(batch_model.voice_costs(cp, m, c, k, 1, 0, False), TABLES['voice_ai'][1])
+    tables['voice_phone'] = _stack(batch_model.voice_costs(cp, 1, 1, 0, phones, 0, False), ('phone',))
+
+    p, h = np.meshgrid(polling, hours, indexing='ij')
+    tables['email_functions'] = _stack(batch_model.email_costs(cp, 1, p, 0, False, h), TABLES['email_functions'][1])
+    k, g, e = np.meshgrid(email_models, rag, emails, indexing='ij')
+    tables['email_llm'] = _stack(batch_model.email_costs(cp, e, 1, k, g, False), TABLES['email_llm'][1])
+    tables['blob'] = _stack(batch_model.blob_costs(cp, _span(PAGES), True), TABLES['blob'][1])
+    return tables
+
+
+# Table sets of other pricing configs not loaded for this long are removed by build()
+STALE_AFTER_DAYS = 7
+
+
+def table_dir(pricing, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f'{pricing_fingerprint(pricing)[:16]}-v{TABLE_VERSION}')
+
+
+def build(pricing, cache_dir=CACHE_DIR):
+    """Build and save the tables for a pricing config; returns their directory"""
+    target = table_dir(pricing, cache_dir)
+    staging = f"{target}.tmp-{os.getpid()}-{threading.get_ident()}"
+    os.makedirs(staging, exist_ok=True)
+    try:
+        for name, array in build_tables(pricing).items():
+            np.save(os.path.join(staging, f'{name}.npy'), array)
+        meta = {
+            'sha256': pricing_fingerprint(pricing),
+            'table_version': TABLE_VERSION,
+            'version': pricing['version'],
+            'last_updated': pricing['last_updated'],
+            'built_at': datetime.now().isoformat(timespec='seconds'),
+            'voice_models': list(pricing['voice_agent']['models']),
+            'email_models': list(pricing['email_agent']['models']),
+            'polling_options': batch_model.POLLING_OPTIONS
+        }
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+        if os.path.isdir(target):
+            # Built concurrently by another process; keep theirs
+            shutil.rmtree(staging)
+        else:
+            os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    remove_stale(cache_dir, keep=target)
+    return target
+
+
+def _last_used(directory):
+    """Last load (or build) of a table set: mtime of its meta.json, touched by load()"""
+    for name in ('meta.json', ''):
+        try:
+            return os.path.getmtime(os.path.join(directory, name))
+        except OSError:
+            continue
+    return None
+
+
+def remove_stale(cache_dir=CACHE_DIR, keep=None, max_age_days=STALE_AFTER_DAYS):
+    """Remove table sets (and abandoned staging directories) not used for max_age_days.
+
+    Tables in use by another process (a dashboard on another pricing version)
+    are touched on every load and stay. Returns the removed directories.
+    """
+    cutoff = time.time() - max_age_days * 86400
+    removed = []
+    for entry in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, entry)
+        if path == keep or not os.path.isdir(path):
+            continue
+        last_used = _last_used(path)
+        if last_used is not None and last_used < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path)
+    return removed
+
+# ==============================================================================
+# LOOKUPS
+# ==============================================================================
+
+class LookupTable:
+    """Memory-mapped tables for one pricing config"""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+        self.directory = directory
+        self.voice_index = {key: i for i, key in enumerate(self.meta['voice_models'])}
+        self.email_index = {key: i for i, key in enumerate(self.meta['email_models'])}
+        self.polling_index = {minutes: i for i, minutes in enumerate(self.meta['polling_options'])}
+        self._minutes, self._calls_index = _positions(MINUTES), _positions(CALLS)
+        self._phones, self._replicas_index = _positions(PHONES), _positions(REPLICAS)
+        self._emails_index, self._pages = _positions(EMAILS), _positions(PAGES)
+        # Plain ndarray views of the memory maps (indexing a np.memmap is several times slower)
+        self.tables = {name: np.asarray(np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r'))
+                       for name in TABLES}
+        # Flat float views for single-result lookups (slicing a memoryview is cheaper than ndarray indexing)
+        self._flat = {name: memoryview(array.reshape(-1)) for name, array in self.tables.items()}
+        self._calls = self.tables['voice_acs'].shape[1]
+        self._emails = self.tables['email_llm'].shape[2]
+        self._replicas = self.tables['voice_container'].shape[2]
+
+    def nbytes(self):
+        return sum(array.nbytes for array in self.tables.values())
+
+    def voice(self, minutes_per_call, calls_per_day, model_key, num_phones, min_replicas, business_hours_only=False,
+              audio_cache_ratio=0.0, text_cache_ratio=0.0):
+        """Same result as cost_model.calculate_voice_cost, or None outside the table domain"""
+        m, c = self._minutes.get(minutes_per_call), self._calls_index.get(calls_per_day)
+        p, r = self._phones.get(num_phones), self._replicas_index.get(min_replicas)
+        k = self.voice_index.get(model_key)
+        if None in (m, c, p, r, k) or audio_cache_ratio or text_cache_ratio:
+            return None
+
+        usage = m * self._calls + c
+        phone_cost = self._flat['voice_phone'][p]
+        acs_cost = self._flat['voice_acs'][usage]
+        row = ((usage * self._replicas + r) * 2 + bool(business_hours_only)) * 7
+        vcpu, memory, request_cost, container, vcpu_seconds, gb_seconds, requests = \
+            self._flat['voice_container'][row:row + 7].tolist()
+        row = (k * len(self.tables['voice_acs']) * self._calls + usage) * 7
+        audio_input, audio_output, text_input, text_output, ai_audio, ai_text, ai_total = \
+            self._flat['voice_ai'][row:row + 7].tolist()
+
+        calls_per_month = calls_per_day * 30
+        total = phone_cost + acs_cost + container + ai_total
+        return cost_model.VoiceResult(
+            total=total,
+            phone=phone_cost,
+            acs=acs_cost,
+            container=container,
+            ai_audio=ai_audio,
+            ai_text=ai_text,
+            ai_total=ai_total,
+            cache_savings=0.0,
+            calls=calls_per_month,
+            minutes=calls_per_month * minutes_per_call,
+            cost_per_call=total / calls_per_month if calls_per_month > 0 else 0,
+            vcpu_seconds=vcpu_seconds,
+            gb_seconds=gb_seconds,
+            requests=requests,
+            business_hours=business_hours_only,
+            container_vcpu=vcpu,
+            container_memory=memory,
+            container_requests=request_cost,
+            audio_input=audio_input,
+            audio_output=audio_output,
+            text_input=text_input,
+            text_output=text_output
+        )
+
+    def email(self, emails_per_day, polling_minutes, model_key, enable_rag, num_pages, business_hours_only,
+              input_cache_ratio=0.0):
+        """Same result as cost_model.calculate_email_cost, or None outside the table domain"""
+        e = self._emails_index.get(emails_per_day)
+        p = self.polling_index.get(polling_minutes)
+        k = self.email_index.get(model_key)
+        if None in (e, p, k) or input_cache_ratio:
+            return None
+
+        row = (p * 2 + bool(business_hours_only)) * 5
+        execution_cost, compute_cost, functions, checks, gb_seconds = self._flat['email_functions'][row:row + 5].tolist()
+        row = ((k * 2 + bool(enable_rag)) * self._emails + e) * 3
+        llm_input, llm_output, llm = self._flat['email_llm'][row:row + 3].tolist()
+
+        emails_per_month = emails_per_day * 30
+        total = functions + llm
+        return cost_model.EmailResult(
+            total=total,
+            functions=functions,
+            llm=llm,
+            emails=emails_per_month,
+            checks=checks,
+            cost_per_email=total / emails_per_month if emails_per_month > 0 else 0,
+            gb_seconds=gb_seconds,
+            execution_cost=execution_cost,
+            compute_cost=compute_cost,
+            llm_input=llm_input,
+            llm_output=llm_output,
+            cache_savings=0.0,
+            business_hours=business_hours_only
+        )
+
+    def blob(self, num_pages, enable_rag):
+        """Same result as cost_model.calculate_blob_storage_cost, or None outside the table domain"""
+        if not enable_rag or num_pages == 0:
+            return cost_model.BlobResult(cost=0, storage_gb=0)
+        i = self._pages.get(num_pages)
+        if i is None:
+            return None
+        cost, storage_gb = self._flat['blob'][i * 2:i * 2 + 2].tolist()
+        return cost_model.BlobResult(cost=cost, storage_gb=storage_gb)
+
+
+def load(pricing, cache_dir=CACHE_DIR):
+    """Memory-map the tables of a pricing config, or None if they have not been built"""
+    directory = table_dir(pricing, cache_dir)
+    meta = os.path.join(directory, 'meta.json')
+    if not os.path.exists(meta):
+        return None
+    try:
+        os.utime(meta)   # last use, see remove_stale
+    except OSError:
+        pass
+    return LookupTable(directory)
+
+
+class BackgroundTable:
+    """Tables for a pricing config, built in a background thread if missing.
+
+    Until the tables are ready every lookup returns None (callers use the
+    calculators meanwhile).
+    """
+
+    def __init__(self, pricing, cache_dir=CACHE_DIR):
+        self.table = load(pricing, cache_dir)
+        self.error = None
+        self._thread = None
+        if self.table is None:
+            self._thread = threading.Thread(target=self._build, args=(pricing, cache_dir), daemon=True)
+            self._thread.start()
+
+    def _build(self, pricing, cache_dir):
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.table = LookupTable(build(pricing, cache_dir))
+        except Exception as exc:  # reported by callers instead of ending the thread silently
+            self.error = f'{type(exc).__name__}: {exc}'
+
+    @property
+    def ready(self):
+        return self.table is not None
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def voice(self, *args, **kwargs):
+        return self.table.voice(*args, **kwargs) if self.table is not None else None
+
+    def email(self, *args, **kwargs):
+        return self.table.email(*args, **kwargs) if self.table is not None else None
+
+    def blob(self, *args, **kwargs):
+        return self.table.blob(*args, **kwargs) if self.table is not None else None
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def _cmd_build(args):
+    pricing = cost_model.load_pricing(args.pricing)
+    os.makedirs(args.cache_dir, exist_ok=True)
+    started = time.perf_counter()
+    table = LookupTable(build(pricing, args.cache_dir))
+    print(f"Built tables for pricing {pricing['version']} in {time.perf_counter() - started:.2f}s: "
+          f"{table.directory} ({table.nbytes() / 1e6:.1f} MB)")
+
+
+def _cmd_status(args):
+    pricing = cost_model.load_pricing(args.pricing)
+    table = load(pricing, args.cache_dir)
+    if table is None:
+        print(f"No tables for pricing {pricing['version']} ({pricing_fingerprint(pricing)[:16]}); run 'build'")
+        return
+    for name, array in table.tables.items():
+        axes, fields = TABLES[name]
+        print(f"  {name:<16} {' x '.join(map(str, array.shape[:-1])):<18} {len(fields)} field(s)  "
+              f"{array.nbytes / 1e6:>6.2f} MB  ({', '.join(axes)})")
+    print(f"Pricing {table.meta['version']} built {table.meta['built_at']}: {table.nbytes() / 1e6:.1f} MB")
+
+
+def _cmd_bench(args):
+    """Random in-domain lookups against the calculators (timing and exact agreement)"""
+    pricing = cost_model.load_pricing(args.pricing)
+    table = load(pricing, args.cache_dir)
+    if table is None:
+        os.makedirs(args.cache_dir, exist_ok=True)
+        table = LookupTable(build(pricing, args.cache_dir))
+
+    rng = np.random.default_rng(args.seed)
+    n = args.count
+    voice_keys, email_keys = table.meta['voice_models'], table.meta['email_models']
+    voice_inputs = [
+        (int(m), int(c), voice_keys[k], int(p), int(r), bool(h))
+        for m, c, k, p, r, h in zip(rng.integers(1, 31, n), rng.integers(1, 501, n),
+                                    rng.integers(0, len(voice_keys), n), rng.integers(1, 21, n),
+                                    rng.integers(0, 11, n), rng.random(n) < 0.5)
+    ]
+    email_inputs = [
+        (int(e), int(batch_model.POLLING_OPTIONS[p]), email_keys[k], bool(g), int(pages) if g else 0, bool(h))
+        for e, p, k, g, pages, h in zip(rng.integers(1, 1001, n), rng.integers(0, 7, n),
+                                        rng.integers(0, len(email_keys), n), rng.random(n) < 0.8,
+                                        rng.integers(0, 501, n) * 100, rng.random(n) < 0.5)
+    ]
+
+    timings = {}
+    for name, voice_fn, email_fn in (
+        ('calculators', lambda *a: cost_model.calculate_voice_cost(pricing, *a),
+         lambda *a: cost_model.calculate_email_cost(pricing, *a)),
+        ('lookup table', table.voice, table.email)
+    ):
+        started = time.perf_counter()
+        voice_results = [voice_fn(*inputs) for inputs in voice_inputs]
+        email_results = [email_fn(*inputs) for inputs in email_inputs]
+        timings[name] = (time.perf_counter() - started, voice_results, email_results)
+
+    _, expected_voice, expected_email = timings['calculators']
+    _, voice_results, email_results = timings['lookup table']
+    mismatches = sum(a != b for a, b in zip(expected_voice + expected_email, voice_results + email_results))
+
+    for name, (elapsed, _, _) in timings.items():
+        print(f"{name:<12} {2 * n:,} results in {elapsed:.3f}s ({elapsed / (2 * n) * 1e6:.2f} µs each)")
+    print(f"Mismatches against the calculators: {mismatches}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precomputed cost tables for the sidebar input domain")
+    parser.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('build', help="Build the tables for the current pricing")
+    p.set_defaults(func=_cmd_build)
+
+    p = sub.add_parser('status', help="Show the tables of the current pricing")
+    p.set_defaults(func=_cmd_status)
+
+    p = sub.add_parser('bench', help="Compare lookups with the calculators")
+    p.add_argument('--count', type=int, default=100_000)
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=_cmd_bench)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
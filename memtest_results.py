@@ -0,0 +1,77 @@
+"""
+Memory test for calculator results.
+
+Measures the bytes per voice / email result in three layouts: the former
+nested dicts (result.to_dict()), the VoiceResult / EmailResult records
+returned by cost_model.py, and rows of batch_model's structured arrays.
+
+Usage:
+    python memtest_results.py --count 100000
+"""
+
+import argparse
+import random
+import tracemalloc
+
+import numpy as np
+
+import batch_model
+import cost_model
+
+
+def result_memory(pricing, count=100_000, seed=0):
+    """Bytes per voice / email result: former nested dicts vs records vs structured arrays"""
+    rng = random.Random(seed)
+    voice_keys = list(pricing['voice_agent']['models'])
+    email_keys = list(pricing['email_agent']['models'])
+    voice_inputs = [(rng.randint(1, 30), rng.randint(1, 500), rng.choice(voice_keys), rng.randint(1, 20),
+                     rng.randint(0, 10), rng.random() < 0.5) for _ in range(count)]
+    email_inputs = [(rng.randint(1, 1000), rng.choice(batch_model.POLLING_OPTIONS), rng.choice(email_keys),
+                     True, 5000, rng.random() < 0.5) for _ in range(count)]
+
+    def measure(build):
+        tracemalloc.start()
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+        return size / count
+
+    cp = batch_model.compile_pricing(pricing)
+    voice_columns = [np.array(column) for column in zip(*voice_inputs)]
+    email_columns = [np.array(column) for column in zip(*email_inputs)]
+    voice_columns[2] = cp.model_indices(voice_columns[2], 'voice')
+    email_columns[2] = cp.model_indices(email_columns[2], 'email')
+
+    voice, email = cost_model.calculate_voice_cost, cost_model.calculate_email_cost
+    return {
+        'voice': {
+            'dict': measure(lambda: [voice(pricing, *args).to_dict() for args in voice_inputs]),
+            'record': measure(lambda: [voice(pricing, *args) for args in voice_inputs]),
+            'structured': measure(lambda: batch_model.voice_records(cp, *voice_columns))
+        },
+        'email': {
+            'dict': measure(lambda: [email(pricing, *args).to_dict() for args in email_inputs]),
+            'record': measure(lambda: [email(pricing, *args) for args in email_inputs]),
+            'structured': measure(lambda: batch_model.email_records(cp, email_columns[0], email_columns[1],
+                                                                     email_columns[2], email_columns[3],
+                                                                     email_columns[5]))
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory per calculator result")
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    args = parser.parse_args()
+
+    memory = result_memory(cost_model.load_pricing(args.pricing), args.count)
+    print(f"Bytes per result ({args.count:,} results each)")
+    print(f"  {'':<8}{'nested dict':>14}{'record':>10}{'structured':>12}")
+    for channel, sizes in memory.items():
+        print(f"  {channel:<8}{sizes['dict']:>14,.0f}{sizes['record']:>10,.0f}{sizes['structured']:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
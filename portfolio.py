@@ -0,0 +1,289 @@
+"""
+Portfolio roll-up across many customer deployments.
+
+Each customer is stored with the configuration shape produced by the
+"Download Configuration (JSON)" button in app.py. The portfolio keeps
+per-customer costs and running totals by channel, model and deployment
+region. Changing one customer, or loading a new pricing_config.json, only
+re-prices the affected customers and adjusts the totals by the difference.
+
+With --exact, costs are computed in integer micro-CHF (fixed_point.py), so
+the running totals never drift however many updates are applied.
+
+Usage:
+    python portfolio.py exports/                 # one JSON export per customer
+    python portfolio.py exports/ --watch         # keep totals live as files change
+    python portfolio.py exports/ --exact         # integer micro-CHF totals
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from collections import defaultdict
+
+import cost_model
+import fixed_point
+
+CHANNELS = ('voice', 'email', 'shared')
+
+
+class Portfolio:
+    """Per-customer costs with incrementally maintained aggregates"""
+
+    def __init__(self, pricing, exact=False):
+        self.pricing = pricing
+        # exact: costs and totals are int micro-CHF instead of float CHF
+        self.exact = exact
+        self.fixed = fixed_point.compile_fixed_pricing(pricing) if exact else None
+        self.customers = {}
+        # model key -> customer ids, per channel (used to find who a price change affects)
+        self.model_index = {'voice': defaultdict(set), 'email': defaultdict(set)}
+        self.total = self._zero()
+        self.by_channel = defaultdict(self._zero)
+        self.by_model = defaultdict(self._zero)
+        self.by_region = defaultdict(self._zero)
+
+    def _zero(self):
+        return 0 if self.exact else 0.0
+
+    def _chf(self, cost):
+        return cost / fixed_point.MICRO if self.exact else cost
+
+    # --------------------------------------------------------------------------
+    # Pricing one customer
+    # --------------------------------------------------------------------------
+
+    def _price_voice(self, inputs):
+        if self.exact:
+            return fixed_point.voice_total_micro(self.fixed, inputs)
+        return cost_model.calculate_voice_cost(self.pricing, **inputs)['total']
+
+    def _price_email(self, inputs):
+        if self.exact:
+            return fixed_point.email_total_micro(self.fixed, inputs)
+        return cost_model.calculate_email_cost(self.pricing, **inputs)['total']
+
+    def _price_blob(self, inputs):
+        if self.exact:
+            return fixed_point.blob_cost_micro(self.fixed, inputs)
+        return cost_model.calculate_blob_storage_cost(self.pricing, inputs['num_pages'], inputs['enable_rag'])['cost']
+
+    def _contributions(self, entry):
+        """(channel, model, region, cost) rows a customer adds to the aggregates"""
+        inputs = entry['inputs']
+        voice_key = inputs['voice']['model_key']
+        email_key = inputs['email']['model_key']
+        return [
+            ('voice', voice_key, self.pricing['voice_agent']['models'][voice_key]['deployment'], entry['costs']['voice']),
+            ('email', email_key, self.pricing['email_agent']['models'][email_key]['deployment'], entry['costs']['email']),
+            ('shared', 'blob_storage', self.pricing['region'], entry['costs']['shared'])
+        ]
+
+    def _apply(self, entry, sign):
+        for channel, model, region, cost in self._contributions(entry):
+            self.by_channel[channel] += sign * cost
+            self.by_model[model] += sign * cost
+            self.by_region[region] += sign * cost
+            self.total += sign * cost
+
+    def _index(self, customer_id, entry, add):
+        for channel in ('voice', 'email'):
+            ids = self.model_index[channel][entry['inputs'][channel]['model_key']]
+            if add:
+                ids.add(customer_id)
+            else:
+                ids.discard(customer_id)
+
+    # --------------------------------------------------------------------------
+    # Customer updates
+    # --------------------------------------------------------------------------
+
+    def upsert(self, customer_id, export):
+        """Add or replace a customer's configuration; returns the new per-customer costs"""
+        inputs = cost_model.parse_config_export(self.pricing, export)
+        entry = {
+            'inputs': inputs,
+            'costs': {
+                'voice': self._price_voice(inputs['voice']),
+                'email': self._price_email(inputs['email']),
+                'shared': self._price_blob(inputs['email'])
+            }
+        }
+        self.remove(customer_id)
+        self.customers[customer_id] = entry
+        self._index(customer_id, entry, add=True)
+        self._apply(entry, +1)
+        return entry['costs']
+
+    def remove(self, customer_id):
+        entry = self.customers.pop(customer_id, None)
+        if entry is not None:
+            self._apply(entry, -1)
+            self._index(customer_id, entry, add=False)
+
+    def customer_total(self, customer_id):
+        return self._chf(sum(self.customers[customer_id]['costs'].values()))
+
+    # --------------------------------------------------------------------------
+    # Pricing updates
+    # --------------------------------------------------------------------------
+
+    def _affected(self, new_pricing):
+        """Work out which customers/channels a pricing change touches"""
+        old = self.pricing
+        affected = {channel: set() for channel in CHANNELS}
+
+        voice_shared = any(
+            old['voice_agent'][section] != new_pricing['voice_agent'][section]
+            for section in ('acs', 'container_apps', 'audio_conversion')
+        )
+        operating_hours = old['email_agent']['operating_hours'] != new_pricing['email_agent']['operating_hours']
+        email_shared = any(
+            old['email_agent'][section] != new_pricing['email_agent'][section]
+            for section in ('azure_functions', 'tokens')
+        )
+
+        for channel in ('voice', 'email'):
+            section = f'{channel}_agent'
+            old_models = old[section]['models']
+            new_models = new_pricing[section]['models']
+            for model_key, ids in self.model_index[channel].items():
+                if not ids:
+                    continue
+                if model_key not in new_models:
+                    raise ValueError(f"{channel} model '{model_key}' is used by {len(ids)} customer(s) "
+                                     "but missing from the new pricing")
+                everyone = operating_hours or (voice_shared if channel == 'voice' else email_shared)
+                if everyone or old_models[model_key] != new_models[model_key]:
+                    affected[channel] |= ids
+
+        if old['shared']['blob_storage'] != new_pricing['shared']['blob_storage'] or old['region'] != new_pricing['region']:
+            affected['shared'] = set(self.customers)
+        return affected
+
+    def update_pricing(self, new_pricing):
+        """Switch to new pricing, re-pricing only the affected customers.
+
+        Returns the number of customers whose costs were recomputed.
+        """
+        affected = self._affected(new_pricing)
+        touched = set().union(*affected.values())
+
+        # Region and model metadata come from the pricing too, so take the
+        # touched customers out under the old pricing and add them back under
+        # the new one.
+        for customer_id in touched:
+            self._apply(self.customers[customer_id], -1)
+
+        self.pricing = new_pricing
+        if self.exact:
+            self.fixed = fixed_point.compile_fixed_pricing(new_pricing)
+        for customer_id in touched:
+            entry = self.customers[customer_id]
+            inputs = entry['inputs']
+            if customer_id in affected['voice']:
+                entry['costs']['voice'] = self._price_voice(inputs['voice'])
+            if customer_id in affected['email']:
+                entry['costs']['email'] = self._price_email(inputs['email'])
+            if customer_id in affected['shared']:
+                entry['costs']['shared'] = self._price_blob(inputs['email'])
+            self._apply(entry, +1)
+        return len(touched)
+
+    def rebuild_totals(self):
+        """Recompute aggregates from the per-customer costs (drops accumulated float drift)"""
+        self.total = self._zero()
+        self.by_channel.clear()
+        self.by_model.clear()
+        self.by_region.clear()
+        for entry in self.customers.values():
+            self._apply(entry, +1)
+
+    def summary(self):
+        """Totals in CHF (exact mode: converted from micro-CHF for display)"""
+        return {
+            'pricing_version': self.pricing['version'],
+            'customers': len(self.customers),
+            'total': self._chf(self.total),
+            'by_channel': {k: self._chf(v) for k, v in self.by_channel.items()},
+            'by_model': {k: self._chf(v) for k, v in self.by_model.items() if abs(v) > 1e-9},
+            'by_region': {k: self._chf(v) for k, v in self.by_region.items() if abs(v) > 1e-9}
+        }
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def _load_export(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _customer_id(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _print_summary(portfolio):
+    summary = portfolio.summary()
+    print(f"\nPortfolio: {summary['customers']:,} customers, pricing {summary['pricing_version']}")
+    print(f"  Total: CHF {summary['total']:,.2f}/month")
+    for title, key in (('Channel', 'by_channel'), ('Model', 'by_model'), ('Region', 'by_region')):
+        print(f"  By {title.lower()}:")
+        for name, cost in sorted(summary[key].items(), key=lambda item: -item[1]):
+            print(f"    {name:<40} CHF {cost:>14,.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll up costs across customer configuration exports")
+    parser.add_argument('directory', help="Directory of configuration JSON exports (one per customer)")
+    parser.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    parser.add_argument('--watch', action='store_true', help="Keep running and apply changes incrementally")
+    parser.add_argument('--interval', type=float, default=2.0, help="Watch polling interval (seconds)")
+    parser.add_argument('--exact', action='store_true', help="Integer micro-CHF costs and totals (no drift)")
+    args = parser.parse_args()
+
+    portfolio = Portfolio(cost_model.load_pricing(args.pricing), exact=args.exact)
+    mtimes = {}
+    started = time.perf_counter()
+    for path in sorted(glob.glob(os.path.join(args.directory, '*.json'))):
+        portfolio.upsert(_customer_id(path), _load_export(path))
+        mtimes[path] = os.stat(path).st_mtime_ns
+    print(f"Loaded {len(mtimes):,} customers in {time.perf_counter() - started:.2f}s")
+    _print_summary(portfolio)
+
+    if not args.watch:
+        return
+
+    pricing_mtime = os.stat(args.pricing).st_mtime_ns
+    try:
+        while True:
+            time.sleep(args.interval)
+            changed = False
+
+            current = {p: os.stat(p).st_mtime_ns for p in glob.glob(os.path.join(args.directory, '*.json'))}
+            for path in set(mtimes) - set(current):
+                portfolio.remove(_customer_id(path))
+                changed = True
+            for path, mtime in current.items():
+                if mtimes.get(path) != mtime:
+                    portfolio.upsert(_customer_id(path), _load_export(path))
+                    changed = True
+            mtimes = current
+
+            mtime = os.stat(args.pricing).st_mtime_ns
+            if mtime != pricing_mtime:
+                pricing_mtime = mtime
+                repriced = portfolio.update_pricing(cost_model.load_pricing(args.pricing))
+                print(f"Pricing changed: re-priced {repriced:,} of {len(portfolio.customers):,} customers")
+                changed = True
+
+            if changed:
+                _print_summary(portfolio)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,675 @@
+"""
+Import prices from Azure Retail Prices API dumps into pricing_config.json.
+
+Reads one or more JSON dumps saved from https://prices.azure.com/api/retail/prices
+(a single response page, many pages concatenated, or a plain array of
+items; optionally gzipped) with a streaming parser, so memory stays constant
+no matter how large the dump is. Only consumption meters of the mapped
+services in the configured region are kept, indexed by service, SKU and
+region. Each config value is then matched to a meter (see default_mapping),
+converted to the config's unit and written to a new versioned config together
+with a diff against the current one.
+
+Usage:
+    python price_import.py import retail_prices.json --version 2025-02 \\
+        --output pricing_config.2025-02.json --diff diff.json [--store]
+    python price_import.py sample retail_prices.json --filler 500000
+"""
+
+import argparse
+import copy
+import gzip
+import json
+import os
+import random
+import re
+import time
+from collections import defaultdict
+from datetime import date
+
+import cost_model
+
+CHUNK_CHARS = 1 << 20
+MAX_ITEM_CHARS = 1 << 20
+
+# ==============================================================================
+# STREAMING DUMP READER
+# ==============================================================================
+
+_ITEMS_KEY = re.compile(r'"Items"\s*:\s*\[')
+
+
+def _open_dump(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def iter_price_items(path, chunk_chars=CHUNK_CHARS):
+    """Yield price items from a dump one at a time.
+
+    The reader keeps a sliding buffer of about `chunk_chars` characters and
+    decodes items with json.JSONDecoder.raw_decode as they complete, so only
+    one item (never the whole array) is materialized at a time.
+    """
+    decoder = json.JSONDecoder()
+    with _open_dump(path) as f:
+        buf = f.read(chunk_chars)
+        pos = 0
+        eof = not buf
+
+        def refill(keep_from):
+            nonlocal buf, pos, eof
+            data = f.read(chunk_chars)
+            eof = not data
+            buf = buf[keep_from:] + data
+            pos = max(pos - keep_from, 0)
+
+        # A plain array of items instead of API response pages
+        while pos < len(buf) and buf[pos].isspace():
+            pos += 1
+        in_array = buf[pos:pos + 1] == '['
+        if in_array:
+            pos += 1
+
+        while True:
+            if not in_array:
+                match = _ITEMS_KEY.search(buf, pos)
+                if match is None:
+                    if eof:
+                        return
+                    # Keep a short tail in case the key straddles the boundary
+                    refill(max(pos, len(buf) - 64))
+                    continue
+                pos = match.end()
+                in_array = True
+
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ','):
+                pos += 1
+            if pos >= len(buf):
+                if eof:
+                    raise ValueError(f"{path}: unexpected end of file inside the Items array")
+                refill(pos)
+                continue
+            if buf[pos] == ']':
+                pos += 1
+                in_array = False
+                continue
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof or len(buf) - pos > MAX_ITEM_CHARS:
+                    raise ValueError(f"{path}: malformed price item near character {pos}")
+                refill(pos)
+                continue
+            pos = end
+            if pos > chunk_chars:
+                buf = buf[pos:]
+                pos = 0
+            if isinstance(item, dict):
+                yield item
+
+# ==============================================================================
+# METER INDEX
+# ==============================================================================
+
+def region_key(name):
+    """'Sweden Central' -> 'swedencentral' (the armRegionName form)"""
+    return name.replace(' ', '').lower()
+
+
+def unit_quantity(unit_of_measure):
+    """How many base units (tokens, seconds, requests, GB-months) one priced unit covers"""
+    match = re.match(r'\s*([\d.]+)\s*([KM]?)\b\s*(.*)', unit_of_measure or '')
+    if not match:
+        return 1.0
+    quantity = float(match.group(1)) * {'': 1, 'K': 1_000, 'M': 1_000_000}[match.group(2)]
+    rest = match.group(3).lower()
+    if 'hour' in rest:
+        quantity *= 3600
+    elif 'minute' in rest and '/' not in rest:
+        quantity *= 60
+    return quantity
+
+
+class MeterIndex:
+    """Consumption meters of the mapped services, keyed by (service, sku, region)"""
+
+    def __init__(self, services, regions, currency):
+        self.services = set(services)
+        self.regions = set(regions)
+        self.currency = currency
+        # (service, sku, region) -> meter name -> {'unit', 'product', 'tiers': {min_units: (price, start)}}
+        self.meters = defaultdict(dict)
+        self.items_read = 0
+        self.items_kept = 0
+        self.currency_mismatches = 0
+
+    def add(self, item):
+        self.items_read += 1
+        if item.get('serviceName') not in self.services or item.get('type', 'Consumption') != 'Consumption':
+            return
+        region = item.get('armRegionName') or ''
+        if region.lower() not in self.regions:
+            return
+        if item.get('currencyCode', self.currency) != self.currency:
+            self.currency_mismatches += 1
+            return
+
+        self.items_kept += 1
+        key = (item['serviceName'], item.get('skuName', ''), region.lower())
+        meter = self.meters[key].setdefault(item['meterName'], {
+            'unit': item.get('unitOfMeasure', '1'),
+            'product': item.get('productName', ''),
+            'tiers': {}
+        })
+        tier = float(item.get('tierMinimumUnits', 0))
+        start = item.get('effectiveStartDate', '')
+        # Several effective dates for the same tier: keep the newest
+        if tier not in meter['tiers'] or start >= meter['tiers'][tier][1]:
+            meter['tiers'][tier] = (float(item.get('retailPrice', item.get('unitPrice', 0.0))), start)
+
+    def candidates(self, service):
+        for (svc, sku, region), meters in self.meters.items():
+            if svc == service:
+                for name, meter in meters.items():
+                    yield sku, region, name, meter
+
+
+def build_index(paths, mapping, region, currency):
+    regions = {region_key(region), '', 'global'}
+    index = MeterIndex({part['service'] for rule in mapping.values() for part in _meter_rules(rule)}, regions,
+                       currency)
+    for path in paths:
+        for item in iter_price_items(path):
+            index.add(item)
+    return index
+
+# ==============================================================================
+# MAPPING CONFIG KEYS TO METERS
+# ==============================================================================
+
+# Words that distinguish one model family from another in meter names
+MODEL_MODIFIERS = {'mini', 'nano', 'pro', 'realtime', 'rt', 'audio', 'aud', 'transcribe', 'tts', 'chat', 'search'}
+ALWAYS_EXCLUDED = {'batch', 'ft', 'finetune', 'finetuned', 'training', 'hosting', 'prvsn', 'provisioned'}
+
+DEPLOYMENT_WORDS = {
+    'Global': [('glbl', 'global', 'gl')],
+    'EU Data Zone': [('dz', 'dzone', 'datazone', 'data')],
+    'Sweden Regional': []
+}
+DEPLOYMENT_EXCLUDES = {
+    'Global': set(),
+    'EU Data Zone': set(),
+    'Sweden Regional': {'glbl', 'global', 'gl', 'dz', 'dzone', 'datazone'}
+}
+
+INPUT = ('inp', 'input', 'in')
+OUTPUT = ('outp', 'output', 'out')
+CACHED = ('cchd', 'cached', 'cache')
+
+# (config field, required word groups, excluded words)
+TOKEN_FIELDS = {
+    'input_per_m_tokens': ([INPUT], set(CACHED)),
+    'cached_input_per_m_tokens': ([CACHED, INPUT], set()),
+    'output_per_m_tokens': ([OUTPUT], set()),
+    'text_input_per_m_tokens': ([('txt', 'text'), INPUT], set(CACHED) | {'aud', 'audio', 'img', 'image'}),
+    'text_cached_input_per_m_tokens': ([('txt', 'text'), CACHED, INPUT], {'aud', 'audio', 'img', 'image'}),
+    'text_output_per_m_tokens': ([('txt', 'text'), OUTPUT], {'aud', 'audio', 'img', 'image'}),
+    'audio_input_per_m_tokens': ([('aud', 'audio'), INPUT], set(CACHED) | {'txt', 'text', 'img', 'image'}),
+    'audio_cached_input_per_m_tokens': ([('aud', 'audio'), CACHED, INPUT], {'txt', 'text', 'img', 'image'}),
+    'audio_output_per_m_tokens': ([('aud', 'audio'), OUTPUT], {'txt', 'text', 'img', 'image'}),
+    'image_input_per_m_tokens': ([('img', 'image'), INPUT], set(CACHED) | {'txt', 'text', 'aud', 'audio'}),
+    'image_cached_input_per_m_tokens': ([('img', 'image'), CACHED, INPUT], {'txt', 'text', 'aud', 'audio'}),
+}
+
+MODEL_SERVICE = 'Foundry Models'
+
+# Infrastructure meters: config path -> rule. 'per' is the number of base
+# units the config value is quoted for; 'field' 'free_units' reads the size
+# of the free tier instead of the price. A rule with 'parts' sums several
+# meters (see default_mapping for container idle time).
+INFRASTRUCTURE_MAPPING = {
+    'voice_agent.acs.phone_number_per_month': {
+        'service': 'Azure Communication Services', 'words': [('geographic', 'local'), ('number', 'numbers')],
+        'per': 1},
+    'voice_agent.acs.inbound_per_minute': {
+        'service': 'Azure Communication Services', 'words': [('inbound',), ('calling', 'call', 'pstn')],
+        'exclude': {'toll', 'free', 'tollfree'}, 'per': 60},
+    'voice_agent.acs.outbound_per_minute': {
+        'service': 'Azure Communication Services', 'words': [('outbound',), ('calling', 'call', 'pstn')],
+        'per': 60},
+    'voice_agent.acs.call_recording_per_minute': {
+        'service': 'Azure Communication Services', 'words': [('recording',)], 'exclude': {'video'}, 'per': 60},
+    'voice_agent.acs.audio_streaming_per_minute': {
+        'service': 'Azure Communication Services', 'words': [('audio',), ('streaming',)], 'per': 60},
+
+    'voice_agent.container_apps.vcpu_active_per_second': {
+        'service': 'Azure Container Apps', 'meter': 'Standard vCPU Active Usage', 'per': 1},
+    'voice_agent.container_apps.memory_gb_active_per_second': {
+        'service': 'Azure Container Apps', 'meter': 'Standard Memory Active Usage', 'per': 1},
+    'voice_agent.container_apps.requests_per_million': {
+        'service': 'Azure Container Apps', 'meter': 'Standard Requests', 'per': 1_000_000},
+    'voice_agent.container_apps.free_vcpu_seconds_per_month': {
+        'service': 'Azure Container Apps', 'meter': 'Standard vCPU Active Usage', 'field': 'free_units'},
+    'voice_agent.container_apps.free_gb_seconds_per_month': {
+        'service': 'Azure Container Apps', 'meter': 'Standard Memory Active Usage', 'field': 'free_units'},
+    'voice_agent.container_apps.free_requests_per_month': {
+        'service': 'Azure Container Apps', 'meter': 'Standard Requests', 'field': 'free_units'},
+
+    'email_agent.azure_functions.execution_cost_per_million': {
+        'service': 'Functions', 'meter': 'Standard Total Executions', 'per': 1_000_000},
+    'email_agent.azure_functions.compute_cost_per_gb_second': {
+        'service': 'Functions', 'meter': 'Standard Execution Time', 'per': 1},
+    'email_agent.azure_functions.free_executions_per_month': {
+        'service': 'Functions', 'meter': 'Standard Total Executions', 'field': 'free_units'},
+    'email_agent.azure_functions.free_gb_seconds_per_month': {
+        'service': 'Functions', 'meter': 'Standard Execution Time', 'field': 'free_units'},
+
+    'shared.blob_storage.hot_tier_per_gb_month': {
+        'service': 'Storage', 'meter': 'Hot LRS Data Stored', 'product': 'Blob', 'per': 1},
+    'shared.blob_storage.read_operations_per_10k': {
+        'service': 'Storage', 'meter': 'Hot Read Operations', 'product': 'Blob', 'per': 10_000},
+    'shared.blob_storage.write_operations_per_10k': {
+        'service': 'Storage', 'meter': 'Hot LRS Write Operations', 'product': 'Blob', 'per': 10_000},
+    'shared.blob_storage.data_retrieval_per_gb': {
+        'service': 'Storage', 'meter': 'Hot Data Retrieval', 'product': 'Blob', 'per': 1},
+}
+
+
+def _model_words(model_key):
+    family = model_key
+    for suffix in ('_global', '_eu', '_regional'):
+        if family.endswith(suffix):
+            family = family[:-len(suffix)]
+    return family.split('_')
+
+
+def default_mapping(config):
+    """Config path -> meter rule for every price in the config.
+
+    Azure OpenAI meter names are matched by their words (e.g. 'gpt 5 mini
+    inp glbl' for gpt_5_mini_global.input_per_m_tokens) rather than by exact
+    name, since the naming is not consistent across model generations. Pass
+    --mapping to override or add rules with exact 'meter' names.
+    """
+    mapping = dict(INFRASTRUCTURE_MAPPING)
+    # idle_per_second is one flat rate per idle replica-second covering vCPU
+    # and memory, so it is the sum of both idle meters per replica
+    container = config['voice_agent']['container_apps']
+    mapping['voice_agent.container_apps.idle_per_second'] = {'parts': [
+        {'service': 'Azure Container Apps', 'meter': 'Standard vCPU Idle Usage', 'per': container['vcpu_per_replica']},
+        {'service': 'Azure Container Apps', 'meter': 'Standard Memory Idle Usage',
+         'per': container['memory_gb_per_replica']}
+    ]}
+    # A word of another model family (e.g. '4o' for gpt_realtime) rules a meter out
+    family_words = {word for agent in ('voice_agent', 'email_agent')
+                    for model_key in config[agent]['models'] for word in _model_words(model_key)}
+    for agent in ('voice_agent', 'email_agent'):
+        for model_key, model in config[agent]['models'].items():
+            family = _model_words(model_key)
+            for field, (required, excluded) in TOKEN_FIELDS.items():
+                if field not in model:
+                    continue
+                groups = [(word,) for word in family] + required + DEPLOYMENT_WORDS[model['deployment']]
+                required_words = {word for group in groups for word in group}
+                mapping[f'{agent}.models.{model_key}.{field}'] = {
+                    'service': MODEL_SERVICE,
+                    'words': groups,
+                    'exclude': (((MODEL_MODIFIERS | family_words) - required_words) | excluded | ALWAYS_EXCLUDED
+                                | DEPLOYMENT_EXCLUDES[model['deployment']]),
+                    'per': 1_000_000
+                }
+    return mapping
+
+
+def load_mapping(path, config):
+    """Default mapping updated with the rules in a JSON file (null removes a rule)"""
+    mapping = default_mapping(config)
+    with open(path, 'r') as f:
+        overrides = json.load(f)
+    for config_path, rule in overrides.items():
+        if rule is None:
+            mapping.pop(config_path, None)
+        elif 'parts' in rule:
+            mapping[config_path] = {'parts': [_normalize_rule(part) for part in rule['parts']]}
+        else:
+            mapping[config_path] = _normalize_rule(rule)
+    return mapping
+
+
+def _normalize_rule(rule):
+    rule = dict(rule)
+    if 'words' in rule:
+        rule['words'] = [tuple(group) if isinstance(group, list) else (group,) for group in rule['words']]
+    rule['exclude'] = set(rule.get('exclude', ()))
+    return rule
+
+
+def _meter_rules(rule):
+    """The single-meter rules of a mapping rule"""
+    return rule.get('parts', [rule])
+
+
+def _meter_words(name):
+    return set(re.findall(r'[a-z0-9]+', name.lower()))
+
+
+def _rule_matches(rule, name, meter):
+    if 'product' in rule and rule['product'].lower() not in meter['product'].lower():
+        return False
+    if 'meter' in rule:
+        return name.lower() == rule['meter'].lower()
+    words = _meter_words(name)
+    if words & rule.get('exclude', set()):
+        return False
+    return all(words & set(group) for group in rule['words'])
+
+
+def _meter_value(rule, meter):
+    """Config value of a meter: paid rate per `per` base units, or the free tier size.
+
+    A meter whose tiers are all free has a rate of 0 and no size of free tier
+    that could be written to the config: None is returned for 'free_units'.
+    """
+    tiers = sorted(meter['tiers'].items())
+    quantity = unit_quantity(meter['unit'])
+    paid = [(minimum, price) for minimum, (price, _) in tiers if price > 0]
+    if rule.get('field') == 'free_units':
+        return paid[0][0] * quantity if paid else None
+    if not paid:
+        return 0.0
+    return paid[0][1] / quantity * rule.get('per', 1)
+
+
+def _match_meter(index, rule, target_region):
+    """Resolve one single-meter rule: ('ok', value, source), ('unmatched',),
+    ('ambiguous', [candidates]) or ('free', source) when every tier is free"""
+    found = {}
+    for sku, region, name, meter in index.candidates(rule['service']):
+        if _rule_matches(rule, name, meter):
+            found[(region == target_region, name, sku, region)] = _meter_value(rule, meter)
+    if not found:
+        return ('unmatched',)
+    best_locality = max(local for local, *_ in found)
+    values = {key: value for key, value in found.items() if key[0] == best_locality}
+    if len({None if value is None else round(value, 12) for value in values.values()}) > 1:
+        return ('ambiguous', [f"{name} [{sku}, {region or 'global'}] = "
+                              f"{'all tiers free' if value is None else f'{value:g}'}"
+                              for (_, name, sku, region), value in sorted(values.items(), key=lambda kv: kv[0])])
+    (_, name, sku, region), value = next(iter(sorted(values.items(), key=lambda kv: kv[0])))
+    source = f"{name} [{sku}, {region or 'global'}]"
+    if value is None:
+        return ('free', source)
+    return ('ok', value, source)
+
+
+def resolve_prices(index, mapping, target_region):
+    """Match every rule against the index.
+
+    Returns ({config path: (value, meter description)}, unmatched paths,
+    {ambiguous path: [candidate descriptions]}, {path: meter description} of
+    free tiers whose meter has no paid tier at all). A meter in the target
+    region wins over a global one; several meters with different values are
+    reported as ambiguous and left unchanged, as are entirely free meters.
+    Rules with 'parts' sum their meters and resolve only if every part does.
+    """
+    target_region = region_key(target_region)
+    resolved, unmatched, ambiguous, free = {}, [], {}, {}
+    for config_path, rule in mapping.items():
+        matches = [_match_meter(index, part, target_region) for part in _meter_rules(rule)]
+        statuses = {match[0] for match in matches}
+        if 'unmatched' in statuses:
+            unmatched.append(config_path)
+        elif 'ambiguous' in statuses:
+            ambiguous[config_path] = [candidate for match in matches if match[0] == 'ambiguous'
+                                      for candidate in match[1]]
+        elif 'free' in statuses:
+            free[config_path] = ' + '.join(match[-1] for match in matches)
+        else:
+            resolved[config_path] = (sum(match[1] for match in matches), ' + '.join(match[2] for match in matches))
+    return resolved, unmatched, ambiguous, free
+
+# ==============================================================================
+# VERSIONED CONFIG AND DIFF
+# ==============================================================================
+
+def _get_path(config, path):
+    node = config
+    for part in path.split('.'):
+        node = node[part]
+    return node
+
+
+def _set_path(config, path, value):
+    parts = path.split('.')
+    node = config
+    for part in parts[:-1]:
+        node = node[part]
+    node[parts[-1]] = value
+
+
+def apply_prices(config, resolved, version, updated=None):
+    """New config with the resolved prices (integers stay integers)"""
+    new = copy.deepcopy(config)
+    for path, (value, _) in resolved.items():
+        old = _get_path(config, path)
+        if isinstance(old, int) and not isinstance(old, bool) and float(value).is_integer():
+            value = int(value)
+        else:
+            # Unit conversion (e.g. per hour -> per second) leaves float noise
+            value = float(f'{value:.8g}')
+        _set_path(new, path, value)
+    new['version'] = version
+    new['last_updated'] = updated or date.today().isoformat()
+    return new
+
+
+def config_diff(old, new, prefix=''):
+    """Changed numeric values between two configs as [{'path', 'old', 'new', 'change_pct'}]"""
+    rows = []
+    for key in sorted(set(old) | set(new)):
+        path = f'{prefix}{key}'
+        a, b = old.get(key), new.get(key)
+        if isinstance(a, dict) and isinstance(b, dict):
+            rows.extend(config_diff(a, b, path + '.'))
+        elif a != b and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (a, b)):
+            rows.append({'path': path, 'old': a, 'new': b,
+                         'change_pct': (b - a) / a * 100 if a else None})
+        elif a != b and (isinstance(a, (int, float)) or isinstance(b, (int, float))):
+            rows.append({'path': path, 'old': a, 'new': b, 'change_pct': None})
+    return rows
+
+
+def import_prices(paths, config, version, mapping=None):
+    """Build a new versioned config from retail price dumps"""
+    mapping = mapping or default_mapping(config)
+    index = build_index(paths, mapping, config['region'], config['currency'])
+    resolved, unmatched, ambiguous, free = resolve_prices(index, mapping, config['region'])
+    new = apply_prices(config, resolved, version)
+    return {
+        'config': new,
+        'diff': config_diff(config, new),
+        'sources': {path: source for path, (_, source) in resolved.items()},
+        'unmatched': unmatched,
+        'ambiguous': ambiguous,
+        'free': free,
+        'index': index
+    }
+
+# ==============================================================================
+# SAMPLE DUMPS
+# ==============================================================================
+
+def _sample_meter_name(rule):
+    if 'meter' in rule:
+        return rule['meter']
+    return ' '.join(group[0] for group in rule['words'])
+
+
+def write_sample_dump(config, path, filler=100_000, drift=0.05, page_size=1000, seed=0):
+    """Synthetic dump in API page format: every mapped meter (prices drifted
+    by up to `drift`) hidden among `filler` unrelated items"""
+    rng = random.Random(seed)
+    mapping = default_mapping(config)
+    region = region_key(config['region'])
+    items = []
+    meters = {}
+    for config_path, rule in mapping.items():
+        parts = _meter_rules(rule)
+        for part in parts:
+            value = _get_path(config, config_path)
+            name = _sample_meter_name(part)
+            meter = meters.setdefault(name, {'service': part['service'], 'product': part.get('product', 'Azure'),
+                                             'tiers': {}, 'unit': '1'})
+            if part.get('field') == 'free_units':
+                meter['free'] = value
+            else:
+                per = part.get('per', 1)
+                meter['unit'] = {1_000_000: '1M', 10_000: '10K', 60: '1 Minute'}.get(per, '1')
+                if meter['unit'] == '1':
+                    # Summed meters share the value equally; 'per' is then a quantity per replica
+                    value = value / len(parts) / per
+                meter['price'] = value * (1 + rng.uniform(-drift, drift)) if value else value
+    for name, meter in meters.items():
+        tiers = [(0.0, meter.get('price', 0.0))]
+        if meter.get('free'):
+            tiers = [(0.0, 0.0), (float(meter['free']) / unit_quantity(meter['unit']), meter.get('price', 0.0))]
+        for minimum, price in tiers:
+            items.append({
+                'currencyCode': config['currency'], 'tierMinimumUnits': minimum, 'retailPrice': price,
+                'unitPrice': price, 'armRegionName': region, 'location': config['region'],
+                'effectiveStartDate': '2025-01-01T00:00:00Z', 'meterId': f'meter-{len(items)}',
+                'meterName': name, 'productName': meter['product'], 'skuName': 'Standard',
+                'serviceName': meter['service'], 'unitOfMeasure': meter['unit'], 'type': 'Consumption'
+            })
+
+    services = ['Virtual Machines', 'Storage', 'SQL Database', 'Azure Cosmos DB', 'Bandwidth']
+    regions = ['westeurope', 'northeurope', 'eastus', 'switzerlandnorth', region]
+    with open(path, 'w') as f:
+        total = filler + len(items)
+        positions = set(rng.sample(range(total), len(items)))
+        mapped = iter(items)
+        for page_start in range(0, total, page_size):
+            page = []
+            for i in range(page_start, min(page_start + page_size, total)):
+                if i in positions:
+                    page.append(next(mapped))
+                else:
+                    page.append({
+                        'currencyCode': config['currency'], 'tierMinimumUnits': 0.0,
+                        'retailPrice': round(rng.uniform(0.001, 5), 6), 'unitPrice': 0.0,
+                        'armRegionName': rng.choice(regions), 'location': '', 'effectiveStartDate': '2024-06-01T00:00:00Z',
+                        'meterId': f'filler-{i}', 'meterName': f'D{rng.randint(1, 64)}s v5 Low Priority',
+                        'productName': 'Virtual Machines Dsv5 Series', 'skuName': f'D{i % 97}s v5',
+                        'serviceName': rng.choice(services), 'unitOfMeasure': '1 Hour', 'type': 'Consumption',
+                        'isPrimaryMeterRegion': True, 'armSkuName': f'Standard_D{i % 97}s_v5'
+                    })
+            json.dump({'BillingCurrency': config['currency'], 'CustomerEntityId': 'Default',
+                       'CustomerEntityType': 'Retail', 'Items': page, 'NextPageLink': None, 'Count': len(page)}, f)
+            f.write('\n')
+    return path
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def _print_report(result, elapsed, size):
+    index = result['index']
+    print(f"Read {index.items_read:,} items ({size / 1e6:,.1f} MB) in {elapsed:.2f}s, "
+          f"kept {index.items_kept:,} items of the mapped services")
+    if index.currency_mismatches:
+        print(f"Skipped {index.currency_mismatches:,} items not priced in {index.currency} "
+              f"(fetch the dump with currencyCode='{index.currency}')")
+
+    if result['diff']:
+        print(f"\nChanged values ({len(result['diff'])}):")
+        for row in result['diff']:
+            change = f"{row['change_pct']:+.1f}%" if row['change_pct'] is not None else ''
+            print(f"  {row['path']:<70} {row['old']!s:>12} -> {row['new']!s:<12} {change}")
+    else:
+        print("\nNo price changes")
+    if result['ambiguous']:
+        print(f"\nAmbiguous (left unchanged, add an exact 'meter' in --mapping):")
+        for path, candidates in result['ambiguous'].items():
+            print(f"  {path}")
+            for candidate in candidates:
+                print(f"      {candidate}")
+    if result['free']:
+        print(f"\nMeters without any paid tier (unlimited free tier, left unchanged):")
+        for path, source in result['free'].items():
+            print(f"  {path:<70} {source}")
+    if result['unmatched']:
+        print(f"\nNo meter found (left unchanged): {len(result['unmatched'])}")
+        for path in result['unmatched']:
+            print(f"  {path}")
+
+
+def _cmd_import(args):
+    config = cost_model.load_pricing(args.pricing)
+    mapping = load_mapping(args.mapping, config) if args.mapping else None
+    version = args.version or date.today().isoformat()
+
+    started = time.perf_counter()
+    result = import_prices(args.dumps, config, version, mapping)
+    elapsed = time.perf_counter() - started
+    _print_report(result, elapsed, sum(os.path.getsize(p) for p in args.dumps))
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(args.pricing)),
+                                         f'pricing_config.{version}.json')
+    with open(output, 'w') as f:
+        json.dump(result['config'], f, indent=2)
+        f.write('\n')
+    print(f"\nWrote version {version} to {output}")
+
+    if args.diff:
+        with open(args.diff, 'w') as f:
+            json.dump({'from_version': config['version'], 'to_version': version, 'changes': result['diff'],
+                       'sources': result['sources'], 'unmatched': result['unmatched'],
+                       'ambiguous': result['ambiguous'], 'free': result['free']}, f, indent=2)
+        print(f"Diff written to {args.diff}")
+
+    if args.store:
+        from pricing_store import PricingStore
+        store = PricingStore()
+        try:
+            sha = store.add(result['config'])
+        finally:
+            store.close()
+        print(f"Added to pricing store ({sha[:12]})")
+
+
+def _cmd_sample(args):
+    config = cost_model.load_pricing(args.pricing)
+    write_sample_dump(config, args.output, filler=args.filler, seed=args.seed)
+    print(f"Sample dump written to {args.output} ({os.path.getsize(args.output) / 1e6:,.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import Azure Retail Prices dumps into pricing_config.json")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('import', help="Build a new versioned config from retail price dumps")
+    p.add_argument('dumps', nargs='+', help="Retail Prices API JSON dump(s) (.json or .json.gz)")
+    p.add_argument('--pricing', default=cost_model.PRICING_PATH, help="Current config (base of the new version)")
+    p.add_argument('--version', help="Version of the new config (default: today's date)")
+    p.add_argument('--output', help="Output path (default: pricing_config.<version>.json)")
+    p.add_argument('--diff', help="Write the diff and meter sources as JSON")
+    p.add_argument('--mapping', help="JSON file with rules overriding the default meter mapping")
+    p.add_argument('--store', action='store_true', help="Also add the new version to the pricing store")
+    p.set_defaults(func=_cmd_import)
+
+    p = sub.add_parser('sample', help="Write a synthetic dump for trying the importer")
+    p.add_argument('output')
+    p.add_argument('--filler', type=int, default=100_000, help="Number of unrelated items")
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    p.set_defaults(func=_cmd_sample)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""
+Local store of every pricing configuration, indexed by version and date.
+
+pricing_config.json only describes the current prices. This module keeps an
+append-only SQLite history of every config that was added to it, so a saved
+scenario set can be re-priced against any versions and compared component by
+component. Each version is compiled once into rate arrays (batch_model) and
+cached, so switching versions is cheap.
+
+Usage:
+    python pricing_store.py add pricing_config.json
+    python pricing_store.py list
+    python pricing_store.py compare scenarios.csv 2025-01 2025-02 [--output deltas.csv] [--exact]
+    python pricing_store.py generate scenarios.csv --count 50000
+    python pricing_store.py bench --count 50000
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import batch_model
+import cost_model
+import fixed_point
+
+STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pricing_versions.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pricing_versions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    version TEXT NOT NULL,
+    last_updated TEXT NOT NULL,
+    added_at TEXT NOT NULL,
+    sha256 TEXT NOT NULL UNIQUE,
+    config TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pricing_version ON pricing_versions (version);
+CREATE INDEX IF NOT EXISTS idx_pricing_last_updated ON pricing_versions (last_updated);
+"""
+
+
+def pricing_fingerprint(pricing):
+    """Stable hash of a pricing config (independent of key order and whitespace)"""
+    canonical = json.dumps(pricing, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class PricingStore:
+    """Append-only pricing history with compiled tables cached per version"""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self._compiled = {}
+        self._fixed = {}
+
+    def close(self):
+        self.db.close()
+
+    def add(self, pricing):
+        """Store a pricing config; returns its sha256 (adding the same config twice is a no-op)"""
+        sha = pricing_fingerprint(pricing)
+        with self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO pricing_versions (version, last_updated, added_at, sha256, config) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (pricing['version'], pricing['last_updated'], datetime.now().isoformat(timespec='seconds'),
+                 sha, json.dumps(pricing))
+            )
+        return sha
+
+    def versions(self):
+        """All stored versions, oldest first"""
+        rows = self.db.execute(
+            "SELECT id, version, last_updated, added_at, sha256 FROM pricing_versions "
+            "ORDER BY last_updated, id"
+        ).fetchall()
+        return [
+            {'id': r[0], 'version': r[1], 'last_updated': r[2], 'added_at': r[3], 'sha256': r[4]}
+            for r in rows
+        ]
+
+    def _row(self, ref):
+        """Find a config by version name, sha256 prefix or '@<date>' (latest on or before date)"""
+        if ref.startswith('@'):
+            row = self.db.execute(
+                "SELECT sha256, config FROM pricing_versions WHERE last_updated <= ? "
+                "ORDER BY last_updated DESC, id DESC LIMIT 1", (ref[1:],)
+            ).fetchone()
+        else:
+            row = self.db.execute(
+                "SELECT sha256, config FROM pricing_versions WHERE version = ? ORDER BY id DESC LIMIT 1", (ref,)
+            ).fetchone()
+            if row is None and len(ref) >= 6:
+                row = self.db.execute(
+                    "SELECT sha256, config FROM pricing_versions WHERE sha256 LIKE ? ORDER BY id DESC LIMIT 1",
+                    (ref + '%',)
+                ).fetchone()
+        if row is None:
+            raise KeyError(f"no pricing version matching '{ref}'")
+        return row
+
+    def get(self, ref):
+        return json.loads(self._row(ref)[1])
+
+    def compiled(self, ref):
+        """Compiled rate tables for a version (built once, then cached)"""
+        sha, config = self._row(ref)
+        if sha not in self._compiled:
+            self._compiled[sha] = batch_model.compile_pricing(json.loads(config))
+        return self._compiled[sha]
+
+    def fixed(self, ref):
+        """Fixed-point (micro-CHF) rate tables for a version (built once, then cached)"""
+        sha, config = self._row(ref)
+        if sha not in self._fixed:
+            self._fixed[sha] = fixed_point.compile_fixed_pricing(json.loads(config))
+        return self._fixed[sha]
+
+    def reprice(self, table, refs, exact=False):
+        """Evaluate one scenario table under several versions; returns {ref: {component: array}}
+
+        With exact=True the arrays are int64 micro-CHF (fixed_point.py).
+        """
+        if exact:
+            return {ref: fixed_point.evaluate_scenarios_micro(self.fixed(ref), table) for ref in refs}
+        return {ref: batch_model.evaluate_scenarios(self.compiled(ref), table) for ref in refs}
+
+# ==============================================================================
+# COMPARISON REPORTS
+# ==============================================================================
+
+def _chf_sum(values, exact):
+    return int(np.sum(values)) / fixed_point.MICRO if exact else float(np.sum(values))
+
+
+def component_summary(results, exact=False):
+    """Monthly totals per component and version, with deltas against the first version"""
+    refs = list(results)
+    summary = pd.DataFrame({
+        ref: {component: _chf_sum(values, exact) for component, values in components.items()}
+        for ref, components in results.items()
+    }).loc[list(batch_model.COMPONENTS)]
+
+    base = summary[refs[0]]
+    for ref in refs[1:]:
+        summary[f'Δ {ref}'] = summary[ref] - base
+        summary[f'Δ% {ref}'] = np.where(base != 0, (summary[ref] - base) / base.where(base != 0, 1) * 100, np.nan)
+    return summary
+
+
+def scenario_deltas(table, results, ref_a, ref_b, exact=False):
+    """Per-scenario component deltas between two versions"""
+    deltas = pd.DataFrame({column: np.asarray(table[column]) for column in batch_model.SCENARIO_COLUMNS})
+    for component in batch_model.COMPONENTS:
+        delta = results[ref_b][component] - results[ref_a][component]
+        deltas[f'{component}_delta'] = fixed_point.to_chf(delta) if exact else delta
+    return deltas
+
+
+def load_scenarios(path):
+    """Load a scenario table from CSV or JSON (list of rows / JSON lines)"""
+    if path.endswith('.csv'):
+        table = pd.read_csv(path)
+    elif path.endswith('.jsonl'):
+        table = pd.read_json(path, lines=True)
+    else:
+        table = pd.read_json(path)
+    missing = set(batch_model.SCENARIO_COLUMNS) - set(table.columns)
+    if missing:
+        raise ValueError(f"scenario file is missing column(s): {', '.join(sorted(missing))}")
+    return table
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def _cmd_add(store, args):
+    for path in args.configs:
+        sha = store.add(cost_model.load_pricing(path))
+        print(f"Added {path} ({sha[:12]})")
+
+
+def _cmd_list(store, args):
+    for v in store.versions():
+        print(f"{v['id']:>4}  {v['version']:<12} updated {v['last_updated']:<12} "
+              f"added {v['added_at']}  {v['sha256'][:12]}")
+
+
+def _cmd_compare(store, args):
+    table = load_scenarios(args.scenarios)
+    started = time.perf_counter()
+    results = store.reprice(table, args.versions, exact=args.exact)
+    elapsed = time.perf_counter() - started
+
+    pd.set_option('display.width', 200)
+    pd.set_option('display.float_format', lambda x: f'{x:,.2f}')
+    print(f"{len(table):,} scenarios x {len(args.versions)} versions re-priced in {elapsed:.3f}s\n")
+    print(component_summary(results, exact=args.exact).to_string())
+
+    if args.output:
+        deltas = scenario_deltas(table, results, args.versions[0], args.versions[-1], exact=args.exact)
+        deltas.to_csv(args.output, index=False)
+        print(f"\nPer-scenario deltas ({args.versions[0]} -> {args.versions[-1]}) written to {args.output}")
+
+
+def _cmd_generate(store, args):
+    pricing = cost_model.load_pricing(args.pricing)
+    pd.DataFrame(batch_model.random_scenarios(pricing, args.count, args.seed)).to_csv(args.output, index=False)
+    print(f"Wrote {args.count:,} scenarios to {args.output}")
+
+
+def _cmd_bench(store, args):
+    """Time a book of scenarios across synthetic versions (scaled copies of the current pricing).
+
+    `store` is an in-memory store (see main), so the versions are never persisted.
+    """
+    base = cost_model.load_pricing(args.pricing)
+    refs = []
+    for i in range(args.versions):
+        pricing = json.loads(json.dumps(base))
+        pricing['version'] = f"bench-{i}"
+        for model in pricing['voice_agent']['models'].values():
+            model['audio_output_per_m_tokens'] *= 1 + 0.02 * i
+        for model in pricing['email_agent']['models'].values():
+            model['output_per_m_tokens'] *= 1 - 0.01 * i
+        store.add(pricing)
+        refs.append(pricing['version'])
+
+    table = batch_model.random_scenarios(base, args.count, args.seed)
+    started = time.perf_counter()
+    store.reprice(table, refs)
+    cold = time.perf_counter() - started
+    started = time.perf_counter()
+    results = store.reprice(table, refs)
+    warm = time.perf_counter() - started
+
+    print(f"{args.count:,} scenarios x {len(refs)} versions: "
+          f"{cold:.3f}s (first run, compiling) / {warm:.3f}s (compiled tables cached)")
+    print(f"Total under {refs[0]}: CHF {results[refs[0]]['combined_total'].sum():,.2f}, "
+          f"under {refs[-1]}: CHF {results[refs[-1]]['combined_total'].sum():,.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pricing version store and re-pricing")
+    parser.add_argument('--store', default=STORE_PATH, help="SQLite store path")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('add', help="Add pricing config file(s) to the store")
+    p.add_argument('configs', nargs='+')
+    p.set_defaults(func=_cmd_add)
+
+    p = sub.add_parser('list', help="List stored versions")
+    p.set_defaults(func=_cmd_list)
+
+    p = sub.add_parser('compare', help="Re-price a scenario set under two or more versions")
+    p.add_argument('scenarios', help="Scenario CSV/JSON with batch_model.SCENARIO_COLUMNS")
+    p.add_argument('versions', nargs='+', help="Version name, sha256 prefix or @YYYY-MM-DD")
+    p.add_argument('--output', help="Write per-scenario deltas (first vs last version) to CSV")
+    p.add_argument('--exact', action='store_true', help="Integer micro-CHF evaluation (fixed_point.py)")
+    p.set_defaults(func=_cmd_compare)
+
+    p = sub.add_parser('generate', help="Write a random scenario set (--store is not touched)")
+    p.add_argument('output')
+    p.add_argument('--count', type=int, default=50_000)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    p.set_defaults(func=_cmd_generate)
+
+    p = sub.add_parser('bench', help="Benchmark re-pricing a book across synthetic versions (in memory; --store is not touched)")
+    p.add_argument('--count', type=int, default=50_000)
+    p.add_argument('--versions', type=int, default=5)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    p.set_defaults(func=_cmd_bench)
+
+    args = parser.parse_args()
+    if args.command == 'compare' and len(args.versions) < 2:
+        parser.error("compare needs at least two versions")
+
+    if args.command == 'generate':
+        args.func(None, args)
+        return
+
+    # The store is append-only: synthetic bench versions go to a throwaway in-memory store
+    store = PricingStore(':memory:' if args.command == 'bench' else args.store)
+    try:
+        args.func(store, args)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
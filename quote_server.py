@@ -0,0 +1,455 @@
+"""
+Local HTTP quoting API for the AI agent cost calculator.
+
+Exposes the same calculators as the Streamlit app (see cost_model.py) over a
+small asyncio HTTP/1.1 server so other tools (e.g. the CRM) can fetch quotes:
+
+    GET  /health
+    POST /quote/voice      {"minutes_per_call": 5, "calls_per_day": 50, ...}
+    POST /quote/email      {"emails_per_day": 50, "polling_minutes": 1, ...}
+    POST /quote/combined   {"voice": {...}, "email": {...}}
+    POST /quote/batch      {"scenarios": [{"type": "voice", ...}, ...]}
+
+The voice/email/combined endpoints also accept GET with query parameters;
+for /quote/combined they are prefixed with the channel
+(/quote/combined?voice.calls_per_day=10&email.emails_per_day=200).
+Connections are kept alive between requests and results are cached on the
+normalized inputs until pricing_config.json changes on disk.
+
+Usage:
+    python quote_server.py --port 8765
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qsl
+
+import cost_model
+
+# ==============================================================================
+# INPUT NORMALIZATION
+# ==============================================================================
+
+# Defaults mirror the sidebar defaults in app.py
+VOICE_DEFAULTS = {
+    'minutes_per_call': 5,
+    'calls_per_day': 50,
+    'model': 'gpt_realtime_mini_global',
+    'num_phones': 1,
+    'min_replicas': 0,
+    'business_hours_only': False,
+    'audio_cache_ratio': 0,
+    'text_cache_ratio': 0
+}
+
+EMAIL_DEFAULTS = {
+    'emails_per_day': 50,
+    'polling_minutes': 1,
+    'model': 'gpt_5_mini_global',
+    'enable_rag': True,
+    'num_pages': 5000,
+    'business_hours_only': False,
+    'input_cache_ratio': 0
+}
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+KEEPALIVE_TIMEOUT = 15
+
+
+class QuoteError(ValueError):
+    """Invalid quote request (reported to the client as HTTP 400)"""
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value != 0
+    if isinstance(value, str) and value.strip().lower() in ('1', 'true', 'yes', 'on'):
+        return True
+    if isinstance(value, str) and value.strip().lower() in ('0', 'false', 'no', 'off', ''):
+        return False
+    raise QuoteError(f"expected a boolean, got {value!r}")
+
+
+def _to_number(name, value, minimum, integer=False):
+    try:
+        number = float(value)
+    except OverflowError:
+        number = math.inf
+    except (TypeError, ValueError):
+        raise QuoteError(f"'{name}' must be a number, got {value!r}")
+    if not math.isfinite(number):
+        # NaN, Infinity and numbers beyond the float range (1e400) in JSON or query strings
+        raise QuoteError(f"'{name}' must be a finite number, got {value!r}")
+    if integer:
+        if number != int(number):
+            raise QuoteError(f"'{name}' must be a whole number, got {value!r}")
+        number = int(number)
+    elif number == int(number):
+        # 5.0 and 5 are the same scenario (shared cache entry)
+        number = int(number)
+    if number < minimum:
+        raise QuoteError(f"'{name}' must be >= {minimum}, got {value!r}")
+    return number
+
+
+def _to_ratio(name, value):
+    ratio = _to_number(name, value, 0)
+    if ratio > 1:
+        raise QuoteError(f"'{name}' must be between 0 and 1, got {value!r}")
+    return ratio
+
+
+def _nest_query(params):
+    """Query parameters 'voice.calls_per_day=10' -> {'voice': {'calls_per_day': '10'}}"""
+    nested = {}
+    for key, value in params.items():
+        prefix, dot, name = key.partition('.')
+        if dot:
+            group = nested.setdefault(prefix, {})
+            if not isinstance(group, dict):
+                raise QuoteError(f"'{prefix}' given both as a value and with '.' parameters")
+            group[name] = value
+        elif key in nested:
+            raise QuoteError(f"'{key}' given both as a value and with '.' parameters")
+        else:
+            nested[key] = value
+    return nested
+
+
+def _content_length(headers):
+    """Body size from the Content-Length header (QuoteError if not a non-negative integer)"""
+    value = headers.get('content-length', '') or '0'
+    if not value.isdigit():
+        raise QuoteError(f"invalid Content-Length {value!r}")
+    return int(value)
+
+
+def _merge(defaults, params):
+    unknown = set(params) - set(defaults) - {'type'}
+    if unknown:
+        raise QuoteError(f"unknown parameter(s): {', '.join(sorted(unknown))}")
+    merged = dict(defaults)
+    merged.update({k: v for k, v in params.items() if k != 'type'})
+    return merged
+
+
+def normalize_voice(pricing, params):
+    """Validate voice quote parameters and return them in canonical form"""
+    p = _merge(VOICE_DEFAULTS, params)
+    if p['model'] not in pricing['voice_agent']['models']:
+        raise QuoteError(f"unknown voice model '{p['model']}'")
+    return (
+        ('minutes_per_call', _to_number('minutes_per_call', p['minutes_per_call'], 0)),
+        ('calls_per_day', _to_number('calls_per_day', p['calls_per_day'], 1)),
+        ('model', p['model']),
+        ('num_phones', _to_number('num_phones', p['num_phones'], 0, integer=True)),
+        ('min_replicas', _to_number('min_replicas', p['min_replicas'], 0, integer=True)),
+        ('business_hours_only', _to_bool(p['business_hours_only'])),
+        ('audio_cache_ratio', _to_ratio('audio_cache_ratio', p['audio_cache_ratio'])),
+        ('text_cache_ratio', _to_ratio('text_cache_ratio', p['text_cache_ratio']))
+    )
+
+
+def normalize_email(pricing, params):
+    """Validate email quote parameters and return them in canonical form"""
+    p = _merge(EMAIL_DEFAULTS, params)
+    if p['model'] not in pricing['email_agent']['models']:
+        raise QuoteError(f"unknown email model '{p['model']}'")
+    enable_rag = _to_bool(p['enable_rag'])
+    return (
+        ('emails_per_day', _to_number('emails_per_day', p['emails_per_day'], 0)),
+        ('polling_minutes', _to_number('polling_minutes', p['polling_minutes'], 1)),
+        ('model', p['model']),
+        ('enable_rag', enable_rag),
+        # Pages only matter when RAG is enabled
+        ('num_pages', _to_number('num_pages', p['num_pages'], 0, integer=True) if enable_rag else 0),
+        ('business_hours_only', _to_bool(p['business_hours_only'])),
+        ('input_cache_ratio', _to_ratio('input_cache_ratio', p['input_cache_ratio']))
+    )
+
+# ==============================================================================
+# QUOTE SERVICE (transport independent)
+# ==============================================================================
+
+class QuoteService:
+    """Computes quotes with an LRU cache keyed on normalized inputs.
+
+    The cache is dropped whenever the pricing file changes on disk, so quotes
+    always reflect the current pricing_config.json.
+    """
+
+    def __init__(self, pricing_path=cost_model.PRICING_PATH, cache_size=10_000, reload_interval=1.0):
+        self.pricing_path = pricing_path
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._pricing_mtime = None
+        self._last_check = 0.0
+        self.pricing = None
+        self.reload_pricing()
+
+    def reload_pricing(self):
+        """Reload pricing if the file changed; returns True when reloaded"""
+        self._last_check = time.monotonic()
+        mtime = os.stat(self.pricing_path).st_mtime_ns
+        if mtime == self._pricing_mtime:
+            return False
+        self.pricing = cost_model.load_pricing(self.pricing_path)
+        self._pricing_mtime = mtime
+        self.cache.clear()
+        return True
+
+    def _check_pricing(self):
+        if time.monotonic() - self._last_check >= self.reload_interval:
+            self.reload_pricing()
+
+    def _cached(self, key, compute):
+        result = self.cache.get(key)
+        if result is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = compute()
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    def quote_voice(self, params):
+        inputs = normalize_voice(self.pricing, params)
+        args = dict(inputs)
+
+        def compute():
+            return cost_model.calculate_voice_cost(
+                self.pricing,
+                args['minutes_per_call'], args['calls_per_day'],
+                args['model'], args['num_phones'], args['min_replicas'],
+                args['business_hours_only'], args['audio_cache_ratio'], args['text_cache_ratio']
+            ).to_dict()
+        return self._cached(('voice', inputs), compute)
+
+    def quote_email(self, params):
+        inputs = normalize_email(self.pricing, params)
+        args = dict(inputs)
+
+        def compute():
+            email = cost_model.calculate_email_cost(
+                self.pricing,
+                args['emails_per_day'], args['polling_minutes'],
+                args['model'], args['enable_rag'], args['num_pages'],
+                args['business_hours_only'], args['input_cache_ratio']
+            )
+            blob = cost_model.calculate_blob_storage_cost(self.pricing, args['num_pages'], args['enable_rag'])
+            return dict(email.to_dict(), blob_storage=blob.to_dict(), total_with_storage=email.total + blob.cost)
+        return self._cached(('email', inputs), compute)
+
+    def quote_combined(self, params):
+        unknown = set(params) - {'voice', 'email', 'type'}
+        if unknown:
+            raise QuoteError(f"unknown parameter(s): {', '.join(sorted(unknown))}")
+        voice_params = params.get('voice') or {}
+        email_params = params.get('email') or {}
+        if not isinstance(voice_params, dict) or not isinstance(email_params, dict):
+            raise QuoteError("'voice' and 'email' must be objects")
+
+        voice = self.quote_voice(voice_params)
+        email = self.quote_email(email_params)
+        return {
+            'voice': voice,
+            'email': email,
+            'totals': cost_model.calculate_combined_totals(voice, email, email['blob_storage'])
+        }
+
+    def quote_batch(self, payload):
+        scenarios = payload.get('scenarios') if isinstance(payload, dict) else None
+        if not isinstance(scenarios, list):
+            raise QuoteError("batch body must be an object with a 'scenarios' list")
+
+        quote_by_type = {
+            'voice': self.quote_voice,
+            'email': self.quote_email,
+            'combined': self.quote_combined
+        }
+        results = []
+        for i, scenario in enumerate(scenarios):
+            if not isinstance(scenario, dict):
+                results.append({'index': i, 'error': 'scenario must be an object'})
+                continue
+            kind = scenario.get('type', 'combined')
+            if kind not in quote_by_type:
+                results.append({'index': i, 'error': f"unknown scenario type '{kind}'"})
+                continue
+            try:
+                results.append({'index': i, 'type': kind, 'result': quote_by_type[kind](scenario)})
+            except QuoteError as e:
+                results.append({'index': i, 'error': str(e)})
+        return {'count': len(results), 'results': results}
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'pricing_version': self.pricing['version'],
+            'pricing_updated': self.pricing['last_updated'],
+            'cache_entries': len(self.cache),
+            'cache_hits': self.hits,
+            'cache_misses': self.misses
+        }
+
+    def handle(self, method, target, body=b''):
+        """Handle one request; returns (status_code, response_dict).
+
+        Pure function of the request, so it can be exercised offline without
+        opening a socket.
+        """
+        self._check_pricing()
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+
+        routes = {
+            '/quote/voice': self.quote_voice,
+            '/quote/email': self.quote_email,
+            '/quote/combined': self.quote_combined,
+            '/quote/batch': self.quote_batch
+        }
+
+        if path == '/health':
+            if method != 'GET':
+                return 405, {'error': 'use GET'}
+            return 200, self.health()
+
+        if path not in routes:
+            return 404, {'error': f'unknown endpoint {path}'}
+
+        try:
+            if method == 'GET' and path != '/quote/batch':
+                params = _nest_query(dict(parse_qsl(url.query)))
+            elif method == 'POST':
+                params = json.loads(body) if body else {}
+            else:
+                return 405, {'error': f'{method} not allowed on {path}'}
+            if not isinstance(params, dict):
+                raise QuoteError('request body must be a JSON object')
+            return 200, routes[path](params)
+        except json.JSONDecodeError as e:
+            return 400, {'error': f'invalid JSON: {e}'}
+        except QuoteError as e:
+            return 400, {'error': str(e)}
+
+# ==============================================================================
+# HTTP/1.1 TRANSPORT
+# ==============================================================================
+
+REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    408: 'Request Timeout', 413: 'Payload Too Large', 500: 'Internal Server Error'
+}
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    ).encode('latin-1')
+    return head + body
+
+
+async def _handle_connection(service, reader, writer):
+    try:
+        while True:
+            try:
+                request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+            if not request_line:
+                break
+
+            parts = request_line.decode('latin-1').split()
+            if len(parts) != 3:
+                writer.write(_response(400, {'error': 'malformed request line'}, False))
+                break
+            method, target, version = parts
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+            try:
+                length = _content_length(headers)
+            except QuoteError as e:
+                # The body cannot be delimited, so the connection cannot be reused
+                writer.write(_response(400, {'error': str(e)}, False))
+                break
+            if length > MAX_BODY_BYTES:
+                writer.write(_response(413, {'error': 'request body too large'}, False))
+                break
+            body = await reader.readexactly(length) if length else b''
+
+            try:
+                status, payload = service.handle(method, target, body)
+            except Exception as e:  # keep the server alive on unexpected errors
+                status, payload = 500, {'error': f'{type(e).__name__}: {e}'}
+
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service, host='127.0.0.1', port=8765):
+    """Start serving quotes; returns the asyncio Server (port 0 picks a free port)"""
+    return await asyncio.start_server(
+        lambda r, w: _handle_connection(service, r, w), host, port
+    )
+
+
+async def _serve_forever(service, host, port):
+    server = await start_server(service, host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Quote API listening on http://{address[0]}:{address[1]} "
+          f"(pricing {service.pricing['version']})")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP quoting API for voice/email agent costs")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--pricing', default=cost_model.PRICING_PATH, help="Path to pricing_config.json")
+    parser.add_argument('--cache-size', type=int, default=10_000, help="Max cached quotes")
+    args = parser.parse_args()
+
+    service = QuoteService(args.pricing, cache_size=args.cache_size)
+    try:
+        asyncio.run(_serve_forever(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Retrieval I/O cost of the RAG knowledge base on blob storage.
+
+calculate_blob_storage_cost() bills the hot-tier GB only. This module adds the
+operations the knowledge base causes on the blob store:
+
+- building the index (one-off) and re-indexing changed pages every month
+  (write operations);
+- retrievals by the email agent (per email) and the voice agent (per call).
+  Each retrieval reads the vector index blobs plus the retrieved text chunks
+  (read operations and GB retrieved);
+- an optional local read cache in front of the blob store. A cache holding
+  share h of the knowledge base (index and chunks) serves share h of the
+  reads; it lives in container memory, billed at the Container Apps memory
+  rate for the whole month.
+
+All functions broadcast over NumPy arrays, so every page count up to the
+50,000-page limit (and several cache hit ratios) is evaluated in one call.
+The assumptions (chunking, index size, retrievals per email / call, monthly
+page changes) are in pricing['shared']['rag_retrieval'].
+
+Usage:
+    python rag_io.py [--config ai_agent_config.json] [--hit-ratio 0.9] [--step 5000]
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+import cost_model
+
+MAX_PAGES = 50_000
+KB_PER_GB = 1024 * 1024
+
+# ==============================================================================
+# VECTORIZED I/O MODEL
+# ==============================================================================
+
+def rag_io_costs(pricing, num_pages, emails_per_day, calls_per_day, cache_hit_ratio=0.0):
+    """Monthly blob I/O of the knowledge base for arrays of inputs (broadcast together)"""
+    b = pricing['shared']['blob_storage']
+    r = pricing['shared']['rag_retrieval']
+    c = pricing['voice_agent']['container_apps']
+    num_pages = np.asarray(num_pages, dtype=float)
+    hit_ratio = np.asarray(cache_hit_ratio, dtype=float)
+
+    # Knowledge base layout
+    chunks = num_pages * r['chunks_per_page']
+    index_blobs = np.ceil(num_pages / r['pages_per_index_blob'])
+    index_gb = num_pages * r['index_kb_per_page'] / KB_PER_GB
+    chunk_gb = chunks * r['kb_per_chunk'] / KB_PER_GB
+
+    # Writes: one-off index build, monthly re-index of changed pages (each
+    # changed page rewrites its chunks and the index blob that holds it)
+    build_writes = chunks + index_blobs
+    changed_pages = num_pages * r['changed_pages_per_month']
+    reindex_writes = changed_pages * r['chunks_per_page'] + np.minimum(np.ceil(changed_pages), index_blobs)
+    build_cost = (build_writes / 10_000) * b['write_operations_per_10k']
+    reindex_cost = (reindex_writes / 10_000) * b['write_operations_per_10k']
+
+    # Reads: every retrieval scans the index and fetches the top chunks
+    retrievals = np.where(
+        num_pages > 0,
+        np.asarray(emails_per_day) * 30 * r['retrievals_per_email'] +
+        np.asarray(calls_per_day) * 30 * r['retrievals_per_call'],
+        0
+    )
+    reads_per_retrieval = index_blobs + np.minimum(r['chunks_per_retrieval'], chunks)
+    gb_per_retrieval = index_gb + np.minimum(r['chunks_per_retrieval'], chunks) * r['kb_per_chunk'] / KB_PER_GB
+    cost_per_retrieval = (reads_per_retrieval / 10_000) * b['read_operations_per_10k'] + \
+                         gb_per_retrieval * b['data_retrieval_per_gb']
+
+    # Local cache: share h of the reads never reach the blob store
+    blob_share = 1 - hit_ratio
+    read_operations = retrievals * reads_per_retrieval * blob_share
+    gb_read = retrievals * gb_per_retrieval * blob_share
+    read_cost = (read_operations / 10_000) * b['read_operations_per_10k']
+    retrieval_cost = gb_read * b['data_retrieval_per_gb']
+    cache_gb = hit_ratio * (index_gb + chunk_gb)
+    cache_cost = cache_gb * c['memory_gb_active_per_second'] * c['seconds_per_month']
+
+    return {
+        'chunks': chunks,
+        'index_blobs': index_blobs,
+        'build_writes': build_writes,
+        'build_cost': build_cost,
+        'reindex_writes': reindex_writes,
+        'reindex_cost': reindex_cost,
+        'retrievals': retrievals,
+        'read_operations': read_operations,
+        'gb_read': gb_read,
+        'read_cost': read_cost,
+        'retrieval_cost': retrieval_cost,
+        'cost_per_retrieval': cost_per_retrieval,
+        'cache_gb': cache_gb,
+        'cache_cost': cache_cost,
+        'monthly': reindex_cost + read_cost + retrieval_cost + cache_cost
+    }
+
+
+def cache_break_even(pricing, num_pages, emails_per_day, calls_per_day, hit_ratio):
+    """Monthly I/O with and without a read cache across page counts (one batched evaluation).
+
+    Returns one row per page count with the saving of a cache at `hit_ratio`
+    and the retrievals per month above which such a cache pays for itself.
+    """
+    num_pages = np.asarray(num_pages, dtype=float)
+    costs = rag_io_costs(pricing, num_pages[:, None], emails_per_day, calls_per_day,
+                         np.array([0.0, hit_ratio])[None, :])
+    b = pricing['shared']['blob_storage']
+    storage_gb = (num_pages * b['mb_per_page'] / 1024) * b['index_overhead_multiplier']
+
+    # A cache saves h x cost_per_retrieval per retrieval and costs cache_cost
+    saved_per_retrieval = hit_ratio * costs['cost_per_retrieval'][:, 0]
+    cache_cost = costs['cache_cost'][:, 1]
+    break_even = np.where(saved_per_retrieval > 0, cache_cost / np.where(saved_per_retrieval > 0,
+                                                                         saved_per_retrieval, 1), np.inf)
+    return pd.DataFrame({
+        'pages': num_pages.astype(int),
+        'storage_cost': storage_gb * b['hot_tier_per_gb_month'],
+        'build_cost': costs['build_cost'][:, 0],
+        'reindex_cost': costs['reindex_cost'][:, 0],
+        'retrievals': costs['retrievals'][:, 0],
+        'read_cost': costs['read_cost'][:, 0] + costs['retrieval_cost'][:, 0],
+        'io_no_cache': costs['monthly'][:, 0],
+        'io_with_cache': costs['monthly'][:, 1],
+        'cache_gb': costs['cache_gb'][:, 1],
+        'saving': costs['monthly'][:, 0] - costs['monthly'][:, 1],
+        'break_even_retrievals': break_even
+    })
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def _page_ranges(pages, mask):
+    """(first, last) page counts of each run of consecutive table rows where mask is true"""
+    ranges, in_run = [], False
+    for page, on in zip(pages.astype(int), mask):
+        if on and in_run:
+            ranges[-1] = (ranges[-1][0], page)
+        elif on:
+            ranges.append((page, page))
+        in_run = bool(on)
+    return ranges
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG retrieval I/O cost and read-cache break-even")
+    parser.add_argument('--config', help="Configuration export JSON (default: 50 emails and 50 calls per day)")
+    parser.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    parser.add_argument('--hit-ratio', type=float, default=0.9, help="Read cache hit ratio (0-1)")
+    parser.add_argument('--step', type=int, default=5_000, help="Page-count step of the printed table")
+    args = parser.parse_args()
+
+    pricing = cost_model.load_pricing(args.pricing)
+    emails_per_day, calls_per_day = 50, 50
+    if args.config:
+        with open(args.config, 'r') as f:
+            inputs = cost_model.parse_config_export(pricing, json.load(f))
+        emails_per_day = inputs['email']['emails_per_day'] if inputs['email']['enable_rag'] else 0
+        calls_per_day = inputs['voice']['calls_per_day']
+
+    pages = np.arange(0, MAX_PAGES + 1, 100)
+    table = cache_break_even(pricing, pages, emails_per_day, calls_per_day, args.hit_ratio)
+
+    pd.set_option('display.width', 200)
+    print(f"{emails_per_day} emails/day, {calls_per_day} calls/day, cache hit ratio {args.hit_ratio:.0%}\n")
+    print(table[table['pages'] % args.step == 0].to_string(index=False, float_format=lambda x: f'{x:,.4f}'))
+
+    pays_off = table[table['saving'] > 0]
+    if pays_off.empty:
+        row = table.iloc[-1]
+        print(f"\nA read cache does not pay for itself at any page count up to {MAX_PAGES:,}. "
+              f"At {MAX_PAGES:,} pages it would need {row['break_even_retrievals']:,.0f} retrievals/month "
+              f"(now {row['retrievals']:,.0f}).")
+    else:
+        best = pays_off.loc[pays_off['saving'].idxmax()]
+        ranges = ', '.join(f"{first:,}" if first == last else f"{first:,}-{last:,}"
+                           for first, last in _page_ranges(table['pages'], table['saving'] > 0))
+        print(f"\nA read cache pays for itself at {ranges} pages (largest saving CHF {best['saving']:,.4f}/month "
+              f"at {int(best['pages']):,} pages).")
+
+
+if __name__ == '__main__':
+    main()
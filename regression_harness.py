@@ -0,0 +1,498 @@
+"""
+Golden-result, fuzz and latency checks for every implementation of the cost model.
+
+- golden: the worked examples of TECHNICAL_DOCUMENTATION.md (section 5
+  presets and the 4.3 / 6.3 edge cases) with their documented results;
+- fuzz: random scenarios over the whole input domain, including zero
+  volumes and the ends of every range. Checks that no component is negative,
+  that every total is the sum of its parts, that costs do not fall when a
+  volume grows, and that all implementations agree with calculate_*_cost;
+- timing: per-call latency of every calculator against LATENCY_BUDGETS_US;
+- api: an in-process quote server rejects invalid numbers (NaN, Infinity,
+  1e400) and Content-Length headers with HTTP 400 (per scenario in batches)
+  and answers GET quotes, including prefixed /quote/combined parameters.
+
+Implementations: cost_model (scalar calculators, the reference), cost_graph
+(incremental graph), lookup_table (precomputed tables, inside their domain),
+batch_model (NumPy) and fixed_point (integer micro-CHF).
+
+Prints one line per check and exits with status 1 if any check fails, so it
+can be run before committing a change to the model.
+
+Usage:
+    python regression_harness.py [--fuzz 5000] [--seed 0] [--skip timing] [--budget-scale 2]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import batch_model
+import cost_model
+import fixed_point
+import lookup_table
+import quote_server
+from cost_graph import build_cost_graph
+
+COMPONENTS = batch_model.COMPONENTS
+
+# Whole -> parts (batch_model.COMPONENTS names)
+PARTS = {
+    'voice_container': ('voice_container_vcpu', 'voice_container_memory', 'voice_container_requests'),
+    'voice_total': ('voice_phone', 'voice_acs', 'voice_container', 'voice_audio_input', 'voice_audio_output',
+                    'voice_text_input', 'voice_text_output'),
+    'email_functions': ('email_execution', 'email_compute'),
+    'email_llm': ('email_llm_input', 'email_llm_output'),
+    'email_total': ('email_functions', 'email_llm'),
+    'combined_total': ('voice_total', 'email_total', 'blob_storage')
+}
+
+# Volume input -> step, and the component that must not decrease
+MONOTONE = {
+    'voice_calls_per_day': (1, 'voice_total'),
+    'voice_minutes_per_call': (1, 'voice_total'),
+    'email_emails_per_day': (1, 'email_total'),
+    'email_num_pages': (100, 'blob_storage')
+}
+
+# Median latency per call, microseconds (batch_model / fixed_point: per scenario of a 100k batch)
+LATENCY_BUDGETS_US = {
+    'cost_model.voice': 40,
+    'cost_model.email': 25,
+    'cost_model.blob': 5,
+    'cost_graph.update': 600,
+    'lookup_table.voice': 40,
+    'lookup_table.email': 25,
+    'batch_model.scenario': 5,
+    'fixed_point.scenario': 10
+}
+
+FLOAT_TOLERANCE = 1e-9   # relative, float implementations vs cost_model
+FIXED_TOLERANCE = 2e-5   # CHF, micro-CHF rounding of up to ~10 components
+
+# ==============================================================================
+# GOLDEN CASES
+# ==============================================================================
+
+def _scenario(voice=(), email=()):
+    """Scenario row: sidebar defaults overridden by `voice` / `email` (calculator parameter names)"""
+    row = {
+        'voice_minutes_per_call': 5, 'voice_calls_per_day': 50, 'voice_model_key': 'gpt_realtime_mini_global',
+        'voice_num_phones': 1, 'voice_min_replicas': 0, 'voice_business_hours': False,
+        'voice_audio_cache_ratio': 0.0, 'voice_text_cache_ratio': 0.0,
+        'email_emails_per_day': 50, 'email_polling_minutes': 1, 'email_model_key': 'gpt_5_mini_global',
+        'email_enable_rag': True, 'email_num_pages': 5000, 'email_business_hours': False,
+        'email_input_cache_ratio': 0.0
+    }
+    for channel, values in (('voice', dict(voice)), ('email', dict(email))):
+        for name, value in values.items():
+            row[batch_model.INPUT_COLUMNS[channel][name]] = value
+    return row
+
+
+# (name, scenario, {component: documented value}, tolerance in CHF). The
+# documented values are rounded to 0.001-0.01 CHF; phone + ACS is one figure
+# in the documentation ('voice_phone_acs').
+GOLDEN = [
+    ("5.1 Small Business", _scenario(
+        dict(minutes_per_call=5, calls_per_day=20, model_key='gpt_realtime_mini_global', num_phones=1, min_replicas=0),
+        dict(emails_per_day=30, polling_minutes=5, model_key='gpt_5_mini_global', num_pages=2000)),
+     {'voice_container': 0.0, 'voice_ai_audio': 76.416, 'voice_ai_text': 1.094, 'voice_phone_acs': 24.80,
+      'voice_total': 102.31, 'email_functions': 0.0, 'email_llm': 1.08, 'blob_storage': 0.016,
+      'combined_total': 103.41}, 0.006),
+    ("5.2 Medium Business", _scenario(
+        dict(minutes_per_call=7, calls_per_day=100, model_key='gpt_4o_realtime_global', num_phones=2, min_replicas=1),
+        dict(emails_per_day=150, polling_minutes=1, model_key='gpt_5_mini_global', num_pages=10000)),
+     {'voice_container': 18.317, 'voice_ai_audio': 2139.247, 'voice_ai_text': 45.364, 'voice_phone_acs': 169.60,
+      'voice_total': 2372.53, 'email_functions': 0.0, 'email_llm': 5.40, 'blob_storage': 0.079,
+      'combined_total': 2378.01}, 0.006),
+    ("5.3 Enterprise (calls exceed operating hours)", _scenario(
+        dict(minutes_per_call=10, calls_per_day=300, model_key='gpt_4o_realtime_global', num_phones=5, min_replicas=3),
+        dict(emails_per_day=500, polling_minutes=1, model_key='gpt_5_global', num_pages=30000)),
+     {'voice_container': 194.40, 'voice_ai_audio': 9168.199, 'voice_ai_text': 136.091, 'voice_phone_acs': 724.00,
+      'voice_total': 10222.69, 'email_functions': 0.0, 'email_llm': 89.70, 'blob_storage': 0.237,
+      'combined_total': 10312.63}, 0.006),
+    ("1.1 Serverless container (50 calls/day)", _scenario(),
+     {'voice_container_vcpu': 2.592, 'voice_container_memory': 0.216, 'voice_container_requests': 0.0,
+      'voice_container': 2.808}, 0.0005),
+    ("1.1 Always-on container (50 calls/day, 1 replica)", _scenario(dict(min_replicas=1)),
+     {'voice_container': 10.541}, 0.0005),
+    ("4.2 Serverless vCPU exactly at the free tier", _scenario(dict(calls_per_day=20)),
+     {'voice_container_vcpu': 0.0, 'voice_container_memory': 0.0}, 1e-9),
+    ("4.2 Serverless memory exactly at the free tier", _scenario(dict(calls_per_day=40)),
+     {'voice_container_vcpu': 1.728, 'voice_container_memory': 0.0}, 1e-9),
+    ("6.3-1 Zero calls", _scenario(dict(calls_per_day=0, num_phones=1)),
+     {'voice_acs': 0.0, 'voice_container': 0.0, 'voice_ai_audio': 0.0, 'voice_ai_text': 0.0,
+      'voice_cost_per_call': 0.0, 'voice_total': 0.80}, 1e-9),
+    ("6.3-2 Calls exceed operating hours (idle time clamped at 0)",
+     _scenario(dict(minutes_per_call=30, calls_per_day=500, model_key='gpt_4o_realtime_global', min_replicas=3)),
+     {'voice_container': 972.00}, 1e-6),
+    ("6.3-3 Business hours polling (5 min)", _scenario(email=dict(polling_minutes=5, business_hours_only=True)),
+     {'email_checks': 227.3 * 60 / 5, 'email_functions': 0.0}, 1e-6),
+    ("6.3-4 RAG disabled", _scenario(email=dict(enable_rag=False, num_pages=5000)),
+     {'blob_storage': 0.0, 'email_llm': 1500 * (500 * 0.20 + 500 * 1.60) / 1e6}, 1e-9),
+    ("4.3 Zero emails", _scenario(email=dict(emails_per_day=0)),
+     {'email_llm': 0.0, 'email_cost_per_email': 0.0, 'email_functions': 0.0}, 1e-9)
+]
+
+# Push ingestion (calculate_email_cost / calculate_email_latency only):
+# (name, emails_per_day, emails_per_execution, {field: documented value}, tolerance)
+PUSH_GOLDEN = [
+    ("2.1 Push, per email (50 emails/day)", 50, 1, {'checks': 1511, 'average_latency': 13, 'worst_latency': 13}, 1e-9),
+    ("2.1 Push, up to 10 per batch at low volume (one execution per email)", 50, 10,
+     {'checks': 1511, 'average_latency': 43, 'worst_latency': 73}, 1e-9),
+    ("2.1 Push, 10 per batch once windows fill (14,400 emails/day)", 14_400, 10,
+     {'checks': 43_211, 'worst_latency': 10 + 54 + 3}, 1e-9)
+]
+
+# ==============================================================================
+# IMPLEMENTATIONS
+# ==============================================================================
+
+def _row(table, i):
+    return {column: values[i].item() for column, values in table.items()}
+
+
+def _calculator_args(row):
+    """Scenario row -> (voice, email) calculator keyword arguments"""
+    return tuple({name: row[column] for name, column in batch_model.INPUT_COLUMNS[channel].items()}
+                 for channel in ('voice', 'email'))
+
+
+def _extras(voice, email):
+    """Result fields checked by the golden cases that are not cost components"""
+    return {'voice_ai_audio': voice['ai_audio'], 'voice_ai_text': voice['ai_text'],
+            'voice_phone_acs': voice['phone'] + voice['acs'], 'voice_cost_per_call': voice['cost_per_call'],
+            'email_checks': email['checks'], 'email_cost_per_email': email['cost_per_email']}
+
+
+class Implementations:
+    """Every implementation of the model for one pricing config, with a common result layout"""
+
+    def __init__(self, pricing, table_dir):
+        self.pricing = pricing
+        self.compiled = batch_model.compile_pricing(pricing)
+        self.fixed = fixed_point.compile_fixed_pricing(pricing)
+        self.graph = build_cost_graph(pricing)
+        self.lookup = lookup_table.LookupTable(lookup_table.build(pricing, table_dir))
+
+    def cost_model(self, row):
+        voice, email = _calculator_args(row)
+        v = cost_model.calculate_voice_cost(self.pricing, **voice)
+        e = cost_model.calculate_email_cost(self.pricing, **email)
+        b = cost_model.calculate_blob_storage_cost(self.pricing, email['num_pages'], email['enable_rag'])
+        return {**batch_model.scenario_components(v, e, b), **_extras(v, e)}
+
+    def cost_graph(self, row):
+        self.graph.set_inputs(**row)
+        v, e = self.graph.voice_results(), self.graph.email_results()
+        return {**batch_model.scenario_components(v, e, self.graph.blob_results()), **_extras(v, e)}
+
+    def lookup_table(self, row):
+        voice, email = _calculator_args(row)
+        v = self.lookup.voice(*voice.values())
+        e = self.lookup.email(*email.values())
+        b = self.lookup.blob(email['num_pages'], email['enable_rag'])
+        if v is None or e is None or b is None:
+            return None
+        return {**batch_model.scenario_components(v, e, b), **_extras(v, e)}
+
+    def batch_model(self, table):
+        return batch_model.evaluate_scenarios(self.compiled, table)
+
+    def fixed_point(self, table):
+        return {k: fixed_point.to_chf(v) for k, v in fixed_point.evaluate_scenarios_micro(self.fixed, table).items()}
+
+    def evaluate(self, table):
+        """{implementation: {component: array}} for a scenario table (NaN where a lookup is out of domain)"""
+        count = len(table['voice_calls_per_day'])
+        results = {'batch_model': self.batch_model(table), 'fixed_point': self.fixed_point(table)}
+        for name in ('cost_model', 'cost_graph', 'lookup_table'):
+            rows = [getattr(self, name)(_row(table, i)) for i in range(count)]
+            keys = next((r for r in rows if r is not None), {})
+            results[name] = {key: np.array([np.nan if r is None else r[key] for r in rows], dtype=float)
+                             for key in keys}
+        return results
+
+# ==============================================================================
+# CHECKS
+# ==============================================================================
+
+class Report:
+    def __init__(self):
+        self.failures = 0
+
+    def check(self, name, ok, detail=''):
+        self.failures += not ok
+        print(f"  {'ok  ' if ok else 'FAIL'}  {name}" + (f"  ({detail})" if detail else ''))
+
+
+def _table(rows):
+    return {column: np.array([row[column] for row in rows]) for column in rows[0]}
+
+
+def check_golden(impls, report):
+    print("Golden results (TECHNICAL_DOCUMENTATION.md)")
+    results = impls.evaluate(_table([scenario for _, scenario, _, _ in GOLDEN]))
+    for i, (name, _, expected, tolerance) in enumerate(GOLDEN):
+        errors = []
+        for impl, components in results.items():
+            for key, value in expected.items():
+                if key not in components or np.isnan(components[key][i]):
+                    continue
+                if abs(components[key][i] - value) > tolerance:
+                    errors.append(f"{impl}.{key} = {components[key][i]:,.6f}, documented {value:,.6f}")
+        report.check(name, not errors, '; '.join(errors[:3]))
+
+    for name, emails_per_day, batch, expected, tolerance in PUSH_GOLDEN:
+        email = _calculator_args(_scenario(email=dict(emails_per_day=emails_per_day)))[1]
+        result = cost_model.calculate_email_cost(impls.pricing, **email, ingestion='push', emails_per_execution=batch)
+        average, worst = cost_model.calculate_email_latency(
+            impls.pricing, emails_per_day, email['polling_minutes'], email['business_hours_only'], 'push', batch)
+        actual = {'checks': result['checks'], 'average_latency': average, 'worst_latency': worst}
+        errors = [f"{key} = {actual[key]:,.6f}, documented {value:,.6f}"
+                  for key, value in expected.items() if abs(actual[key] - value) > tolerance]
+        report.check(name, not errors, '; '.join(errors))
+
+    # Structured result rows keep fractional volumes (quote API inputs) like the scalar records
+    voice = dict(minutes_per_call=2.33, calls_per_day=1.5, model_key='gpt_realtime_mini_global', num_phones=1,
+                 min_replicas=0, business_hours_only=False)
+    email = dict(emails_per_day=2.5, polling_minutes=5, model_key='gpt_5_mini_global', enable_rag=True,
+                 num_pages=0, business_hours_only=False)
+    cp = impls.compiled
+    records = (
+        (batch_model.voice_records(cp, *(np.array([v]) for v in (2.33, 1.5)),
+                                   cp.model_indices(np.array([voice['model_key']]), 'voice'),
+                                   np.array([1]), np.array([0]), np.array([False]))[0],
+         cost_model.calculate_voice_cost(impls.pricing, **voice)),
+        (batch_model.email_records(cp, np.array([2.5]), np.array([5]),
+                                   cp.model_indices(np.array([email['model_key']]), 'email'),
+                                   np.array([True]), np.array([False]))[0],
+         cost_model.calculate_email_cost(impls.pricing, **email))
+    )
+    errors = [f"{name} = {row[name]}, scalar {scalar[name]}" for row, scalar in records for name in row.dtype.names
+              if abs(float(row[name]) - scalar[name]) > FLOAT_TOLERANCE * (1 + abs(scalar[name]))]
+    report.check("Structured records match the scalar records (fractional volumes)", not errors,
+                 '; '.join(errors[:3]))
+
+
+def fuzz_scenarios(pricing, count, seed=0):
+    """Random scenarios over the whole input domain, with zero volumes and range ends over-represented"""
+    rng = np.random.default_rng(seed)
+    table = batch_model.random_scenarios(pricing, count, seed)
+    table['voice_calls_per_day'] = rng.integers(0, 501, count)
+    table['email_emails_per_day'] = rng.integers(0, 1001, count)
+    edges = {'voice_calls_per_day': (0, 500), 'voice_minutes_per_call': (1, 30), 'voice_min_replicas': (0, 10),
+             'email_emails_per_day': (0, 1000), 'email_num_pages': (0, 50_000)}
+    for column, ends in edges.items():
+        pick = rng.random(count) < 0.05
+        table[column] = np.where(pick, rng.choice(ends, count), table[column])
+    table['email_num_pages'] = np.where(table['email_enable_rag'], table['email_num_pages'], 0)
+    # Lookup tables only cover uncached traffic: keep a share of scenarios inside their domain
+    uncached = rng.random(count) < 0.25
+    for column in ('voice_audio_cache_ratio', 'voice_text_cache_ratio', 'email_input_cache_ratio'):
+        table[column] = np.where(uncached, 0.0, table[column])
+    return table
+
+
+def check_fuzz(impls, count, seed, report):
+    print(f"Fuzz ({count:,} random scenarios, seed {seed})")
+    table = fuzz_scenarios(impls.pricing, count, seed)
+    results = impls.evaluate(table)
+    reference = results['cost_model']
+
+    for impl, components in results.items():
+        negative = [c for c in COMPONENTS if np.nanmin(components[c]) < 0]
+        report.check(f"{impl}: no negative components", not negative, ', '.join(negative))
+
+        tolerance = FIXED_TOLERANCE if impl == 'fixed_point' else 1e-9
+        broken = []
+        for whole, parts in PARTS.items():
+            error = np.abs(components[whole] - sum(components[p] for p in parts))
+            if np.nanmax(error) > tolerance * (1 + np.nanmax(np.abs(components[whole]))):
+                broken.append(f"{whole} off by {np.nanmax(error):.3g}")
+        report.check(f"{impl}: totals equal the sum of their parts", not broken, '; '.join(broken))
+
+        if impl == 'cost_model':
+            continue
+        worst = 0.0
+        for c in COMPONENTS:
+            error = np.abs(components[c] - reference[c])
+            allowed = FIXED_TOLERANCE if impl == 'fixed_point' else FLOAT_TOLERANCE * (1 + np.abs(reference[c]))
+            worst = max(worst, float(np.nanmax(error / allowed)))
+        covered = int(np.sum(~np.isnan(components['combined_total'])))
+        report.check(f"{impl}: agrees with cost_model", worst <= 1, f"{covered:,} scenarios, "
+                     f"worst error {worst:.2g} x tolerance")
+
+    for column, (step, component) in MONOTONE.items():
+        grown = dict(table)
+        grown[column] = table[column] + step
+        if column == 'email_num_pages':
+            grown[column] = np.where(table['email_enable_rag'], grown[column], 0)
+        before = batch_model.evaluate_scenarios(impls.compiled, table)[component]
+        after = batch_model.evaluate_scenarios(impls.compiled, grown)[component]
+        falls = int(np.sum(after < before - 1e-9 * (1 + np.abs(before))))
+        report.check(f"{component} does not fall when {column} grows by {step}", not falls,
+                     f"{falls:,} scenarios" if falls else '')
+
+
+def _median_us(func, args_list):
+    timings = np.empty(len(args_list))
+    for i, args in enumerate(args_list):
+        started = time.perf_counter_ns()
+        func(*args)
+        timings[i] = time.perf_counter_ns() - started
+    return float(np.median(timings)) / 1000
+
+
+def check_timing(impls, count, seed, budget_scale, report):
+    print(f"Latency (median per call; budgets x{budget_scale:g})")
+    table = fuzz_scenarios(impls.pricing, count, seed)
+    rows = [_row(table, i) for i in range(count)]
+    args = [_calculator_args(row) for row in rows]
+    pricing = impls.pricing
+
+    measured = {
+        'cost_model.voice': _median_us(lambda v: cost_model.calculate_voice_cost(pricing, **v),
+                                       [(v,) for v, _ in args]),
+        'cost_model.email': _median_us(lambda e: cost_model.calculate_email_cost(pricing, **e),
+                                       [(e,) for _, e in args]),
+        'cost_model.blob': _median_us(lambda e: cost_model.calculate_blob_storage_cost(pricing, e['num_pages'],
+                                                                                       e['enable_rag']),
+                                      [(e,) for _, e in args]),
+        'cost_graph.update': _median_us(lambda row: (impls.graph.set_inputs(**row),
+                                                     impls.graph.get('combined_total')), [(row,) for row in rows]),
+        'lookup_table.voice': _median_us(lambda v: impls.lookup.voice(*v.values()),
+                                         [(v,) for v, _ in args if v['calls_per_day'] > 0]),
+        'lookup_table.email': _median_us(lambda e: impls.lookup.email(*e.values()),
+                                         [(e,) for _, e in args if e['emails_per_day'] > 0]),
+    }
+    batch = fuzz_scenarios(pricing, 100_000, seed + 1)
+    for name, evaluate in (('batch_model.scenario', impls.batch_model), ('fixed_point.scenario', impls.fixed_point)):
+        started = time.perf_counter()
+        evaluate(batch)
+        measured[name] = (time.perf_counter() - started) * 1e6 / 100_000
+
+    for name, budget in LATENCY_BUDGETS_US.items():
+        allowed = budget * budget_scale
+        report.check(f"{name}: {measured[name]:,.1f} µs (budget {allowed:,.0f} µs)", measured[name] <= allowed)
+
+# Requests the quote API must reject with 400 (never 500 or a dropped
+# connection): non-finite and out-of-range numbers as JSON literals or query
+# strings, and Content-Length headers that do not delimit a body.
+# (method, target, body, Content-Length header or None for len(body))
+INVALID_QUOTES = [
+    ('POST', '/quote/voice', b'{"calls_per_day": NaN}', None),
+    ('POST', '/quote/voice', b'{"minutes_per_call": Infinity}', None),
+    ('POST', '/quote/voice', b'{"calls_per_day": 1e400}', None),
+    ('POST', '/quote/voice', b'{"num_phones": 1' + b'0' * 400 + b'}', None),
+    ('POST', '/quote/email', b'{"input_cache_ratio": -Infinity}', None),
+    ('POST', '/quote/combined', b'{"email": {"emails_per_day": NaN}}', None),
+    ('GET', '/quote/voice?calls_per_day=nan', b'', None),
+    ('GET', '/quote/email?emails_per_day=inf', b'', None),
+    ('GET', '/quote/email?num_pages=1e400', b'', None),
+    ('GET', '/quote/combined?voice.calls_per_day=inf', b'', None),
+    ('POST', '/quote/voice', b'{}', 'abc'),
+    ('POST', '/quote/voice', b'{}', '-5')
+]
+
+# Valid GET quotes: (target, path in the response, expected value)
+VALID_QUOTES = [
+    ('/quote/voice?calls_per_day=10', ('calls',), 300),
+    ('/quote/combined?voice.calls_per_day=10&email.emails_per_day=200', ('voice', 'calls'), 300),
+    ('/quote/combined?voice.calls_per_day=10&email.emails_per_day=200', ('email', 'emails'), 6000)
+]
+
+
+async def _http(port, method, target, body=b'', content_length=None):
+    """One request on a fresh connection; returns (status, JSON response or None)"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    length = len(body) if content_length is None else content_length
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {length}\r\n"
+                 "Connection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), 10)
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    if not head:
+        return None, None
+    return int(head.split()[1]), json.loads(payload) if payload else None
+
+
+async def _quote_api_results(pricing_path):
+    service = quote_server.QuoteService(pricing_path)
+    server = await quote_server.start_server(service, port=0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        invalid = [await _http(port, *case) for case in INVALID_QUOTES]
+        valid = [await _http(port, 'GET', target) for target, _, _ in VALID_QUOTES]
+        scenarios = [{'type': 'voice', 'calls_per_day': float('nan')}, {'type': 'voice'},
+                     {'type': 'email', 'emails_per_day': 1e400}, {'type': 'combined'}]
+        batch = await _http(port, 'POST', '/quote/batch', json.dumps({'scenarios': scenarios}).encode())
+    finally:
+        server.close()
+        await server.wait_closed()
+    return invalid, valid, batch
+
+
+def check_quote_api(pricing_path, report):
+    print("Quote API input validation (in-process server)")
+    invalid, valid, (status, response) = asyncio.run(_quote_api_results(pricing_path))
+
+    for (method, target, body, content_length), (status_, response_) in zip(INVALID_QUOTES, invalid):
+        header = f" Content-Length: {content_length}" if content_length is not None else ''
+        detail = response_['error'][:60] if status_ == 400 else f"{status_}: {response_}"
+        report.check(f"{method} {target} {body[:40].decode()}{header} -> 400", status_ == 400, detail)
+
+    for (target, path, expected), (status_, response_) in zip(VALID_QUOTES, valid):
+        value = response_
+        for key in path if status_ == 200 else ():
+            value = value[key]
+        report.check(f"GET {target} -> {'.'.join(path)} = {expected}", status_ == 200 and value == expected,
+                     f"{status_}: {value}")
+
+    # NaN / Infinity literals in the body (json.dumps writes them)
+    errors = [r['index'] for r in (response or {}).get('results', []) if 'error' in r]
+    report.check("/quote/batch rejects only the non-finite scenarios", status == 200 and errors == [0, 2],
+                 f"{status}, errors in scenarios {errors}")
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden, fuzz and latency checks of every cost model implementation")
+    parser.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    parser.add_argument('--fuzz', type=int, default=5_000, help="Random scenarios for the fuzz checks")
+    parser.add_argument('--timing-calls', type=int, default=2_000, help="Calls per calculator for the latency checks")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip', nargs='*', default=[], choices=['golden', 'fuzz', 'timing', 'api'])
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help="Multiply the latency budgets (slower machines, profilers)")
+    args = parser.parse_args()
+
+    pricing = cost_model.load_pricing(args.pricing)
+    report = Report()
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as table_dir:
+        impls = Implementations(pricing, table_dir)
+        if 'golden' not in args.skip:
+            check_golden(impls, report)
+        if 'fuzz' not in args.skip:
+            check_fuzz(impls, args.fuzz, args.seed, report)
+        if 'timing' not in args.skip:
+            check_timing(impls, args.timing_calls, args.seed, args.budget_scale, report)
+        if 'api' not in args.skip:
+            check_quote_api(args.pricing, report)
+
+    print(f"\n{report.failures} failure(s) in {time.perf_counter() - started:.1f}s")
+    sys.exit(1 if report.failures else 0)
+
+
+if __name__ == '__main__':
+    main()
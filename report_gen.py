@@ -0,0 +1,457 @@
+"""
+Offline per-customer cost reports (static HTML).
+
+Each report holds what the Streamlit tabs show for one configuration export:
+voice, email and combined metrics, the cost distribution pie charts, the
+breakdown / model / channel comparison tables, the free tier status of
+Container Apps and Functions, the serverless vs always-on and polling
+frequency comparisons, and the optimization recommendations. Reports are rendered by a pool of worker processes; each
+worker loads pricing_config.json and builds its cost graph once, and the page
+and chart templates are built once per process. plotly.js is written once to
+the output directory and shared by all reports.
+
+Usage:
+    python report_gen.py render customers.json --out reports/ --workers 8
+    python report_gen.py render exports/ --out reports/        # one JSON export per file
+    python report_gen.py sample customers.json --count 500
+"""
+
+import argparse
+import glob
+import hashlib
+import html
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from string import Template
+
+import numpy as np
+from plotly.offline import get_plotlyjs
+
+import batch_model
+import cost_model
+from cost_graph import build_cost_graph
+
+PLOTLY_JS = 'plotly.min.js'
+
+# Push micro-batch sizes in the polling comparison (the dashboard's default)
+PUSH_BATCHES = (1, 10)
+
+# ==============================================================================
+# TEMPLATES
+# ==============================================================================
+
+PAGE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<script src="$plotly_js"></script>
+<style>
+body { font-family: -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; margin: 2em auto; max-width: 1100px; color: #262730; }
+h1 { margin-bottom: 0.2em; } h2 { margin-top: 1.6em; border-bottom: 1px solid #ddd; padding-bottom: 0.2em; }
+.meta { color: #808495; }
+.metrics { display: flex; gap: 1em; flex-wrap: wrap; }
+.metric { flex: 1; min-width: 180px; border: 1px solid #e6e6e6; border-radius: 6px; padding: 0.6em 1em; }
+.metric .label { color: #808495; font-size: 0.9em; } .metric .value { font-size: 1.6em; }
+table { border-collapse: collapse; margin: 0.8em 0; width: 100%; }
+th, td { border: 1px solid #e6e6e6; padding: 0.35em 0.7em; text-align: left; } th { background: #f6f7f9; }
+.chart { height: 420px; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+<p class="meta">Pricing $pricing_version ($pricing_date) · generated $generated</p>
+$body
+</body>
+</html>
+""")
+
+CHART = Template('<div id="$div" class="chart"></div>\n'
+                 '<script>Plotly.newPlot("$div", $data, $layout, {"displayModeBar": false});</script>')
+
+PIE_LAYOUT = {'height': 420, 'margin': {'t': 30, 'b': 30}}
+PIE_TRACE = {'type': 'pie', 'hole': 0.3, 'textinfo': 'label+percent',
+             'texttemplate': '%{label}<br>%{percent}<br>CHF %{value:.2f}'}
+COMBINED_PIE_TRACE = {'type': 'pie', 'hole': 0.4, 'textinfo': 'label+percent',
+                      'texttemplate': '%{label}<br>%{percent}'}
+CHANNEL_BAR_LAYOUT = {'height': 420, 'barmode': 'stack', 'yaxis': {'title': {'text': 'Monthly Cost (CHF)'}},
+                      'xaxis': {'title': {'text': 'Channel'}}, 'margin': {'t': 30}}
+CHANNEL_BARS = (('Voice Agent', '#2962ff'), ('Email Agent', '#00bfa5'), ('Shared (Blob Storage)', '#ff6f00'))
+
+
+def _chart(div, traces, layout):
+    return CHART.substitute(div=div, data=json.dumps(traces), layout=json.dumps(layout))
+
+
+def _pie(div, parts, trace=PIE_TRACE):
+    parts = {k: v for k, v in parts.items() if v > 0}
+    return _chart(div, [{**trace, 'labels': list(parts), 'values': list(parts.values())}], PIE_LAYOUT)
+
+
+def _metrics(items):
+    cells = ''.join(f'<div class="metric"><div class="label">{html.escape(label)}</div>'
+                    f'<div class="value">{html.escape(value)}</div></div>' for label, value in items)
+    return f'<div class="metrics">{cells}</div>'
+
+
+def _table(rows):
+    if not rows:
+        return ''
+    head = ''.join(f'<th>{html.escape(column)}</th>' for column in rows[0])
+    body = ''.join('<tr>' + ''.join(f'<td>{html.escape(str(v))}</td>' for v in row.values()) + '</tr>'
+                   for row in rows)
+    return f'<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+def _free_tier(rows):
+    """Free tier status table from (resource, used, free) like the metrics of the dashboard"""
+    table = []
+    for resource, used, free in rows:
+        pct = used / free * 100
+        status = "🔴 Exceeded" if pct >= 100 else "⚠️ Approaching limit" if pct >= 90 else "✅ Within free tier"
+        table.append({"Resource": resource, "Usage": f"{pct:.1f}%", "Used / Free": f"{used:,.0f} / {free:,}",
+                      "Status": status})
+    return _table(table)
+
+# ==============================================================================
+# WORKER
+# ==============================================================================
+
+# Per-process state, set once by _init_worker
+_worker = {}
+
+
+def _init_worker(pricing_path):
+    pricing = cost_model.load_pricing(pricing_path)
+    _worker['pricing'] = pricing
+    _worker['graph'] = build_cost_graph(pricing)
+
+
+def _graph_inputs(inputs):
+    voice, email = inputs['voice'], inputs['email']
+    return dict(
+        voice_minutes_per_call=voice['minutes_per_call'],
+        voice_calls_per_day=voice['calls_per_day'],
+        voice_model_key=voice['model_key'],
+        voice_num_phones=voice['num_phones'],
+        voice_min_replicas=voice['min_replicas'],
+        voice_business_hours=voice['business_hours_only'],
+        voice_audio_cache_ratio=voice['audio_cache_ratio'],
+        voice_text_cache_ratio=voice['text_cache_ratio'],
+        email_emails_per_day=email['emails_per_day'],
+        email_polling_minutes=email['polling_minutes'],
+        email_model_key=email['model_key'],
+        email_enable_rag=email['enable_rag'],
+        email_num_pages=email['num_pages'],
+        email_business_hours=email['business_hours_only'],
+        email_input_cache_ratio=email['input_cache_ratio']
+    )
+
+
+def render_report(pricing, graph, customer, export):
+    """HTML report for one configuration export"""
+    inputs = cost_model.parse_config_export(pricing, export)
+    graph.set_inputs(**_graph_inputs(inputs))
+    voice, email = inputs['voice'], inputs['email']
+    v = graph.voice_results()
+    e = graph.email_results()
+    blob = graph.blob_results()['cost']
+    combined = graph.get('combined_total')
+    sections = []
+
+    # Voice ---------------------------------------------------------------
+    voice_parts = {
+        "AI Audio Processing": v['ai_audio'],
+        "AI Text Reasoning": v['ai_text'],
+        "Phone Calls (ACS)": v['acs'],
+        "Container - Compute": v.container_vcpu + v.container_memory,
+        "Container - Requests": v.container_requests,
+        "Phone Numbers": v['phone']
+    }
+    voice_models = []
+    for key, model in pricing['voice_agent']['models'].items():
+        r = cost_model.calculate_voice_cost(pricing, **{**voice, 'model_key': key})
+        voice_models.append({"Model": model['name'], "Monthly Cost": f"CHF {r['total']:,.2f}",
+                             "Cost per Call": f"CHF {r['cost_per_call']:.2f}", "AI Cost": f"CHF {r['ai_total']:.2f}"})
+    container = pricing['voice_agent']['container_apps']
+    replica_rows = []
+    for replicas in (0, 1, 2, 3):
+        r = cost_model.calculate_voice_cost(pricing, **{**voice, 'min_replicas': replicas})
+        name = ("Serverless (0 replicas)" if replicas == 0
+                else f"Always-on ({replicas} replica{'s' if replicas > 1 else ''})")
+        replica_rows.append({"Configuration": name + (" ← current" if replicas == voice['min_replicas'] else ''),
+                             "Monthly Cost": f"CHF {r['total']:,.2f}", "Container Cost": f"CHF {r['container']:.2f}",
+                             "Cold Start": "5-15 sec" if replicas == 0 else "None"})
+    sections.append('<h2>📞 Voice Agent</h2>' + _metrics([
+        ("Monthly Cost", f"CHF {v['total']:,.2f}"),
+        ("Cost per Call", f"CHF {v['cost_per_call']:.2f}"),
+        ("Monthly Calls", f"{v['calls']:,}"),
+        ("Total Minutes", f"{v['minutes']:,}")
+    ]) + _pie('voice_pie', voice_parts) + _table([
+        {"Service": service, "Monthly Cost": f"CHF {cost:.2f}",
+         "% of Total": f"{cost / v['total'] * 100:.1f}%" if v['total'] else "N/A",
+         "Cost per Call": f"CHF {cost / v['calls']:.4f}" if v['calls'] else "N/A"}
+        for service, cost in voice_parts.items() if cost > 0
+    ]) + '<h3>Model Comparison at Current Volume</h3>' + _table(voice_models)
+        + '<h3>🎁 Container Apps Free Tier Status</h3>' + _free_tier([
+            ("vCPU", v.vcpu_seconds, container['free_vcpu_seconds_per_month']),
+            ("Memory", v.gb_seconds, container['free_gb_seconds_per_month']),
+            ("Requests", v.requests, container['free_requests_per_month'])
+        ]) + '<h3>⚡ Serverless vs Always-On Comparison</h3>' + _table(replica_rows))
+
+    # Email ---------------------------------------------------------------
+    email_parts = {"AI Model (LLM)": e['llm'], "Azure Functions": e['functions'], "Blob Storage": blob}
+    email_models = []
+    for key, model in pricing['email_agent']['models'].items():
+        r = cost_model.calculate_email_cost(pricing, **{**email, 'model_key': key})
+        email_models.append({"Model": model['name'], "Monthly Cost": f"CHF {r['total']:.2f}",
+                             "Cost per Email": f"CHF {r['cost_per_email']:.4f}", "LLM Cost": f"CHF {r['llm']:.2f}"})
+    email_total = e['total'] + blob
+    functions = pricing['email_agent']['azure_functions']
+    polling_rows = []
+    ingestion = [(f"Poll every {minutes} min", dict(polling_minutes=minutes), (minutes, email['business_hours_only']))
+                 for minutes in batch_model.POLLING_OPTIONS]
+    ingestion += [("Push (per email)" if batch == 1 else f"Push (up to {batch} emails/execution)",
+                   dict(ingestion='push', emails_per_execution=batch),
+                   (email['polling_minutes'], email['business_hours_only'], 'push', batch))
+                  for batch in PUSH_BATCHES]
+    for name, options, latency_args in ingestion:
+        r = cost_model.calculate_email_cost(pricing, **{**email, **options})
+        average, worst = cost_model.calculate_email_latency(pricing, email['emails_per_day'], *latency_args)
+        current = options.get('polling_minutes') == email['polling_minutes']
+        polling_rows.append({"Ingestion": name + (" ← current" if current else ''),
+                             "Executions/Month": f"{r['checks']:,.0f}", "Functions Cost": f"CHF {r['functions']:.2f}",
+                             "Total Cost": f"CHF {r['total']:.2f}", "Avg. Latency": f"{average:.0f} s",
+                             "Worst Latency": f"{worst:.0f} s"})
+    sections.append('<h2>📧 Email Agent</h2>' + _metrics([
+        ("Monthly Cost", f"CHF {email_total:,.2f}"),
+        ("Cost per Email", f"CHF {e['cost_per_email']:.4f}"),
+        ("Monthly Emails", f"{e['emails']:,}"),
+        ("Manual Pages", f"{email['num_pages']:,}") if email['enable_rag'] else ("RAG", "Disabled")
+    ]) + _pie('email_pie', email_parts) + _table([
+        {"Service": service, "Monthly Cost": f"CHF {cost:.2f}",
+         "% of Total": f"{cost / email_total * 100:.1f}%" if email_total else "N/A"}
+        for service, cost in email_parts.items() if cost > 0
+    ]) + '<h3>🎁 Azure Functions Free Tier Status</h3>' + _free_tier([
+        ("Executions", e['checks'], functions['free_executions_per_month']),
+        ("Compute (GB-seconds)", e['gb_seconds'], functions['free_gb_seconds_per_month'])
+    ]) + '<h3>Model Comparison at Current Volume</h3>' + _table(email_models)
+        + '<h3>⏱️ Polling Frequency Impact</h3>' + _table(polling_rows))
+
+    # Combined ------------------------------------------------------------
+    voice_pct, email_pct, blob_pct = graph.get('voice_pct'), graph.get('email_pct'), graph.get('blob_pct')
+    bars = [{'type': 'bar', 'name': name, 'marker': {'color': color},
+             'x': ['Voice', 'Email', 'Shared', 'Total'], 'y': y}
+            for (name, color), y in zip(CHANNEL_BARS, ([v['total'], 0, 0, v['total']],
+                                                      [0, e['total'], 0, e['total']],
+                                                      [0, 0, blob, blob]))]
+    recommendations = graph.get('recommendations')
+    sections.append('<h2>💰 Combined Monthly Costs</h2>' + _metrics([
+        ("Total Cost", f"CHF {combined:,.2f}"),
+        ("Voice Agent", f"CHF {v['total']:,.2f} ({voice_pct:.0f}%)"),
+        ("Email Agent", f"CHF {e['total']:,.2f} ({email_pct:.0f}%)"),
+        ("Avg Cost/Interaction", f"CHF {graph.get('avg_cost_per_interaction'):.3f}")
+    ]) + _chart('channel_bars', bars, CHANNEL_BAR_LAYOUT) + _table([
+        {"Channel": "Voice Call", "Monthly Volume": f"{v['calls']:,} calls",
+         "Cost per Interaction": f"CHF {v['cost_per_call']:.2f}", "Monthly Cost": f"CHF {v['total']:.2f}",
+         "% of Total": f"{voice_pct:.1f}%"},
+        {"Channel": "Email", "Monthly Volume": f"{e['emails']:,} emails",
+         "Cost per Interaction": f"CHF {e['cost_per_email']:.4f}", "Monthly Cost": f"CHF {e['total']:.2f}",
+         "% of Total": f"{email_pct:.1f}%"},
+        {"Channel": "Shared Storage",
+         "Monthly Volume": f"{email['num_pages']:,} pages" if email['enable_rag'] else "N/A",
+         "Cost per Interaction": "N/A", "Monthly Cost": f"CHF {blob:.2f}", "% of Total": f"{blob_pct:.1f}%"}
+    ]) + _pie('combined_pie', {
+        "Voice - AI Audio": v['ai_audio'],
+        "Voice - AI Text": v['ai_text'],
+        "Voice - Phone Calls": v['acs'],
+        "Voice - Container": v['container'],
+        "Voice - Phone Numbers": v['phone'],
+        "Email - AI Model": e['llm'],
+        "Email - Functions": e['functions'],
+        "Shared - Blob Storage": blob
+    }, COMBINED_PIE_TRACE) + '<h3>💡 Cost Optimization Recommendations</h3>' + (_table([
+        {"Channel": rec['Channel'], "Suggestion": rec['Suggestion'],
+         "Potential Savings": f"CHF {rec['Savings']:.2f}/month", "Impact": rec['Impact']}
+        for rec in recommendations
+    ]) if recommendations else '<p>✅ The configuration is well-optimized.</p>'))
+
+    return PAGE.substitute(
+        title=html.escape(f"Cost Report: {customer}"),
+        plotly_js=PLOTLY_JS,
+        pricing_version=html.escape(str(pricing['version'])),
+        pricing_date=html.escape(str(pricing['last_updated'])),
+        generated=datetime.now().isoformat(timespec='seconds'),
+        body='\n'.join(sections)
+    )
+
+
+def _render_batch(batch, out_dir):
+    """Render and write a batch of (customer, export, file name) in a worker; returns per-report latencies"""
+    results = []
+    for customer, export, file_name in batch:
+        started = time.perf_counter()
+        try:
+            page = render_report(_worker['pricing'], _worker['graph'], customer, export)
+            with open(os.path.join(out_dir, file_name), 'w', encoding='utf-8') as f:
+                f.write(page)
+            error = None
+        except (KeyError, ValueError, TypeError) as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        results.append((customer, time.perf_counter() - started, error))
+    return results
+
+# ==============================================================================
+# BATCH GENERATION
+# ==============================================================================
+
+def _safe_name(customer):
+    return ''.join(c if c.isalnum() or c in '-_.' else '_' for c in str(customer))
+
+
+def report_file_names(customers):
+    """Report file name per customer. Names that would collide after sanitizing
+    ('Acme AG' and 'Acme/AG'), also case-insensitively, get a short hash of the
+    customer name so no report overwrites another."""
+    names = [_safe_name(customer) for customer in customers]
+    counts = Counter(name.lower() for name in names)
+    seen = Counter()
+    files = []
+    for customer, name in zip(customers, names):
+        if counts[name.lower()] > 1:
+            # The same customer listed twice also gets distinct files (occurrence in the hash)
+            key = f"{customer}" if not seen[customer] else f"{customer}#{seen[customer]}"
+            name = f"{name}-{hashlib.sha1(key.encode()).hexdigest()[:8]}"
+        seen[customer] += 1
+        files.append(f"{name}.html")
+    return files
+
+
+def load_customers(path):
+    """[(customer, export)] from a directory of exports, a JSON file or a JSON lines file.
+
+    A JSON file may be {customer: export} or a list of exports (named by their
+    'customer' key, else by position).
+    """
+    if os.path.isdir(path):
+        customers = []
+        for file in sorted(glob.glob(os.path.join(path, '*.json'))):
+            with open(file, 'r') as f:
+                customers.append((os.path.splitext(os.path.basename(file))[0], json.load(f)))
+        return customers
+    with open(path, 'r') as f:
+        if path.endswith('.jsonl'):
+            data = [json.loads(line) for line in f if line.strip()]
+        else:
+            data = json.load(f)
+    if isinstance(data, dict):
+        return list(data.items())
+    return [(export.get('customer', f'customer_{i:05d}'), export) for i, export in enumerate(data)]
+
+
+def generate_reports(customers, out_dir, pricing_path=cost_model.PRICING_PATH, workers=None, batch_size=8):
+    """Render all reports with a process pool; returns (wall seconds, [(customer, latency, error)])"""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, PLOTLY_JS), 'w', encoding='utf-8') as f:
+        f.write(get_plotlyjs())
+
+    names = report_file_names([customer for customer, _ in customers])
+    jobs = [(customer, export, name) for (customer, export), name in zip(customers, names)]
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pricing_path,)) as pool:
+        for batch_results in pool.map(_render_batch, batches, [out_dir] * len(batches)):
+            results.extend(batch_results)
+    return time.perf_counter() - started, results
+
+
+def sample_customers(pricing, count, seed=0):
+    """{customer: export} drawn from the sidebar input domain"""
+    table = batch_model.random_scenarios(pricing, count, seed)
+    voice_models = pricing['voice_agent']['models']
+    email_models = pricing['email_agent']['models']
+    customers = {}
+    for i in range(count):
+        row = {column: values[i].item() for column, values in table.items()}
+        customers[f'customer_{i:05d}'] = {
+            "version": pricing['version'],
+            "voice_agent": {
+                "calls_per_day": row['voice_calls_per_day'],
+                "minutes_per_call": row['voice_minutes_per_call'],
+                "model": voice_models[row['voice_model_key']]['name'],
+                "model_key": row['voice_model_key'],
+                "phone_numbers": row['voice_num_phones'],
+                "min_replicas": row['voice_min_replicas'],
+                "business_hours_only": row['voice_business_hours'],
+                "audio_cache_ratio": round(row['voice_audio_cache_ratio'], 2),
+                "text_cache_ratio": round(row['voice_text_cache_ratio'], 2)
+            },
+            "email_agent": {
+                "emails_per_day": row['email_emails_per_day'],
+                "polling_minutes": row['email_polling_minutes'],
+                "business_hours_only": row['email_business_hours'],
+                "model": email_models[row['email_model_key']]['name'],
+                "model_key": row['email_model_key'],
+                "manual_pages": row['email_num_pages'],
+                "rag_enabled": row['email_enable_rag'],
+                "input_cache_ratio": round(row['email_input_cache_ratio'], 2)
+            }
+        }
+    return customers
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def _cmd_render(args):
+    customers = load_customers(args.scenarios)
+    wall, results = generate_reports(customers, args.out, args.pricing, args.workers, args.batch_size)
+
+    latencies = np.array([latency for _, latency, error in results if error is None])
+    failed = [(customer, error) for customer, _, error in results if error is not None]
+    print(f"{len(latencies):,} reports written to {args.out} in {wall:.2f}s "
+          f"({len(latencies) / wall:,.1f} reports/s)")
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        print(f"Per-report latency: mean {latencies.mean() * 1000:.1f} ms, p50 {p50:.1f} ms, "
+              f"p95 {p95:.1f} ms, p99 {p99:.1f} ms, max {latencies.max() * 1000:.1f} ms")
+    for customer, error in failed:
+        print(f"  FAILED {customer}: {error}")
+
+
+def _cmd_sample(args):
+    customers = sample_customers(cost_model.load_pricing(args.pricing), args.count, args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(customers, f, indent=1)
+    print(f"Wrote {args.count:,} customer configurations to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch per-customer HTML cost reports")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('render', help="Render one report per customer")
+    p.add_argument('scenarios', help="Directory of exports, or JSON / JSON lines file of exports")
+    p.add_argument('--out', default='reports', help="Output directory")
+    p.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    p.add_argument('--batch-size', type=int, default=8, help="Reports per task sent to a worker")
+    p.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    p.set_defaults(func=_cmd_render)
+
+    p = sub.add_parser('sample', help="Write random customer configurations")
+    p.add_argument('output')
+    p.add_argument('--count', type=int, default=500)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    p.set_defaults(func=_cmd_sample)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""
+Sensitivity of the total monthly cost to every input and pricing parameter.
+
+The scalar calculators in cost_model.py are run once with every number
+(sidebar inputs and every numeric value in pricing_config.json) wrapped in a
+reverse-mode automatic differentiation variable. A single backward sweep then
+gives the exact partial derivative of the combined total with respect to all
+parameters at once; no calculator is re-run per parameter.
+
+Free tiers are implemented as `if used > free: (used - free) * rate else 0`,
+so the derivative is taken on the branch that applies at the current values
+(inside a free tier the usage parameters have no marginal cost). Every such
+comparison is recorded as a kink, with the change in each parameter that
+would cross it.
+
+Usage:
+    python sensitivity.py [--config ai_agent_config.json] [--top 20]
+"""
+
+import argparse
+import json
+from contextlib import contextmanager
+
+import pandas as pd
+
+import cost_model
+
+# ==============================================================================
+# REVERSE-MODE AUTOMATIC DIFFERENTIATION
+# ==============================================================================
+
+_comparisons = None
+
+
+class Var:
+    """A number that remembers how it was computed (for backward derivatives)"""
+
+    __slots__ = ('value', 'parents', 'name')
+
+    def __init__(self, value, name=None, parents=()):
+        self.value = float(value)
+        self.name = name
+        self.parents = parents
+
+    def __repr__(self):
+        return f"Var({self.value!r}, {self.name!r})" if self.name else f"Var({self.value!r})"
+
+    def __float__(self):
+        return self.value
+
+    def __format__(self, spec):
+        return format(self.value, spec)
+
+    # Arithmetic -------------------------------------------------------------
+
+    def __add__(self, other):
+        if isinstance(other, Var):
+            return Var(self.value + other.value, parents=((self, 1.0), (other, 1.0)))
+        return Var(self.value + other, parents=((self, 1.0),))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Var):
+            return Var(self.value - other.value, parents=((self, 1.0), (other, -1.0)))
+        return Var(self.value - other, parents=((self, 1.0),))
+
+    def __rsub__(self, other):
+        return Var(other - self.value, parents=((self, -1.0),))
+
+    def __mul__(self, other):
+        if isinstance(other, Var):
+            return Var(self.value * other.value, parents=((self, other.value), (other, self.value)))
+        return Var(self.value * other, parents=((self, float(other)),))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, Var):
+            return Var(self.value / other.value,
+                       parents=((self, 1.0 / other.value), (other, -self.value / other.value ** 2)))
+        return Var(self.value / other, parents=((self, 1.0 / other),))
+
+    def __rtruediv__(self, other):
+        return Var(other / self.value, parents=((self, -other / self.value ** 2),))
+
+    def __neg__(self):
+        return Var(-self.value, parents=((self, -1.0),))
+
+    # Comparisons (branch on the current value; Var-vs-Var orderings are kinks)
+
+    def _compare(self, other, op, result):
+        if _comparisons is not None and isinstance(other, Var):
+            _comparisons.append((self, other, op, result))
+        return result
+
+    def __lt__(self, other):
+        return self._compare(other, '<', self.value < float(other))
+
+    def __le__(self, other):
+        return self._compare(other, '<=', self.value <= float(other))
+
+    def __gt__(self, other):
+        return self._compare(other, '>', self.value > float(other))
+
+    def __ge__(self, other):
+        return self._compare(other, '>=', self.value >= float(other))
+
+    def __eq__(self, other):
+        return self.value == float(other)
+
+    def __ne__(self, other):
+        return self.value != float(other)
+
+    def __bool__(self):
+        return self.value != 0
+
+    __hash__ = object.__hash__
+
+
+def gradients(output):
+    """d output / d node for every node the output depends on (keyed by id)"""
+    order = []
+    seen = set()
+    stack = [(output, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        stack.append((node, True))
+        for parent, _ in node.parents:
+            if id(parent) not in seen:
+                stack.append((parent, False))
+
+    grads = {id(output): 1.0}
+    for node in reversed(order):
+        grad = grads.get(id(node), 0.0)
+        if grad == 0.0:
+            continue
+        for parent, local in node.parents:
+            grads[id(parent)] = grads.get(id(parent), 0.0) + grad * local
+    return grads
+
+
+@contextmanager
+def record_comparisons():
+    global _comparisons
+    previous, _comparisons = _comparisons, []
+    try:
+        yield _comparisons
+    finally:
+        _comparisons = previous
+
+
+def _wrap(value, name, leaves):
+    """Replace every number in a (nested) structure with a named Var"""
+    if isinstance(value, dict):
+        return {key: _wrap(item, f'{name}.{key}' if name else key, leaves) for key, item in value.items()}
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        leaf = Var(value, name)
+        leaves.append(leaf)
+        return leaf
+    return value
+
+# ==============================================================================
+# COST SENSITIVITIES
+# ==============================================================================
+
+def _input_name(channel, key):
+    return f'{channel}.{key}'
+
+
+def cost_sensitivities(pricing, voice_inputs, email_inputs):
+    """Exact partial derivatives and elasticities of the combined monthly total.
+
+    voice_inputs / email_inputs are calculator keyword arguments (as returned
+    by cost_model.parse_config_export). Returns {'total', 'parameters',
+    'kinks'}; 'parameters' has one row per parameter that affects the total.
+    """
+    leaves = []
+    pricing_vars = _wrap(pricing, '', leaves)
+    voice = {key: _wrap(value, _input_name('voice', key), leaves) for key, value in voice_inputs.items()}
+    email = {key: _wrap(value, _input_name('email', key), leaves) for key, value in email_inputs.items()}
+
+    with record_comparisons() as comparisons:
+        voice_results = cost_model.calculate_voice_cost(pricing_vars, **voice)
+        email_results = cost_model.calculate_email_cost(pricing_vars, **email)
+        blob_results = cost_model.calculate_blob_storage_cost(pricing_vars, email['num_pages'], email['enable_rag'])
+        total = voice_results['total'] + email_results['total'] + blob_results['cost']
+
+    total_value = float(total)
+    grads = gradients(total) if isinstance(total, Var) else {}
+
+    rows = []
+    for leaf in leaves:
+        derivative = grads.get(id(leaf), 0.0)
+        if derivative == 0.0:
+            continue
+        rows.append({
+            'parameter': leaf.name,
+            'value': leaf.value,
+            'derivative': derivative,
+            'elasticity': derivative * leaf.value / total_value if total_value else 0.0,
+            'impact_10pct': derivative * leaf.value * 0.1
+        })
+    parameters = pd.DataFrame(rows, columns=['parameter', 'value', 'derivative', 'elasticity', 'impact_10pct'])
+    parameters = parameters.reindex(parameters['impact_10pct'].abs().sort_values(ascending=False).index)
+
+    return {
+        'total': total_value,
+        'parameters': parameters.reset_index(drop=True),
+        'kinks': _kinks(comparisons, leaves)
+    }
+
+
+def _kinks(comparisons, leaves):
+    """Free-tier style branch points and the parameter change that would cross each"""
+    rows = []
+    for left, right, op, result in comparisons:
+        margin = left - right
+        grads = gradients(margin)
+        # Relative change of each usage parameter that brings the margin to zero
+        crossings = []
+        for leaf in leaves:
+            derivative = grads.get(id(leaf), 0.0)
+            if derivative == 0.0 or leaf.value == 0.0 or leaf is right:
+                continue
+            change = -margin.value / derivative / leaf.value
+            if change > -1:
+                crossings.append((abs(change), change, leaf.name))
+        crossings.sort()
+        threshold = right.name or left.name or 'threshold'
+        rows.append({
+            'kink': threshold,
+            'usage': left.value,
+            'threshold': right.value,
+            'state': 'above' if result else 'inside free tier',
+            'nearest_parameter': crossings[0][2] if crossings else None,
+            'change_to_cross_pct': crossings[0][1] * 100 if crossings else None
+        })
+    return pd.DataFrame(rows, columns=['kink', 'usage', 'threshold', 'state', 'nearest_parameter',
+                                       'change_to_cross_pct'])
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact cost sensitivities (partial derivatives, elasticities)")
+    parser.add_argument('--config', help="Configuration export JSON (default: sidebar defaults)")
+    parser.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    parser.add_argument('--top', type=int, default=20, help="Number of parameters to show")
+    args = parser.parse_args()
+
+    pricing = cost_model.load_pricing(args.pricing)
+    export = cost_model.DEFAULT_EXPORT
+    if args.config:
+        with open(args.config, 'r') as f:
+            export = json.load(f)
+    inputs = cost_model.parse_config_export(pricing, export)
+    result = cost_sensitivities(pricing, inputs['voice'], inputs['email'])
+
+    pd.set_option('display.width', 200)
+    print(f"Combined total: CHF {result['total']:,.2f}/month\n")
+    print(result['parameters'].head(args.top).to_string(index=False, float_format=lambda x: f'{x:,.6g}'))
+    print("\nFree-tier kinks")
+    print(result['kinks'].to_string(index=False, float_format=lambda x: f'{x:,.6g}'))
+
+
+if __name__ == '__main__':
+    main()
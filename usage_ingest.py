@@ -0,0 +1,473 @@
+"""
+Reconcile cost estimates against actual usage exports.
+
+Streams large local usage logs in fixed-size chunks (memory stays bounded by
+the chunk size, not the file size), aggregates them to the same components
+that calculate_voice_cost / calculate_email_cost return, prices the actual
+usage with pricing_config.json and reports the per-component error of the
+estimate.
+
+Log formats (CSV, CSV.gz or JSON lines; extra columns are ignored):
+
+    calls      timestamp, duration_seconds
+    tokens     timestamp, model, token_type, input_tokens, output_tokens[,
+               cached_input_tokens]
+               model is a key from pricing_config.json; token_type is
+               'audio' or 'text' for realtime voice models (email models
+               are always text); cached_input_tokens is the part of
+               input_tokens served from the prompt cache
+    functions  timestamp, duration_ms[, memory_mb]
+
+Usage:
+    python usage_ingest.py reconcile --config ai_agent_config.json \\
+        --calls cdr.csv --tokens tokens.csv.gz --functions functions.jsonl
+    python usage_ingest.py sample --config ai_agent_config.json --out logs/
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+import cost_model
+
+CHUNK_ROWS = 1_000_000
+
+# ==============================================================================
+# STREAMING READERS
+# ==============================================================================
+
+LOG_COLUMNS = {
+    'calls': ('timestamp', 'duration_seconds'),
+    'tokens': ('timestamp', 'model', 'token_type', 'input_tokens', 'output_tokens', 'cached_input_tokens'),
+    'functions': ('timestamp', 'duration_ms', 'memory_mb')
+}
+
+LOG_DTYPES = {
+    'tokens': {'model': 'category', 'token_type': 'category'}
+}
+
+
+def _timestamp_range(series):
+    """(first, last) of a timestamp column as UTC ISO 8601 strings.
+
+    Values are parsed before taking min/max: raw strings with mixed UTC
+    offsets or fractional seconds do not sort chronologically.
+    """
+    series = pd.to_datetime(series, utc=True, format='ISO8601', errors='coerce').dropna()
+    if series.empty:
+        return None
+    return series.min().isoformat(), series.max().isoformat()
+
+
+def summarize_chunk(kind, chunk, default_memory_gb):
+    """Aggregate one chunk of a log into a small partial total"""
+    partial = {'rows': len(chunk)}
+    if 'timestamp' in chunk:
+        partial['range'] = _timestamp_range(chunk['timestamp'])
+
+    if kind == 'calls':
+        partial['calls'] = len(chunk)
+        partial['call_seconds'] = float(chunk['duration_seconds'].sum())
+    elif kind == 'tokens':
+        if 'token_type' not in chunk:
+            chunk = chunk.assign(token_type='text')
+        if 'cached_input_tokens' not in chunk:
+            chunk = chunk.assign(cached_input_tokens=0)
+        sums = chunk.groupby(['model', 'token_type'], sort=False, observed=True)[
+            ['input_tokens', 'output_tokens', 'cached_input_tokens']].sum()
+        partial['tokens'] = {
+            (str(model), str(token_type)): (int(row['input_tokens']), int(row['output_tokens']),
+                                            int(row['cached_input_tokens']))
+            for (model, token_type), row in sums.iterrows()
+        }
+    else:
+        seconds = chunk['duration_ms'].to_numpy(dtype=float) / 1000
+        if 'memory_mb' in chunk:
+            memory_gb = chunk['memory_mb'].fillna(default_memory_gb * 1024).to_numpy(dtype=float) / 1024
+        else:
+            memory_gb = default_memory_gb
+        partial['executions'] = len(chunk)
+        partial['gb_seconds'] = float(np.sum(seconds * memory_gb))
+    return partial
+
+
+def _read_chunks(path, columns, chunksize, dtypes=None):
+    """Yield DataFrame chunks with only the requested columns"""
+    if path.endswith(('.jsonl', '.jsonl.gz', '.ndjson')):
+        for chunk in pd.read_json(path, lines=True, chunksize=chunksize, dtype=dtypes, convert_dates=False):
+            yield chunk[[c for c in columns if c in chunk.columns]]
+    else:
+        yield from pd.read_csv(path, usecols=lambda c: c in columns, dtype=dtypes,
+                               chunksize=chunksize, engine='c', encoding='utf-8-sig')
+
+
+def _csv_blocks(path, block_bytes):
+    """Split an uncompressed CSV into newline-aligned (start, end) byte ranges after the header.
+
+    Returns None if the body contains quote characters: a quoted field may
+    span lines, so raw newlines are not safe split points.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        start = f.tell()
+        while True:
+            data = f.read(block_bytes)
+            if not data:
+                break
+            if b'"' in data:
+                return None
+        blocks = []
+        while start < size:
+            f.seek(min(start + block_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            blocks.append((start, end))
+            start = end
+    names = next(csv.reader([header.decode('utf-8-sig')]), [])
+    return [name.strip() for name in names], blocks
+
+
+def _summarize_block(kind, path, names, start, end, default_memory_gb):
+    """Worker: parse one byte range of a CSV and aggregate it"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    columns = LOG_COLUMNS[kind]
+    chunk = pd.read_csv(io.BytesIO(data), header=None, names=names, usecols=[c for c in names if c in columns],
+                        dtype=LOG_DTYPES.get(kind), engine='c')
+    return summarize_chunk(kind, chunk, default_memory_gb)
+
+
+class UsageTotals:
+    """Running sums over all ingested log chunks"""
+
+    def __init__(self):
+        self.calls = 0
+        self.call_seconds = 0.0
+        # (model, token_type) -> [input_tokens, output_tokens, cached_input_tokens]
+        self.tokens = defaultdict(lambda: [0, 0, 0])
+        self.executions = 0
+        self.gb_seconds = 0.0
+        self.first_seen = None
+        self.last_seen = None
+        self.bytes_read = 0
+        self.rows_read = 0
+
+    def add(self, partial):
+        self.rows_read += partial['rows']
+        self.calls += partial.get('calls', 0)
+        self.call_seconds += partial.get('call_seconds', 0.0)
+        self.executions += partial.get('executions', 0)
+        self.gb_seconds += partial.get('gb_seconds', 0.0)
+        for key, counts in partial.get('tokens', {}).items():
+            entry = self.tokens[key]
+            for i, count in enumerate(counts):
+                entry[i] += count
+        if partial.get('range'):
+            first, last = partial['range']
+            self.first_seen = first if self.first_seen is None else min(self.first_seen, first)
+            self.last_seen = last if self.last_seen is None else max(self.last_seen, last)
+
+    def period_days(self):
+        if self.first_seen is None:
+            return None
+        first, last = pd.to_datetime([self.first_seen, self.last_seen], utc=True, format='ISO8601')
+        return max((last - first).total_seconds() / 86400, 1 / 24)
+
+
+def ingest(kind, path, totals, default_memory_gb=0.5, chunksize=CHUNK_ROWS, workers=None,
+           block_bytes=64 * 1024 * 1024):
+    """Stream one log file into the running totals.
+
+    Uncompressed CSVs without quoted fields are split into byte ranges parsed
+    by a process pool (at most two blocks in flight per worker, so memory
+    stays bounded); other files are read sequentially in chunks of
+    `chunksize` rows.
+    """
+    workers = workers or os.cpu_count() or 1
+    split = _csv_blocks(path, block_bytes) if path.endswith('.csv') and workers > 1 else None
+    if split:
+        names, blocks = split
+        with ProcessPoolExecutor(workers) as pool:
+            pending = set()
+            for start, end in blocks:
+                pending.add(pool.submit(_summarize_block, kind, path, names, start, end, default_memory_gb))
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        totals.add(future.result())
+            for future in pending:
+                totals.add(future.result())
+    else:
+        for chunk in _read_chunks(path, LOG_COLUMNS[kind], chunksize, LOG_DTYPES.get(kind)):
+            totals.add(summarize_chunk(kind, chunk, default_memory_gb))
+    totals.bytes_read += os.path.getsize(path)
+
+# ==============================================================================
+# PRICING ACTUAL USAGE
+# ==============================================================================
+
+def _free_tier(used, free, billable_cost):
+    return billable_cost(used - free) if used > free else 0
+
+
+def actual_costs(pricing, totals, scale):
+    """Price actual usage (scaled to a 30-day month) per calculator component"""
+    acs = pricing['voice_agent']['acs']
+    voice_models = pricing['voice_agent']['models']
+    email_models = pricing['email_agent']['models']
+    functions = pricing['email_agent']['azure_functions']
+
+    minutes = totals.call_seconds / 60 * scale
+    costs = {
+        'voice': {'acs': minutes * acs['inbound_per_minute'],
+                  'audio_input': 0.0, 'audio_output': 0.0, 'text_input': 0.0, 'text_output': 0.0},
+        'email': {'llm_input': 0.0, 'llm_output': 0.0}
+    }
+    usage = {
+        'calls': totals.calls * scale,
+        'minutes': minutes,
+        'audio_input_tokens': 0.0, 'audio_output_tokens': 0.0,
+        'text_input_tokens': 0.0, 'text_output_tokens': 0.0,
+        'email_input_tokens': 0.0, 'email_output_tokens': 0.0,
+        'audio_cached_tokens': 0.0, 'text_cached_tokens': 0.0, 'email_cached_tokens': 0.0,
+        'executions': totals.executions * scale,
+        'gb_seconds': totals.gb_seconds * scale
+    }
+    unknown_models = set()
+
+    for (model_key, token_type), (input_tokens, output_tokens, cached_tokens) in totals.tokens.items():
+        input_tokens *= scale
+        output_tokens *= scale
+        cached_tokens *= scale
+        if model_key in voice_models:
+            model = voice_models[model_key]
+            kind = 'audio' if token_type == 'audio' else 'text'
+            costs['voice'][f'{kind}_input'] += \
+                ((input_tokens - cached_tokens) / 1_000_000) * model[f'{kind}_input_per_m_tokens'] + \
+                (cached_tokens / 1_000_000) * model[f'{kind}_cached_input_per_m_tokens']
+            costs['voice'][f'{kind}_output'] += (output_tokens / 1_000_000) * model[f'{kind}_output_per_m_tokens']
+            usage[f'{kind}_input_tokens'] += input_tokens
+            usage[f'{kind}_output_tokens'] += output_tokens
+            usage[f'{kind}_cached_tokens'] += cached_tokens
+        elif model_key in email_models:
+            model = email_models[model_key]
+            costs['email']['llm_input'] += ((input_tokens - cached_tokens) / 1_000_000) * model['input_per_m_tokens'] + \
+                                           (cached_tokens / 1_000_000) * model['cached_input_per_m_tokens']
+            costs['email']['llm_output'] += (output_tokens / 1_000_000) * model['output_per_m_tokens']
+            usage['email_input_tokens'] += input_tokens
+            usage['email_output_tokens'] += output_tokens
+            usage['email_cached_tokens'] += cached_tokens
+        else:
+            unknown_models.add(model_key)
+
+    costs['email']['execution_cost'] = _free_tier(
+        usage['executions'], functions['free_executions_per_month'],
+        lambda billable: (billable / 1_000_000) * functions['execution_cost_per_million'])
+    costs['email']['compute_cost'] = _free_tier(
+        usage['gb_seconds'], functions['free_gb_seconds_per_month'],
+        lambda billable: billable * functions['compute_cost_per_gb_second'])
+    return costs, usage, sorted(unknown_models)
+
+
+def estimated_usage(pricing, inputs, voice, email):
+    """Usage drivers implied by the estimate, for comparison with the logs"""
+    audio = pricing['voice_agent']['audio_conversion']
+    model = pricing['voice_agent']['models'][inputs['voice']['model_key']]
+    tokens = pricing['email_agent']['tokens']
+    functions = pricing['email_agent']['azure_functions']
+    audio_tokens = voice['minutes'] * audio['tokens_per_minute_audio']
+    input_per_email = tokens['base_input_tokens'] + (tokens['rag_additional_tokens'] if inputs['email']['enable_rag'] else 0)
+    audio_input_tokens = audio_tokens * audio['input_split']
+    text_input_tokens = voice['calls'] * model['tokens_per_call'] * 0.7
+    email_input_tokens = email['emails'] * input_per_email
+    return {
+        'calls': voice['calls'],
+        'minutes': voice['minutes'],
+        'audio_input_tokens': audio_input_tokens,
+        'audio_output_tokens': audio_tokens * audio['output_split'],
+        'text_input_tokens': text_input_tokens,
+        'text_output_tokens': voice['calls'] * model['tokens_per_call'] * 0.3,
+        'email_input_tokens': email_input_tokens,
+        'email_output_tokens': email['emails'] * tokens['output_tokens'],
+        'audio_cached_tokens': audio_input_tokens * inputs['voice']['audio_cache_ratio'],
+        'text_cached_tokens': text_input_tokens * inputs['voice']['text_cache_ratio'],
+        'email_cached_tokens': email_input_tokens * inputs['email']['input_cache_ratio'],
+        'executions': email['checks'],
+        'gb_seconds': email['checks'] * functions['seconds_per_execution'] * functions['memory_gb']
+    }
+
+
+def reconcile(pricing, export, totals, period_days=None):
+    """Estimate-vs-actual tables for components and usage drivers"""
+    inputs = cost_model.parse_config_export(pricing, export)
+    voice = cost_model.calculate_voice_cost(pricing, **inputs['voice'])
+    email = cost_model.calculate_email_cost(pricing, **inputs['email'])
+
+    days = period_days or totals.period_days() or 30
+    actual, usage, unknown_models = actual_costs(pricing, totals, 30 / days)
+
+    estimate = {
+        ('Voice', 'ACS calls'): (voice.acs, actual['voice']['acs']),
+        ('Voice', 'Audio input'): (voice.audio_input, actual['voice']['audio_input']),
+        ('Voice', 'Audio output'): (voice.audio_output, actual['voice']['audio_output']),
+        ('Voice', 'Text input'): (voice.text_input, actual['voice']['text_input']),
+        ('Voice', 'Text output'): (voice.text_output, actual['voice']['text_output']),
+        ('Email', 'Functions executions'): (email.execution_cost, actual['email']['execution_cost']),
+        ('Email', 'Functions compute'): (email.compute_cost, actual['email']['compute_cost']),
+        ('Email', 'LLM input'): (email.llm_input, actual['email']['llm_input']),
+        ('Email', 'LLM output'): (email.llm_output, actual['email']['llm_output'])
+    }
+    components = pd.DataFrame(
+        [(channel, name, est, act) for (channel, name), (est, act) in estimate.items()],
+        columns=['Channel', 'Component', 'Estimate', 'Actual']
+    )
+    components['Error'] = components['Estimate'] - components['Actual']
+    components['Error %'] = np.where(components['Actual'] != 0,
+                                     components['Error'] / components['Actual'].where(components['Actual'] != 0, 1) * 100,
+                                     np.nan)
+
+    expected = estimated_usage(pricing, inputs, voice, email)
+    drivers = pd.DataFrame(
+        [(name, expected[name], usage[name]) for name in expected],
+        columns=['Quantity', 'Estimate', 'Actual']
+    )
+    drivers['Ratio'] = np.where(drivers['Estimate'] != 0,
+                                drivers['Actual'] / drivers['Estimate'].where(drivers['Estimate'] != 0, 1), np.nan)
+    return components, drivers, days, unknown_models
+
+# ==============================================================================
+# SAMPLE LOGS
+# ==============================================================================
+
+def write_sample_logs(pricing, export, out_dir, days=30, seed=0):
+    """Synthetic logs roughly matching an exported configuration (for trying the pipeline)"""
+    rng = np.random.default_rng(seed)
+    inputs = cost_model.parse_config_export(pricing, export)
+    voice, email = inputs['voice'], inputs['email']
+    os.makedirs(out_dir, exist_ok=True)
+    start = pd.Timestamp('2025-01-01', tz='UTC')
+    span = days * 86400
+
+    def stamps(n):
+        return (start + pd.to_timedelta(np.sort(rng.integers(0, span, n)), unit='s')).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    calls = int(voice['calls_per_day'] * days)
+    durations = rng.gamma(4.0, voice['minutes_per_call'] * 60 / 4.0, calls).round()
+    pd.DataFrame({'timestamp': stamps(calls), 'duration_seconds': durations}).to_csv(
+        os.path.join(out_dir, 'calls.csv'), index=False)
+
+    audio = pricing['voice_agent']['audio_conversion']
+    model = pricing['voice_agent']['models'][voice['model_key']]
+    audio_tokens = durations / 60 * audio['tokens_per_minute_audio'] * rng.normal(1.0, 0.15, calls).clip(0.3)
+    emails = int(email['emails_per_day'] * days)
+    tokens = pricing['email_agent']['tokens']
+    email_input = tokens['base_input_tokens'] + (tokens['rag_additional_tokens'] if email['enable_rag'] else 0)
+    parts = [
+        pd.DataFrame({'timestamp': stamps(calls), 'model': voice['model_key'], 'token_type': 'audio',
+                      'input_tokens': (audio_tokens * audio['input_split']).round().astype(np.int64),
+                      'output_tokens': (audio_tokens * audio['output_split']).round().astype(np.int64)}),
+        pd.DataFrame({'timestamp': stamps(calls), 'model': voice['model_key'], 'token_type': 'text',
+                      'input_tokens': rng.poisson(model['tokens_per_call'] * 0.7, calls),
+                      'output_tokens': rng.poisson(model['tokens_per_call'] * 0.3, calls)}),
+        pd.DataFrame({'timestamp': stamps(emails), 'model': email['model_key'], 'token_type': 'text',
+                      'input_tokens': rng.lognormal(np.log(email_input), 0.6, emails).round().astype(np.int64),
+                      'output_tokens': rng.lognormal(np.log(tokens['output_tokens']), 0.4, emails).round().astype(np.int64)})
+    ]
+    hit_ratios = (voice['audio_cache_ratio'], voice['text_cache_ratio'], email['input_cache_ratio'])
+    for part, ratio in zip(parts, hit_ratios):
+        part['cached_input_tokens'] = rng.binomial(part['input_tokens'], ratio)
+    token_log = pd.concat(parts)
+    token_log.to_csv(os.path.join(out_dir, 'tokens.csv'), index=False)
+
+    hours = pricing['email_agent']['operating_hours']
+    hours_per_month = hours['business_hours_per_month'] if email['business_hours_only'] else hours['full_time_hours_per_month']
+    executions = int(hours_per_month * 60 / email['polling_minutes'] * days / 30)
+    functions = pricing['email_agent']['azure_functions']
+    pd.DataFrame({
+        'timestamp': stamps(executions),
+        'duration_ms': rng.gamma(2.0, functions['seconds_per_execution'] * 500, executions).round(),
+        'memory_mb': functions['memory_gb'] * 1024
+    }).to_csv(os.path.join(out_dir, 'functions.csv'), index=False)
+    return out_dir
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def _cmd_reconcile(args):
+    pricing = cost_model.load_pricing(args.pricing)
+    with open(args.config, 'r') as f:
+        export = json.load(f)
+
+    totals = UsageTotals()
+    started = time.perf_counter()
+    memory_gb = pricing['email_agent']['azure_functions']['memory_gb']
+    for kind in ('calls', 'tokens', 'functions'):
+        for path in getattr(args, kind) or []:
+            ingest(kind, path, totals, memory_gb, args.chunksize, args.workers)
+    elapsed = time.perf_counter() - started
+
+    components, drivers, days, unknown_models = reconcile(pricing, export, totals, args.period_days)
+
+    pd.set_option('display.width', 200)
+    pd.set_option('display.float_format', lambda x: f'{x:,.2f}')
+    print(f"Ingested {totals.rows_read:,} rows ({totals.bytes_read / 1e6:,.1f} MB) in {elapsed:.2f}s "
+          f"({totals.bytes_read / 1e6 / max(elapsed, 1e-9):,.0f} MB/s)")
+    print(f"Usage period: {days:.2f} days (scaled to a 30-day month)\n")
+    print("Cost components (CHF/month)")
+    print(components.to_string(index=False))
+    print(f"\nTotal estimate CHF {components['Estimate'].sum():,.2f} vs actual CHF {components['Actual'].sum():,.2f}")
+    print("\nUsage drivers (per month)")
+    print(drivers.to_string(index=False))
+    print("\nNot in the logs (estimate only): phone numbers, container apps, blob storage")
+    if unknown_models:
+        print(f"Ignored token rows for models not in pricing_config.json: {', '.join(unknown_models)}")
+
+
+def _cmd_sample(args):
+    pricing = cost_model.load_pricing(args.pricing)
+    with open(args.config, 'r') as f:
+        export = json.load(f)
+    out_dir = write_sample_logs(pricing, export, args.out, args.days, args.seed)
+    print(f"Sample logs written to {out_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile cost estimates against actual usage logs")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('reconcile', help="Ingest usage logs and compare with an exported configuration")
+    p.add_argument('--config', required=True, help="Configuration JSON exported from the app")
+    p.add_argument('--calls', nargs='*', help="Call detail record file(s)")
+    p.add_argument('--tokens', nargs='*', help="Per-request token count file(s)")
+    p.add_argument('--functions', nargs='*', help="Azure Functions execution log file(s)")
+    p.add_argument('--period-days', type=float, help="Days covered by the logs (default: from timestamps)")
+    p.add_argument('--chunksize', type=int, default=CHUNK_ROWS, help="Rows per chunk (bounds memory use)")
+    p.add_argument('--workers', type=int, help="Parallel CSV parsers (default: CPU count)")
+    p.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    p.set_defaults(func=_cmd_reconcile)
+
+    p = sub.add_parser('sample', help="Write synthetic logs for an exported configuration")
+    p.add_argument('--config', required=True)
+    p.add_argument('--out', required=True)
+    p.add_argument('--days', type=int, default=30)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--pricing', default=cost_model.PRICING_PATH)
+    p.set_defaults(func=_cmd_sample)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()